@@ -1,73 +1,118 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 
-import mysql.connector
 import ttkbootstrap as tb
 
+import instrumentation
+import offline
+import services
+from db_pool import connect_db
+from db_worker import DbWorker
+from paged_view import ChangeSubscriber, PagedTreeview
+from rentals_view import RentalsSource
+from search import SEARCH_FIELDS, SEARCH_MODES
+from summaries import rebuild_summaries
+from reports import AGGREGATE_REPORTS, TABLE_REPORTS, report_query
+from export import export_source
+from analytics import DIMENSIONS, FrameSource, store as analytics_store
+from payments import PAYMENT_METHODS
+from instrumentation import HISTOGRAM_BOUNDS, handler
+
+# Branch mode: reads come from the local replica and writes go
+# through its outbox (see offline.py)
+backend = offline if offline.OFFLINE else services
+# ... and the paged grids read the same database
+connect_grid = offline.connect_replica if offline.OFFLINE else connect_db
+
 
 # ==========================
-# Database Connection Helper
+# UI Helpers
 # ==========================
+# Database work goes through `backend` (services.py, or offline.py in
+# branch mode) on the worker threads; the callbacks below run on the Tk loop and are the only code touching widgets.
 
-def connect_db():
-    """Create a new MySQL connection."""
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="Toor",
-        database="RentalDB"
-    )
+def render_rows(tree, cols, rows):
+    """Replace the contents of a Treeview with the given rows."""
+    tree.delete(*tree.get_children())
+    tree["columns"] = cols
+    tree["show"] = "headings"
 
+    for col in cols:
+        tree.heading(col, text=col)
 
-def run_query(query, tree):
-    """Run a SELECT query and render results into a Treeview."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        cols = [desc[0] for desc in cursor.description]
+    for row in rows:
+        tree.insert("", tk.END, values=row)
 
-        tree.delete(*tree.get_children())
-        tree["columns"] = cols
-        tree["show"] = "headings"
 
-        for col in cols:
-            tree.heading(col, text=col)
+SEARCH_DEBOUNCE_MS = 250   # pause in typing before a live search runs
 
-        for row in rows:
-            tree.insert("", tk.END, values=row)
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Database Error", str(e))
+def debounce(widget, delay_ms, fn):
+    """Return a callback that runs fn once typing pauses for delay_ms.
+
+    Each call cancels the previously scheduled run, so a burst of
+    keystrokes costs a single query.
+    """
+    pending = {"id": None}
+
+    def run():
+        pending["id"] = None
+        fn()
+
+    def trigger(_event=None):
+        if pending["id"] is not None:
+            widget.after_cancel(pending["id"])
+        pending["id"] = widget.after(delay_ms, run)
+
+    return trigger
+
+
+def show_error(title):
+    """Build an error callback that reports an exception in a messagebox."""
+    return lambda e: messagebox.showerror(title, str(e))
+
+
+@handler
+def run_query(query, tree):
+    """Run a SELECT query in the background and render results into a Treeview.
+
+    A PagedTreeview streams the result a page at a time instead.
+    """
+    if isinstance(tree, PagedTreeview):
+        tree.load(query)
+        return
+
+    worker.submit(
+        backend.fetch_rows,
+        query,
+        key=("tree", str(tree)),
+        on_success=lambda result: render_rows(tree, *result),
+        on_error=show_error("Database Error")
+    )
 
 
 # ==========================
 # Customer Functions
 # ==========================
 
+@handler
 def add_customer(first, last, email, phone, tree):
     """Insert a new customer and refresh the given Treeview."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        query = """
-            INSERT INTO Customers (first_name, last_name, email, phone)
-            VALUES (%s, %s, %s, %s)
-        """
-        cursor.execute(query, (first.get(), last.get(), email.get(), phone.get()))
-        conn.commit()
-        messagebox.showinfo("Success", "Customer added successfully!")
 
-        # Refresh the customer table after adding a new customer
-        run_query("SELECT * FROM Customers", tree)
-
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    def on_added(_):
+        messagebox.showinfo("Success", "Customer added successfully!")
+        # Bring the new customer into the table without reloading it
+        show_changes(lambda: run_query("SELECT * FROM Customers", tree))
+
+    worker.submit(
+        backend.add_customer,
+        first.get(),
+        last.get(),
+        email.get(),
+        phone.get(),
+        on_success=on_added,
+        on_error=show_error("Error")
+    )
 
 
 def view_customers(tree):
@@ -79,22 +124,22 @@ def view_customers(tree):
 # Car / Inventory Functions
 # ==========================
 
+@handler
 def add_car(car_type, car_color, car_price):
     """Insert a new car into the Cars table."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        query = """
-            INSERT INTO Cars (car_type, car_color, car_price)
-            VALUES (%s, %s, %s)
-        """
-        cursor.execute(query, (car_type.get(), car_color.get(), car_price.get()))
-        conn.commit()
+
+    def on_added(_):
         messagebox.showinfo("Success", "Car added successfully!")
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+        show_changes(lambda: run_query("SELECT * FROM Cars", new_car_table))
+
+    worker.submit(
+        backend.add_car,
+        car_type.get(),
+        car_color.get(),
+        car_price.get(),
+        on_success=on_added,
+        on_error=show_error("Error")
+    )
 
 
 def view_cars(tree):
@@ -110,6 +155,48 @@ app = tb.Window(themename="superhero")
 app.title("Car Rental Management")
 app.geometry("1100x750")
 
+# ----- Status Bar / Busy Indicator -----
+
+status_bar = ttk.Frame(app)
+status_bar.pack(side='bottom', fill='x', padx=10, pady=2)
+
+status_label = ttk.Label(status_bar, text="Ready", anchor="w")
+status_label.pack(side='left')
+
+busy_bar = ttk.Progressbar(status_bar, mode="indeterminate", length=120)
+
+
+def set_busy(pending):
+    """Show the progress bar while background queries are running."""
+    if pending > 0:
+        status_label.config(text=f"Working... ({pending} pending)")
+        if not busy_bar.winfo_ismapped():
+            busy_bar.pack(side='right')
+            busy_bar.start(10)
+    else:
+        status_label.config(text="Ready")
+        busy_bar.stop()
+        busy_bar.pack_forget()
+
+
+worker = DbWorker(app, on_busy_change=set_busy)
+
+# Open tables follow the change log instead of re-running their queries;
+# the views it watches are registered where they are built.
+change_subscriber = ChangeSubscriber(worker)
+
+
+def show_changes(reload):
+    """Bring watched views up to date after a write made by this client.
+
+    Offline, writes land in the local replica rather than the central
+    change log, so the view is reloaded instead.
+    """
+    if offline.OFFLINE:
+        reload()
+    else:
+        change_subscriber.poll()
+
 notebook = ttk.Notebook(app)
 notebook.pack(fill='both', expand=True)
 
@@ -164,16 +251,28 @@ search_field = tk.StringVar()
 search_menu = ttk.Combobox(
     search_frame,
     textvariable=search_field,
-    values=["customer_id", "first_name", "last_name", "email", "phone"]
+    values=SEARCH_FIELDS["Customers"]
 )
 search_field.set("customer_id")
 
+search_mode = tk.StringVar(value="prefix")
+search_mode_menu = ttk.Combobox(
+    search_frame,
+    textvariable=search_mode,
+    values=SEARCH_MODES,
+    state="readonly"
+)
+
 search_entry = ttk.Entry(search_frame)
 search_btn = ttk.Button(search_frame, text="Search")
 
+search_results = tk.Listbox(search_frame, height=10, exportselection=False)
+
 search_menu.pack(fill='x', padx=5, pady=2)
+search_mode_menu.pack(fill='x', padx=5, pady=2)
 search_entry.pack(fill='x', padx=5, pady=2)
 search_btn.pack(padx=5, pady=5)
+search_results.pack(fill='both', expand=True, padx=5, pady=2)
 
 # ----- Right: Customer Details & Rental History -----
 
@@ -214,98 +313,67 @@ rental_table.pack(fill='both', expand=True, padx=5, pady=5)
 current_customer_id = tk.IntVar()
 
 
-def search_customer(search_field_name, search_value_entry, info_label, rental_tree):
-    """Search a customer and load their info + rental history."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        query = f"SELECT * FROM Customers WHERE {search_field_name} LIKE %s"
-        cursor.execute(query, (f"%{search_value_entry.get()}%",))
-        rows = cursor.fetchall()
+def show_customer(customer, rental_rows, info_label, rental_tree):
+    """Populate the customer details form and rental history table."""
+    current_customer_id.set(customer[0])
 
-        if not rows:
-            messagebox.showinfo("Info", "No customer found")
-            cursor.close()
-            conn.close()
-            return
-
-        customer = rows[0]
-        current_customer_id.set(customer[0])
-
-        info_label.config(
-            text=(
-                f"Customer Info:\n"
-                f"ID: {customer[0]}\n"
-                f"Name: {customer[1]} {customer[2]}\n"
-                f"Email: {customer[3]}\n"
-                f"Phone: {customer[4]}"
-            )
+    info_label.config(
+        text=(
+            f"Customer Info:\n"
+            f"ID: {customer[0]}\n"
+            f"Name: {customer[1]} {customer[2]}\n"
+            f"Email: {customer[3]}\n"
+            f"Phone: {customer[4]}"
         )
+    )
 
-        edit_fields["First Name"].delete(0, tk.END)
-        edit_fields["First Name"].insert(0, customer[1])
-
-        edit_fields["Last Name"].delete(0, tk.END)
-        edit_fields["Last Name"].insert(0, customer[2])
+    edit_fields["First Name"].delete(0, tk.END)
+    edit_fields["First Name"].insert(0, customer[1])
 
-        edit_fields["Email"].delete(0, tk.END)
-        edit_fields["Email"].insert(0, customer[3])
+    edit_fields["Last Name"].delete(0, tk.END)
+    edit_fields["Last Name"].insert(0, customer[2])
 
-        edit_fields["Phone"].delete(0, tk.END)
-        edit_fields["Phone"].insert(0, customer[4])
+    edit_fields["Email"].delete(0, tk.END)
+    edit_fields["Email"].insert(0, customer[3])
 
-        rental_query = """
-            SELECT
-                Rentals.rental_id,
-                Cars.car_type,
-                Rentals.rental_start_date,
-                Rentals.rental_end_date
-            FROM Rentals
-            JOIN Cars ON Rentals.car_id = Cars.car_id
-            WHERE Rentals.customer_id = %s
-        """
-        cursor.execute(rental_query, (customer[0],))
-        rental_rows = cursor.fetchall()
+    edit_fields["Phone"].delete(0, tk.END)
+    edit_fields["Phone"].insert(0, customer[4])
 
-        rental_tree.delete(*rental_tree.get_children())
-        rental_tree["columns"] = ["rental_id", "car_type", "start_date", "end_date"]
-        rental_tree["show"] = "headings"
+    render_rows(
+        rental_tree,
+        ["rental_id", "car_type", "start_date", "end_date"],
+        rental_rows
+    )
 
-        for col in rental_tree["columns"]:
-            rental_tree.heading(col, text=col)
 
-        for row in rental_rows:
-            rental_tree.insert("", tk.END, values=row)
+@handler
+def search_customer(search_field_name, search_value_entry, info_label, rental_tree):
+    """Search a customer and load their info + rental history."""
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    def on_found(result):
+        customer, rental_rows = result
+        if customer is None:
+            messagebox.showinfo("Info", "No customer found")
+            return
+        show_customer(customer, rental_rows, info_label, rental_tree)
+
+    worker.submit(
+        backend.find_customer,
+        search_field_name,
+        search_value_entry.get(),
+        search_mode.get(),
+        key="search_customer",
+        on_success=on_found,
+        on_error=show_error("Error")
+    )
 
 
+@handler
 def update_customer():
     """Update the selected customer's information."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        query = """
-            UPDATE Customers
-            SET first_name=%s, last_name=%s, email=%s, phone=%s
-            WHERE customer_id=%s
-        """
-        data = (
-            edit_fields["First Name"].get(),
-            edit_fields["Last Name"].get(),
-            edit_fields["Email"].get(),
-            edit_fields["Phone"].get(),
-            current_customer_id.get()
-        )
-        cursor.execute(query, data)
-        conn.commit()
-        messagebox.showinfo("Success", "Customer updated successfully")
-        cursor.close()
-        conn.close()
 
+    def on_updated(_):
+        messagebox.showinfo("Success", "Customer updated successfully")
         # Refresh the customer details and rental history
         search_customer(
             search_field.get(),
@@ -313,35 +381,39 @@ def update_customer():
             cust_info_label,
             rental_table
         )
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+
+    worker.submit(
+        backend.update_customer,
+        current_customer_id.get(),
+        edit_fields["First Name"].get(),
+        edit_fields["Last Name"].get(),
+        edit_fields["Email"].get(),
+        edit_fields["Phone"].get(),
+        on_success=on_updated,
+        on_error=show_error("Error")
+    )
 
 
+@handler
 def delete_customer():
     """Delete the currently selected customer."""
     confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this customer?")
     if not confirm:
         return
 
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM Customers WHERE customer_id=%s",
-            (current_customer_id.get(),)
-        )
-        conn.commit()
+    def on_deleted(_):
         messagebox.showinfo("Deleted", "Customer deleted successfully")
-
         cust_info_label.config(text="Customer Info:")
         for entry in edit_fields.values():
             entry.delete(0, tk.END)
         rental_table.delete(*rental_table.get_children())
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    worker.submit(
+        backend.delete_customer,
+        current_customer_id.get(),
+        on_success=on_deleted,
+        on_error=show_error("Error")
+    )
 
 
 # Wire up buttons
@@ -356,6 +428,61 @@ search_btn.config(
 update_btn.config(command=update_customer)
 delete_btn.config(command=delete_customer)
 
+# ----- Live customer search -----
+
+live_customers = []
+
+
+@handler
+def live_search_customer():
+    """Refresh the result list for the text typed so far."""
+    value = search_entry.get().strip()
+    if not value:
+        worker.cancel("live_search_customer")
+        live_customers.clear()
+        search_results.delete(0, tk.END)
+        return
+
+    def on_results(rows):
+        live_customers[:] = rows
+        search_results.delete(0, tk.END)
+        for row in rows:
+            search_results.insert(tk.END, f"{row[0]}: {row[1]} {row[2]} <{row[3]}>")
+
+    worker.submit(
+        backend.live_search_customers,
+        search_field.get(),
+        value,
+        search_mode.get(),
+        key="live_search_customer",
+        on_success=on_results,
+        on_error=show_error("Error")
+    )
+
+
+@handler
+def pick_live_customer(_event):
+    selected = search_results.curselection()
+    if not selected:
+        return
+
+    def on_loaded(result):
+        customer, rental_rows = result
+        if customer is not None:
+            show_customer(customer, rental_rows, cust_info_label, rental_table)
+
+    worker.submit(
+        backend.load_customer,
+        live_customers[selected[0]][0],
+        key="search_customer",
+        on_success=on_loaded,
+        on_error=show_error("Error")
+    )
+
+
+search_entry.bind("<KeyRelease>", debounce(search_entry, SEARCH_DEBOUNCE_MS, live_search_customer))
+search_results.bind("<<ListboxSelect>>", pick_live_customer)
+
 # ----- Add New Customer Form -----
 
 add_form_frame = ttk.LabelFrame(cust_tab, text="Add New Customer")
@@ -383,8 +510,9 @@ for i, (label_text, entry) in enumerate(fields):
 
 form_frame.columnconfigure(1, weight=1)
 
-new_customer_table = ttk.Treeview(add_form_frame)
+new_customer_table = PagedTreeview(add_form_frame, worker, connect=connect_grid)
 new_customer_table.pack(fill='both', expand=True, padx=10, pady=10)
+change_subscriber.watch(new_customer_table, "Customers")
 
 ttk.Button(
     add_form_frame,
@@ -451,16 +579,28 @@ car_search_field = tk.StringVar()
 car_search_menu = ttk.Combobox(
     search_car_frame,
     textvariable=car_search_field,
-    values=["car_id", "car_type", "car_color"]
+    values=SEARCH_FIELDS["Cars"]
 )
 car_search_field.set("car_id")
 
+car_search_mode = tk.StringVar(value="prefix")
+car_search_mode_menu = ttk.Combobox(
+    search_car_frame,
+    textvariable=car_search_mode,
+    values=SEARCH_MODES,
+    state="readonly"
+)
+
 car_search_entry = ttk.Entry(search_car_frame)
 car_search_btn = ttk.Button(search_car_frame, text="Search")
 
+car_search_results = tk.Listbox(search_car_frame, height=10, exportselection=False)
+
 car_search_menu.pack(fill='x', padx=5, pady=2)
+car_search_mode_menu.pack(fill='x', padx=5, pady=2)
 car_search_entry.pack(fill='x', padx=5, pady=2)
 car_search_btn.pack(padx=5, pady=5)
+car_search_results.pack(fill='both', expand=True, padx=5, pady=2)
 
 car_details_frame = ttk.LabelFrame(search_car_container, text="Car Details")
 car_details_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
@@ -491,98 +631,93 @@ car_info_label = ttk.Label(
 car_info_label.pack(fill='x', padx=5, pady=5)
 
 
-def search_car(search_field_name, search_value_entry, info_label):
-    """Search a car and populate the details form."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        query = f"SELECT * FROM Cars WHERE {search_field_name} LIKE %s"
-        cursor.execute(query, (f"%{search_value_entry.get()}%",))
-        rows = cursor.fetchall()
+def show_car(car, info_label):
+    """Populate the car details form."""
+    current_car_id.set(car[0])
 
-        if not rows:
-            messagebox.showinfo("Info", "No car found")
-            cursor.close()
-            conn.close()
-            return
-
-        car = rows[0]
-        current_car_id.set(car[0])
-
-        info_label.config(
-            text=(
-                f"Car Info:\n"
-                f"ID: {car[0]}\n"
-                f"Type: {car[1]}\n"
-                f"Color: {car[2]}\n"
-                f"Price: ${car[3]}"
-            )
+    info_label.config(
+        text=(
+            f"Car Info:\n"
+            f"ID: {car[0]}\n"
+            f"Type: {car[1]}\n"
+            f"Color: {car[2]}\n"
+            f"Price: ${car[3]}"
         )
+    )
+
+    car_edit_fields["Car Type"].delete(0, tk.END)
+    car_edit_fields["Car Type"].insert(0, car[1])
 
-        car_edit_fields["Car Type"].delete(0, tk.END)
-        car_edit_fields["Car Type"].insert(0, car[1])
+    car_edit_fields["Car Color"].delete(0, tk.END)
+    car_edit_fields["Car Color"].insert(0, car[2])
 
-        car_edit_fields["Car Color"].delete(0, tk.END)
-        car_edit_fields["Car Color"].insert(0, car[2])
+    car_edit_fields["Car Price"].delete(0, tk.END)
+    car_edit_fields["Car Price"].insert(0, car[3])
 
-        car_edit_fields["Car Price"].delete(0, tk.END)
-        car_edit_fields["Car Price"].insert(0, car[3])
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+@handler
+def search_car(search_field_name, search_value_entry, info_label):
+    """Search a car and populate the details form."""
 
+    def on_found(car):
+        if car is None:
+            messagebox.showinfo("Info", "No car found")
+            return
+        show_car(car, info_label)
+
+    worker.submit(
+        backend.find_car,
+        search_field_name,
+        search_value_entry.get(),
+        car_search_mode.get(),
+        key="search_car",
+        on_success=on_found,
+        on_error=show_error("Error")
+    )
 
+
+@handler
 def update_car():
     """Update the selected car."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        query = """
-            UPDATE Cars
-            SET car_type=%s, car_color=%s, car_price=%s
-            WHERE car_id=%s
-        """
-        data = (
-            car_edit_fields["Car Type"].get(),
-            car_edit_fields["Car Color"].get(),
-            car_edit_fields["Car Price"].get(),
-            current_car_id.get()
-        )
-        cursor.execute(query, data)
-        conn.commit()
-        messagebox.showinfo("Success", "Car updated successfully")
-        cursor.close()
-        conn.close()
 
+    def on_updated(repriced):
+        message = "Car updated successfully"
+        if repriced:
+            message += f"\n{repriced} open invoice(s) re-priced"
+        messagebox.showinfo("Success", message)
         # Refresh the car details
         search_car(car_search_field.get(), car_search_entry, car_info_label)
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+
+    worker.submit(
+        backend.update_car,
+        current_car_id.get(),
+        car_edit_fields["Car Type"].get(),
+        car_edit_fields["Car Color"].get(),
+        car_edit_fields["Car Price"].get(),
+        on_success=on_updated,
+        on_error=show_error("Error")
+    )
 
 
+@handler
 def delete_car():
     """Delete the selected car."""
     confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this car?")
     if not confirm:
         return
 
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM Cars WHERE car_id=%s", (current_car_id.get(),))
-        conn.commit()
+    def on_deleted(_):
         messagebox.showinfo("Deleted", "Car deleted successfully")
-
         car_info_label.config(text="Car Info:")
         for entry in car_edit_fields.values():
             entry.delete(0, tk.END)
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    worker.submit(
+        backend.delete_car,
+        current_car_id.get(),
+        on_success=on_deleted,
+        on_error=show_error("Error")
+    )
 
 
 car_search_btn.config(
@@ -595,6 +730,48 @@ car_search_btn.config(
 car_update_btn.config(command=update_car)
 car_delete_btn.config(command=delete_car)
 
+# ----- Live car search -----
+
+live_cars = []
+
+
+@handler
+def live_search_car():
+    """Refresh the result list for the text typed so far."""
+    value = car_search_entry.get().strip()
+    if not value:
+        worker.cancel("live_search_car")
+        live_cars.clear()
+        car_search_results.delete(0, tk.END)
+        return
+
+    def on_results(rows):
+        live_cars[:] = rows
+        car_search_results.delete(0, tk.END)
+        for row in rows:
+            car_search_results.insert(tk.END, f"{row[0]}: {row[1]} ({row[2]}) ${row[3]}")
+
+    worker.submit(
+        backend.live_search_cars,
+        car_search_field.get(),
+        value,
+        car_search_mode.get(),
+        key="live_search_car",
+        on_success=on_results,
+        on_error=show_error("Error")
+    )
+
+
+@handler
+def pick_live_car(_event):
+    selected = car_search_results.curselection()
+    if selected:
+        show_car(live_cars[selected[0]], car_info_label)
+
+
+car_search_entry.bind("<KeyRelease>", debounce(car_search_entry, SEARCH_DEBOUNCE_MS, live_search_car))
+car_search_results.bind("<<ListboxSelect>>", pick_live_car)
+
 # ----- Add New Car Form -----
 
 add_car_form_frame = ttk.LabelFrame(inventory_tab, text="Add New Car")
@@ -630,8 +807,9 @@ ttk.Button(
     )
 ).pack(pady=10)
 
-new_car_table = ttk.Treeview(add_car_form_frame)
+new_car_table = PagedTreeview(add_car_form_frame, worker, connect=connect_grid)
 new_car_table.pack(fill='both', expand=True, padx=10, pady=10)
+change_subscriber.watch(new_car_table, "Cars")
 
 # Default to existing car mode view
 update_car_mode()
@@ -710,45 +888,56 @@ estimated_price_label = ttk.Label(
 )
 estimated_price_label.pack(pady=5)
 
+availability_label = ttk.Label(create_rental_frame, text="")
+availability_label.pack(pady=2)
 
-def estimate_rental():
-    """Estimate rental cost for given dates and car."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "SELECT car_price FROM Cars WHERE car_id = %s",
-            (car_id_entry.get(),)
-        )
-        result = cursor.fetchone()
 
-        if not result:
-            messagebox.showerror("Error", "Invalid Car ID")
-            cursor.close()
-            conn.close()
-            return
+@handler
+def check_rental_availability(_event=None):
+    """Show whether the car is free for the typed dates (runs on every keystroke)."""
+    car_id = car_id_entry.get().strip()
+    start, end = start_entry.get().strip(), end_entry.get().strip()
+    if not (car_id.isdigit() and len(start) == 10 and len(end) == 10):
+        worker.cancel("availability")
+        availability_label.config(text="")
+        return
 
-        daily_rate = result[0]
+    def on_checked(conflicts):
+        if conflicts:
+            booked = ", ".join(f"{s} to {e}" for s, e, _ in conflicts)
+            availability_label.config(text=f"Booked: {booked}", foreground="red")
+        else:
+            availability_label.config(text="Available", foreground="green")
+
+    worker.submit(
+        backend.check_availability,
+        car_id,
+        start,
+        end,
+        key="availability",
+        on_success=on_checked,
+        on_error=lambda e: availability_label.config(text=str(e), foreground="orange")
+    )
 
-        from datetime import datetime
-        start_date = datetime.strptime(start_entry.get(), "%Y-%m-%d")
-        end_date = datetime.strptime(end_entry.get(), "%Y-%m-%d")
-        num_days = (end_date - start_date).days
 
-        if num_days <= 0:
-            messagebox.showerror("Error", "End date must be after start date.")
-            cursor.close()
-            conn.close()
-            return
+for entry in (car_id_entry, start_entry, end_entry):
+    entry.bind("<KeyRelease>", check_rental_availability)
 
-        total = round(num_days * daily_rate, 2)
-        estimated_price_label.config(text=f"Estimated Invoice: ${total}")
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+@handler
+def estimate_rental():
+    """Estimate rental cost for given dates and car."""
+    worker.submit(
+        backend.estimate_rental,
+        car_id_entry.get(),
+        start_entry.get(),
+        end_entry.get(),
+        key="estimate_rental",
+        on_success=lambda total: estimated_price_label.config(
+            text=f"Estimated Invoice: ${total}"
+        ),
+        on_error=show_error("Error")
+    )
 
 
 rental_summary_frame = ttk.LabelFrame(create_rental_frame, text="Rental Summary")
@@ -764,77 +953,65 @@ rental_summary_label = ttk.Label(
 rental_summary_label.pack(anchor="w", padx=10, pady=5)
 
 
+@handler
 def create_rental_after_estimate():
     """Create a rental, commit to DB, and show a summary (invoice via trigger)."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            INSERT INTO Rentals (customer_id, car_id, rental_start_date, rental_end_date)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (cust_id_entry.get(), car_id_entry.get(), start_entry.get(), end_entry.get())
-        )
-        rental_id = cursor.lastrowid  # noqa: F841 (kept for clarity if needed later)
 
-        cursor.execute(
-            "SELECT car_price, car_type FROM Cars WHERE car_id = %s",
-            (car_id_entry.get(),)
-        )
-        car_data = cursor.fetchone()
-        if not car_data:
-            messagebox.showerror("Error", "Car not found.")
-            cursor.close()
-            conn.close()
-            return
+    def on_created(summary):
+        summary_text = f"""
+Customer: {summary["customer_name"]}
+Car Type: {summary["car_type"]}
+Duration: {summary["days"]} day(s)
+Cost: ${summary["total"]}
+""".strip()
+        if summary.get("queued"):
+            summary_text += "\nSaved locally; will sync to the central database"
 
-        car_price, car_type_str = car_data
+        rental_summary_label.config(text=summary_text)
+        rental_summary_frame.pack(fill='x', padx=20, pady=10)
+        check_rental_availability()
+
+    worker.submit(
+        backend.create_rental,
+        cust_id_entry.get(),
+        car_id_entry.get(),
+        start_entry.get(),
+        end_entry.get(),
+        on_success=on_created,
+        on_error=show_error("Error")
+    )
 
-        cursor.execute(
-            "SELECT first_name, last_name FROM Customers WHERE customer_id = %s",
-            (cust_id_entry.get(),)
-        )
-        cust_data = cursor.fetchone()
-        if not cust_data:
-            messagebox.showerror("Error", "Customer not found.")
-            cursor.close()
-            conn.close()
-            return
 
-        cust_full_name = f"{cust_data[0]} {cust_data[1]}"
+free_cars_tree = ttk.Treeview(create_rental_frame, height=6)
 
-        from datetime import datetime
-        days = (
-            datetime.strptime(end_entry.get(), "%Y-%m-%d")
-            - datetime.strptime(start_entry.get(), "%Y-%m-%d")
-        ).days
 
-        if days <= 0:
-            messagebox.showerror("Error", "End date must be after start date.")
-            cursor.close()
-            conn.close()
-            return
+@handler
+def show_free_cars():
+    """List the cars with no booking overlapping the entered dates."""
 
-        total = round(days * car_price, 2)
-        conn.commit()
+    def on_loaded(cars):
+        render_rows(free_cars_tree, ["car_id", "car_type", "car_color", "car_price"], cars)
+        free_cars_tree.pack(fill='x', padx=20, pady=5)
 
-        summary_text = f"""
-Customer: {cust_full_name}
-Car Type: {car_type_str}
-Duration: {days} day(s)
-Cost: ${total}
-""".strip()
+    worker.submit(
+        backend.free_cars,
+        start_entry.get(),
+        end_entry.get(),
+        key="free_cars",
+        on_success=on_loaded,
+        on_error=show_error("Error")
+    )
 
-        rental_summary_label.config(text=summary_text)
-        rental_summary_frame.pack(fill='x', padx=20, pady=10)
 
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+def pick_free_car(_event):
+    selected = free_cars_tree.selection()
+    if selected:
+        car_id_entry.delete(0, tk.END)
+        car_id_entry.insert(0, free_cars_tree.item(selected[0])["values"][0])
+        check_rental_availability()
+
 
+free_cars_tree.bind("<<TreeviewSelect>>", pick_free_car)
 
 rental_btns = ttk.Frame(create_rental_frame)
 rental_btns.pack(pady=10)
@@ -847,34 +1024,77 @@ ttk.Button(
     text="Create Rental",
     command=create_rental_after_estimate
 ).pack(side="left", padx=10)
+ttk.Button(rental_btns, text="Free Cars", command=show_free_cars).pack(
+    side="left", padx=10
+)
 
 # ----- View & Modify Existing Rentals -----
 
 modify_rental_frame = ttk.LabelFrame(rentals_tab, text="View & Modify Rentals")
 
-rental_table_view = ttk.Treeview(modify_rental_frame)
+rental_filter_frame = ttk.Frame(modify_rental_frame)
+rental_filter_frame.pack(fill='x', padx=10, pady=5)
+
+rental_filters = {
+    "start_from": ttk.Entry(rental_filter_frame, width=12),
+    "start_to": ttk.Entry(rental_filter_frame, width=12),
+    "customer": ttk.Entry(rental_filter_frame, width=16),
+    "car_type": ttk.Entry(rental_filter_frame, width=12)
+}
+rental_filter_labels = {
+    "start_from": "Start From",
+    "start_to": "Start To",
+    "customer": "Customer (ID / Last Name)",
+    "car_type": "Car Type"
+}
+
+for key, entry in rental_filters.items():
+    ttk.Label(rental_filter_frame, text=rental_filter_labels[key]).pack(side='left', padx=(5, 2))
+    entry.pack(side='left', padx=(0, 5))
+
+# Archived (closed, paid-up) rentals are only read when asked for; the
+# branch replica holds no archive
+rental_archive_var = tk.BooleanVar(value=False)
+ttk.Checkbutton(
+    rental_filter_frame,
+    text="Include archive",
+    variable=rental_archive_var,
+    state="disabled" if offline.OFFLINE else "normal"
+).pack(side='left', padx=5)
+
+rental_table_view = PagedTreeview(modify_rental_frame, worker, connect=connect_grid)
 rental_table_view.pack(fill='both', expand=True, padx=10, pady=10)
+change_subscriber.watch(rental_table_view, "Rentals")
+
+rental_sort = {"column": "rental_id", "descending": False}
 
 
+@handler
 def view_all_rentals():
-    """Show all rentals with customer and car information."""
-    run_query(
-        """
-        SELECT
-            Rentals.rental_id,
-            Customers.first_name,
-            Customers.last_name,
-            Cars.car_type,
-            Rentals.rental_start_date,
-            Rentals.rental_end_date
-        FROM Rentals
-        JOIN Customers ON Rentals.customer_id = Customers.customer_id
-        JOIN Cars ON Rentals.car_id = Cars.car_id
-        """,
-        rental_table_view
+    """Show rentals with customer and car information, filtered and sorted server-side."""
+    filters = {key: entry.get().strip() for key, entry in rental_filters.items()}
+    rental_table_view.load_source(
+        RentalsSource(
+            filters, rental_sort["column"], rental_sort["descending"], rental_archive_var.get(),
+            connect=connect_grid
+        )
     )
 
 
+@handler
+def sort_rentals(column):
+    """Sort the rentals view by a column; clicking again reverses the order."""
+    if rental_sort["column"] == column:
+        rental_sort["descending"] = not rental_sort["descending"]
+    else:
+        rental_sort["column"] = column
+        rental_sort["descending"] = False
+    view_all_rentals()
+
+
+rental_table_view.on_sort = sort_rentals
+
+
 ttk.Button(
     modify_rental_frame,
     text="View All Rentals",
@@ -897,76 +1117,25 @@ for label_text, entry in update_fields.items():
     entry.pack(fill='x', expand=True)
 
 
+@handler
 def update_rental():
     """Update a rental's dates and recalculate its invoice."""
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        rental_id = update_fields["Rental ID"].get()
-        new_start = update_fields["Start Date"].get()
-        new_end = update_fields["End Date"].get()
-
-        cursor.execute(
-            """
-            UPDATE Rentals
-            SET rental_start_date = %s, rental_end_date = %s
-            WHERE rental_id = %s
-            """,
-            (new_start, new_end, rental_id)
-        )
-
-        cursor.execute(
-            """
-            SELECT car_price
-            FROM Cars
-            JOIN Rentals ON Rentals.car_id = Cars.car_id
-            WHERE Rentals.rental_id = %s
-            """,
-            (rental_id,)
-        )
-        daily_rate_row = cursor.fetchone()
-        if not daily_rate_row:
-            messagebox.showerror("Error", "Rental or car not found.")
-            cursor.close()
-            conn.close()
-            return
-
-        daily_rate = daily_rate_row[0]
-
-        from datetime import datetime
-        num_days = (
-            datetime.strptime(new_end, "%Y-%m-%d")
-            - datetime.strptime(new_start, "%Y-%m-%d")
-        ).days
-
-        if num_days <= 0:
-            messagebox.showerror("Error", "End date must be after start date.")
-            cursor.close()
-            conn.close()
-            return
 
-        new_total = round(num_days * daily_rate, 2)
-
-        cursor.execute(
-            """
-            UPDATE Invoices
-            SET invoice_amount = %s
-            WHERE rental_id = %s
-            """,
-            (new_total, rental_id)
-        )
-
-        conn.commit()
+    def on_updated(new_total):
         messagebox.showinfo("Success", f"Rental updated! New Invoice: ${new_total}")
-
-        cursor.close()
-        conn.close()
-        view_all_rentals()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+        show_changes(view_all_rentals)
+
+    worker.submit(
+        backend.update_rental,
+        update_fields["Rental ID"].get(),
+        update_fields["Start Date"].get(),
+        update_fields["End Date"].get(),
+        on_success=on_updated,
+        on_error=show_error("Error")
+    )
 
 
+@handler
 def delete_rental():
     """Delete a rental and let FK constraints handle invoice removal."""
     rental_id = update_fields["Rental ID"].get()
@@ -978,17 +1147,16 @@ def delete_rental():
     if not confirm:
         return
 
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM Rentals WHERE rental_id = %s", (rental_id,))
-        conn.commit()
+    def on_deleted(_):
         messagebox.showinfo("Deleted", "Rental deleted successfully")
-        cursor.close()
-        conn.close()
-        view_all_rentals()
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+        show_changes(view_all_rentals)
+
+    worker.submit(
+        backend.delete_rental,
+        rental_id,
+        on_success=on_deleted,
+        on_error=show_error("Error")
+    )
 
 
 rental_btn_row = ttk.Frame(update_rental_frame)
@@ -1008,12 +1176,188 @@ ttk.Button(
 # default mode
 update_rental_mode()
 
+# ==========================
+# Payments Tab
+# ==========================
+
+payments_tab = ttk.Frame(notebook)
+notebook.add(payments_tab, text="Payments")
+if offline.OFFLINE:
+    # Balances live in the central database only (see offline.py)
+    notebook.tab(payments_tab, state="disabled")
+
+invoice_frame = ttk.LabelFrame(payments_tab, text="Invoice")
+invoice_frame.pack(fill='x', padx=10, pady=5)
+
+ttk.Label(invoice_frame, text="Invoice ID").pack(side='left', padx=5)
+invoice_id_entry = ttk.Entry(invoice_frame, width=12)
+invoice_id_entry.pack(side='left', padx=5)
+
+invoice_balance_label = ttk.Label(invoice_frame, text="", font=("Helvetica", 10, "bold"))
+
+invoice_payments_tree = ttk.Treeview(payments_tab, height=6)
+
+
+@handler
+def look_up_invoice(_event=None):
+    """Show an invoice's balance (kept on the invoice row) and its payments."""
+    invoice_id = invoice_id_entry.get().strip()
+    if not invoice_id.isdigit():
+        messagebox.showerror("Error", "Enter a numeric Invoice ID.")
+        return
+
+    def on_balance(invoice):
+        if invoice is None:
+            invoice_balance_label.config(text="Invoice not found")
+            invoice_payments_tree.delete(*invoice_payments_tree.get_children())
+            return
+        invoice_balance_label.config(
+            text=f"Rental {invoice['rental_id']}: ${invoice['amount_paid']} of "
+                 f"${invoice['invoice_amount']} paid, balance ${invoice['balance']}"
+        )
+        worker.submit(
+            backend.invoice_payments,
+            invoice_id,
+            key="invoice_payments",
+            on_success=lambda result: render_rows(invoice_payments_tree, *result),
+            on_error=show_error("Database Error")
+        )
+
+    worker.submit(
+        backend.invoice_balance,
+        invoice_id,
+        key="invoice_balance",
+        on_success=on_balance,
+        on_error=show_error("Database Error")
+    )
+
+
+ttk.Button(invoice_frame, text="Look Up", command=look_up_invoice).pack(side='left', padx=5)
+invoice_balance_label.pack(side='left', padx=10)
+invoice_id_entry.bind("<Return>", look_up_invoice)
+
+invoice_payments_tree.pack(fill='x', padx=10, pady=5)
+
+# ----- Record Payment -----
+
+record_payment_frame = ttk.LabelFrame(payments_tab, text="Record Payment")
+record_payment_frame.pack(fill='x', padx=10, pady=5)
+
+payment_amount_entry = ttk.Entry(record_payment_frame, width=12)
+payment_method_box = ttk.Combobox(record_payment_frame, values=PAYMENT_METHODS, width=14)
+payment_method_box.set(PAYMENT_METHODS[0])
+payment_date_entry = ttk.Entry(record_payment_frame, width=12)
+
+for label_text, widget in (
+    ("Amount", payment_amount_entry),
+    ("Method", payment_method_box),
+    ("Date (YYYY-MM-DD, blank = today)", payment_date_entry)
+):
+    ttk.Label(record_payment_frame, text=label_text).pack(side='left', padx=(5, 2))
+    widget.pack(side='left', padx=(0, 5), pady=5)
+
+
+@handler
+def record_payment():
+    """Record a payment against the invoice entered above."""
+
+    def on_recorded(result):
+        messagebox.showinfo(
+            "Payment Recorded",
+            f"Payment #{result['payment_id']} recorded. "
+            f"Invoice balance: ${result['balance']}"
+        )
+        payment_amount_entry.delete(0, tk.END)
+        look_up_invoice()
+
+    worker.submit(
+        backend.record_payment,
+        invoice_id_entry.get(),
+        payment_amount_entry.get(),
+        payment_method_box.get(),
+        payment_date_entry.get().strip() or None,
+        on_success=on_recorded,
+        on_error=show_error("Error")
+    )
+
+
+@handler
+def import_payment_batch():
+    """Record every payment in a CSV / JSON-lines file, one transaction per chunk."""
+    path = filedialog.askopenfilename(
+        title="Import Payments",
+        filetypes=[("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"), ("JSON lines", "*.jsonl")]
+    )
+    if not path:
+        return
+
+    def on_imported(stats):
+        summary = (
+            f"Recorded {stats['recorded']} of {stats['read']} payments "
+            f"(${stats['amount']:,.2f}) in {stats['seconds']:.2f}s.\n"
+            f"{stats['settled']} invoices settled, {stats['rejected']} rejected."
+        )
+        for record, reason in stats["rejects"][:5]:
+            summary += f"\n  {reason}: {record}"
+        messagebox.showinfo("Import Payments", summary)
+        show_unpaid_invoices()
+
+    worker.submit(
+        backend.import_payments,
+        path,
+        on_success=on_imported,
+        on_error=show_error("Import Error")
+    )
+
+
+ttk.Button(record_payment_frame, text="Record Payment", command=record_payment).pack(
+    side='left', padx=10
+)
+ttk.Button(record_payment_frame, text="Import Batch...", command=import_payment_batch).pack(
+    side='right', padx=5
+)
+
+# ----- Unpaid Invoices -----
+
+unpaid_frame = ttk.LabelFrame(payments_tab, text="Unpaid Invoices (largest balance first)")
+unpaid_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+unpaid_tree = ttk.Treeview(unpaid_frame)
+
+
+@handler
+def show_unpaid_invoices():
+    """List invoices with a balance left, read from the balance index."""
+    worker.submit(
+        backend.unpaid_invoices,
+        key="unpaid_invoices",
+        on_success=lambda result: render_rows(unpaid_tree, *result),
+        on_error=show_error("Database Error")
+    )
+
+
+def pick_unpaid_invoice(_event):
+    selected = unpaid_tree.selection()
+    if selected:
+        invoice_id_entry.delete(0, tk.END)
+        invoice_id_entry.insert(0, unpaid_tree.item(selected[0])["values"][0])
+        look_up_invoice()
+
+
+unpaid_tree.bind("<<TreeviewSelect>>", pick_unpaid_invoice)
+
+ttk.Button(unpaid_frame, text="Show Unpaid Invoices", command=show_unpaid_invoices).pack(pady=5)
+unpaid_tree.pack(fill='both', expand=True, padx=5, pady=5)
+
 # ==========================
 # Reports Tab
 # ==========================
 
 report_tab = ttk.Frame(notebook)
 notebook.add(report_tab, text="Reports")
+if offline.OFFLINE:
+    # Reports, exports and the analytics store need the central history
+    notebook.tab(report_tab, state="disabled")
 
 frame1 = ttk.LabelFrame(report_tab, text="List All Tables")
 frame1.pack(fill='x', padx=10, pady=10)
@@ -1021,65 +1365,95 @@ frame1.pack(fill='x', padx=10, pady=10)
 frame2 = ttk.LabelFrame(report_tab, text="Predefined Queries")
 frame2.pack(fill='x', padx=10, pady=10)
 
-report_tree = ttk.Treeview(report_tab)
+frame3 = ttk.LabelFrame(report_tab, text="Analytics (in-memory)")
+frame3.pack(fill='x', padx=10, pady=10)
+
+report_tree = PagedTreeview(report_tab, worker)
 report_tree.pack(fill='both', expand=True, padx=10, pady=10)
 
-queries = {
-    "All Customers": "SELECT * FROM Customers",
-    "All Cars": "SELECT * FROM Cars",
-    "All Rentals": "SELECT * FROM Rentals",
-    "All Invoices": "SELECT * FROM Invoices",
-    "All Payments": "SELECT * FROM Payments",
-    "Total Earnings per Car": """
-        SELECT
-            Cars.car_id,
-            Cars.car_type,
-            SUM(Invoices.invoice_amount) AS TotalEarnings
-        FROM Cars
-        JOIN Rentals  ON Rentals.car_id = Cars.car_id
-        JOIN Invoices ON Invoices.rental_id = Rentals.rental_id
-        GROUP BY Cars.car_id, Cars.car_type
-    """,
-    "Total Rentals per Customer": """
-        SELECT
-            Customers.customer_id,
-            Customers.first_name,
-            Customers.last_name,
-            COUNT(*) AS TotalRentals
-        FROM Rentals
-        JOIN Customers ON Rentals.customer_id = Customers.customer_id
-        GROUP BY Customers.customer_id, Customers.first_name, Customers.last_name
-    """,
-    "Most Rented Cars": """
-        SELECT
-            Cars.car_id,
-            Cars.car_type,
-            COUNT(Rentals.rental_id) AS NumberOfRentals
-        FROM Cars
-        JOIN Rentals ON Rentals.car_id = Cars.car_id
-        GROUP BY Cars.car_id, Cars.car_type
-        ORDER BY NumberOfRentals DESC
-    """,
-    "Invoice Payment Status": """
-        SELECT
-            i.invoice_id,
-            i.rental_id,
-            i.invoice_amount,
-            IFNULL(SUM(p.amount), 0) AS total_paid,
-            i.invoice_amount - IFNULL(SUM(p.amount), 0) AS balance
-        FROM Invoices i
-        LEFT JOIN Payments p ON p.invoice_id = i.invoice_id
-        GROUP BY i.invoice_id, i.rental_id, i.invoice_amount
-        ORDER BY i.invoice_id
-    """
-}
+current_report = {"label": None}
+
 
+report_archive_var = tk.BooleanVar(value=False)
+report_analytics_var = tk.BooleanVar(value=False)
 
+
+@handler
 def run_report(label):
-    run_query(queries[label], report_tree)
+    current_report["label"] = label
+    if report_analytics_var.get():
+        report_tree.load_source(FrameSource(analytics_store.report, label, report_archive_var.get()))
+    else:
+        run_query(report_query(label, report_archive_var.get()), report_tree)
+
+
+group_by_vars = {dimension: tk.BooleanVar(value=dimension == "month") for dimension in DIMENSIONS}
+
+
+@handler
+def run_group_by():
+    """Group rentals by the ticked dimensions, answered from the in-memory store."""
+    dimensions = [dimension for dimension, var in group_by_vars.items() if var.get()]
+    if not dimensions:
+        messagebox.showerror("Error", "Tick at least one column to group by.")
+        return
+    current_report["label"] = None
+    report_tree.load_source(FrameSource(
+        analytics_store.group_by,
+        dimensions,
+        group_from_entry.get().strip() or None,
+        group_to_entry.get().strip() or None,
+        report_archive_var.get()
+    ))
+
+
+@handler
+def export_report():
+    """Stream the report currently shown to a CSV / Parquet / Arrow file."""
+    label = current_report["label"]
+    if label is None:
+        messagebox.showerror("Error", "Run a report before exporting it.")
+        return
+
+    path = filedialog.asksaveasfilename(
+        title=f"Export {label}",
+        defaultextension=".csv",
+        filetypes=[
+            ("CSV", "*.csv"),
+            ("CSV (gzip)", "*.csv.gz"),
+            ("CSV (zstd)", "*.csv.zst"),
+            ("Parquet", "*.parquet"),
+            ("Arrow", "*.arrow")
+        ]
+    )
+    if not path:
+        return
 
+    worker.submit(
+        export_source,
+        label,
+        path,
+        report_archive_var.get(),
+        on_success=lambda result: messagebox.showinfo(
+            "Export", f"Exported {result[0]} rows in {result[1]:.2f}s"
+        ),
+        on_error=show_error("Export Error")
+    )
 
-for label in ["All Customers", "All Cars", "All Rentals", "All Invoices", "All Payments"]:
+
+@handler
+def rebuild_report_summaries():
+    """Recompute the report summary tables from the full history."""
+    worker.submit(
+        rebuild_summaries,
+        on_success=lambda elapsed: messagebox.showinfo(
+            "Summaries", f"Report summaries rebuilt in {elapsed:.2f}s"
+        ),
+        on_error=show_error("Error")
+    )
+
+
+for label in TABLE_REPORTS:
     ttk.Button(
         frame1,
         text=label,
@@ -1087,21 +1461,196 @@ for label in ["All Customers", "All Cars", "All Rentals", "All Invoices", "All P
         command=lambda q=label: run_report(q)
     ).pack(side='left', padx=5, pady=5)
 
-for label in [
-    "Total Earnings per Car",
-    "Total Rentals per Customer",
-    "Most Rented Cars",
-    "Invoice Payment Status"
-]:
+for label in AGGREGATE_REPORTS:
     ttk.Button(
         frame2,
         text=label,
-        width=35,
+        width=28,
         command=lambda q=label: run_report(q)
     ).pack(side='left', padx=5, pady=5)
 
+ttk.Button(
+    frame2,
+    text="Rebuild Summaries",
+    command=rebuild_report_summaries
+).pack(side='right', padx=5, pady=5)
+
+ttk.Button(
+    frame2,
+    text="Export...",
+    command=export_report
+).pack(side='right', padx=5, pady=5)
+
+ttk.Checkbutton(
+    frame1,
+    text="Include archive",
+    variable=report_archive_var
+).pack(side='right', padx=5, pady=5)
+
+ttk.Label(frame3, text="Group by").pack(side='left', padx=5, pady=5)
+for dimension, var in group_by_vars.items():
+    ttk.Checkbutton(frame3, text=dimension, variable=var).pack(side='left', padx=5, pady=5)
+
+ttk.Label(frame3, text="Start From").pack(side='left', padx=(15, 5), pady=5)
+group_from_entry = ttk.Entry(frame3, width=12)
+group_from_entry.pack(side='left', pady=5)
+ttk.Label(frame3, text="Start Before").pack(side='left', padx=5, pady=5)
+group_to_entry = ttk.Entry(frame3, width=12)
+group_to_entry.pack(side='left', pady=5)
+
+ttk.Button(
+    frame3,
+    text="Group By",
+    command=run_group_by
+).pack(side='left', padx=5, pady=5)
+
+ttk.Checkbutton(
+    frame3,
+    text="Answer reports from memory",
+    variable=report_analytics_var
+).pack(side='right', padx=5, pady=5)
+
+# ==========================
+# Diagnostics Tab
+# ==========================
+
+diag_tab = ttk.Frame(notebook)
+notebook.add(diag_tab, text="Diagnostics")
+
+diag_controls = ttk.Frame(diag_tab)
+diag_controls.pack(fill='x', padx=10, pady=5)
+
+ttk.Label(diag_controls, text="Slow query threshold (ms)").pack(side='left', padx=(0, 5))
+slow_ms_entry = ttk.Entry(diag_controls, width=8)
+slow_ms_entry.insert(0, f"{instrumentation.SLOW_QUERY_MS:g}")
+slow_ms_entry.pack(side='left')
+
+diag_pool_label = ttk.Label(diag_tab, text="", justify='left', anchor='w')
+diag_pool_label.pack(fill='x', padx=10, pady=5)
+
+DIAG_COLUMNS = [
+    "handler", "queries", "rows", "slow", "avg_connect_ms", "avg_execute_ms",
+    "avg_fetch_ms", "p50_ms", "p95_ms", "max_ms"
+]
+diag_tree = ttk.Treeview(diag_tab, columns=DIAG_COLUMNS, show="headings", height=12)
+for col in DIAG_COLUMNS:
+    diag_tree.heading(col, text=col)
+    diag_tree.column(col, width=90 if col != "handler" else 200, anchor='e' if col != "handler" else 'w')
+diag_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+STATEMENT_COLUMNS = [
+    "statement", "queries", "rows", "slow", "avg_execute_ms",
+    "avg_fetch_ms", "p50_ms", "p95_ms", "max_ms"
+]
+statement_tree = ttk.Treeview(diag_tab, columns=STATEMENT_COLUMNS, show="headings", height=8)
+for col in STATEMENT_COLUMNS:
+    statement_tree.heading(col, text=col)
+    statement_tree.column(col, width=90 if col != "statement" else 260, anchor='e' if col != "statement" else 'w')
+statement_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+diag_histogram_label = ttk.Label(diag_tab, text="", justify='left', anchor='w', font=("Courier", 9))
+diag_histogram_label.pack(fill='x', padx=10, pady=5)
+
+
+def refresh_diagnostics():
+    """Redraw the diagnostics tab from the in-memory counters (no database access)."""
+    data = backend.diagnostics()
+
+    pool = data["pool"]
+    lines = [
+        f"Pool: {pool['in_use']} in use, {pool['idle']} idle, {pool['open']} open, "
+        f"{pool['checkouts']} checkouts, wait avg {pool['wait_time_avg'] * 1000:.1f}ms "
+        f"max {pool['wait_time_max'] * 1000:.1f}ms, hold avg {pool['hold_time_avg'] * 1000:.1f}ms"
+    ]
+    for name, stats in data["caches"].items():
+        lines.append(
+            f"Cache {name}: {stats['entries']} entries, {stats['hits']} hits, "
+            f"{stats['misses']} misses ({stats['hit_rate']:.0%})"
+        )
+    availability_stats = data["availability"]
+    lines.append(
+        f"Availability index: {availability_stats['bookings']} bookings over "
+        f"{availability_stats['cars']} cars since {availability_stats['horizon']}"
+    )
+    analytics_stats = data["analytics"]
+    lines.append(
+        f"Analytics store: {sum(analytics_stats['rows'].values())} rows, "
+        f"{analytics_stats['bytes'] / 1e6:.1f} MB at version {analytics_stats['version']}, "
+        f"loaded {analytics_stats['loaded_at'] or 'never'} in {analytics_stats['load_seconds']:.2f}s, "
+        f"{analytics_stats['changes_applied']} changes applied in {analytics_stats['refreshes']} refreshes"
+    )
+    for name, stats in data["bookings"].items():
+        lines.append(
+            f"Transactions {name}: {stats['commits']} commits, {stats['retries']} retries, "
+            f"{stats['deadlocks']} deadlocks, {stats['lock_timeouts']} lock timeouts, "
+            f"max lock wait {stats['max_lock_wait'] * 1000:.1f}ms"
+        )
+    replica = data.get("replica")
+    if replica is not None:
+        link = {True: "up", False: "down", None: "unknown"}[replica["link_up"]]
+        lines.append(
+            f"Replica: link {link}, {replica['pending']} pending, {replica['conflicts']} rejected, "
+            f"{replica['pushed']} pushed, last refresh {replica['last_pull'] or 'never'}"
+            + (f", last error: {replica['last_error']}" if replica["last_error"] else "")
+        )
+    diag_pool_label.config(text="\n".join(lines))
+
+    diag_tree.delete(*diag_tree.get_children())
+    for row in data["queries"]:
+        diag_tree.insert("", tk.END, values=[
+            f"{row[col]:.1f}" if isinstance(row[col], float) else row[col]
+            for col in DIAG_COLUMNS
+        ])
+
+    statement_tree.delete(*statement_tree.get_children())
+    for row in data["statements"]:
+        statement_tree.insert("", tk.END, values=[
+            f"{row[col]:.1f}" if isinstance(row[col], float) else row[col]
+            for col in STATEMENT_COLUMNS
+        ])
+
+    totals = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    for entry in instrumentation.query_stats.snapshot().values():
+        totals = [a + b for a, b in zip(totals, entry["histogram"])]
+    peak = max(totals) or 1
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}ms"]
+    diag_histogram_label.config(text="\n".join(
+        f"{label:>9} {'#' * round(40 * count / peak):<40} {count}"
+        for label, count in zip(labels, totals)
+    ))
+
+
+def apply_slow_threshold():
+    try:
+        instrumentation.configure(slow_query_ms=float(slow_ms_entry.get()))
+    except ValueError:
+        messagebox.showerror("Error", "Threshold must be a number of milliseconds.")
+
+
+def reset_diagnostics():
+    instrumentation.query_stats.reset()
+    instrumentation.statement_stats.reset()
+    refresh_diagnostics()
+
+
+ttk.Button(diag_controls, text="Apply", command=apply_slow_threshold).pack(side='left', padx=5)
+ttk.Button(diag_controls, text="Reset", command=reset_diagnostics).pack(side='right', padx=5)
+ttk.Button(diag_controls, text="Refresh", command=refresh_diagnostics).pack(side='right', padx=5)
+notebook.bind(
+    "<<NotebookTabChanged>>",
+    lambda _e: refresh_diagnostics() if notebook.select() == str(diag_tab) else None
+)
+
 # ==========================
 # Main Loop
 # ==========================
 
-app.mainloop()
+if __name__ == "__main__":
+    if offline.OFFLINE:
+        offline.sync_worker.start()
+    else:
+        change_subscriber.start()
+    app.mainloop()
+    worker.shutdown()
+    if offline.OFFLINE:
+        offline.sync_worker.stop()
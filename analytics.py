@@ -0,0 +1,608 @@
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+
+import statements
+from changefeed import current_cursor, fetch_by_id, read_changes
+from availability import parse_date
+from db_pool import connect_db
+from reports import ARCHIVE_REPORT_QUERIES, ARCHIVE_TABLES, REPORT_QUERIES
+
+
+# ==========================
+# Analytics Store
+# ==========================
+# An in-process, column-oriented copy of the tables behind the Reports
+# tab: one NumPy array per column, rows kept in primary key order, with
+# an `archived` flag for rows that live in the archive tier. It is loaded
+# once in keyset chunks and then kept current from the ChangeLog, which
+# costs O(changes) per refresh, so answering a report or an ad-hoc
+# group-by is vectorised NumPy over memory: joins are searchsorted
+# lookups on the sorted keys and aggregates are bincounts. Nothing in
+# the query path touches the database; the SQL reports stay the source
+# of truth and AnalyticsStore.compare() checks the two against each
+# other.
+# Money is held as float64 and rounded to cents on the way out. Updates
+# insert into and delete from the sorted arrays, which copies them; at a
+# few milliseconds per column for millions of rows that is cheap next to
+# the refresh's own round trips.
+
+REFRESH_SECONDS = 5.0      # staleness tolerated before a query pulls the change log
+LOAD_CHUNK = 50000         # rows per keyset query during a full load
+DENSE_GROUPS = 1 << 22     # group-by key space counted directly rather than sorted
+
+TABLES = {
+    "Customers": [
+        ("customer_id", "i8"), ("first_name", "O"), ("last_name", "O"), ("email", "O"), ("phone", "O")
+    ],
+    "Cars": [("car_id", "i8"), ("car_type", "O"), ("car_color", "O"), ("car_price", "f8")],
+    "Rentals": [
+        ("rental_id", "i8"), ("customer_id", "i8"), ("car_id", "i8"),
+        ("rental_start_date", "M8[D]"), ("rental_end_date", "M8[D]")
+    ],
+    # balance is generated from these two, as in the database
+    "Invoices": [("invoice_id", "i8"), ("rental_id", "i8"), ("invoice_amount", "f8"), ("amount_paid", "f8")],
+    "Payments": [
+        ("payment_id", "i8"), ("invoice_id", "i8"), ("payment_date", "M8[D]"),
+        ("amount", "f8"), ("payment_method", "O")
+    ]
+}
+
+DIMENSIONS = ["month", "car_type", "customer", "car"]
+MEASURES = ["rentals", "rental_days", "invoiced", "paid", "balance"]
+
+
+class Frame:
+    """A query result held as columns; rows are materialised a slice at a time."""
+
+    def __init__(self, columns, arrays):
+        self.columns = list(columns)
+        self.arrays = list(arrays)
+
+    def __len__(self):
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def rows(self, start=0, stop=None):
+        """Rows start..stop as tuples of Python values (dates, floats, str)."""
+        return list(zip(*(array[start:stop].tolist() for array in self.arrays)))
+
+
+def _cents(values):
+    return np.round(values, 2)
+
+
+class ColumnTable:
+    """One table as a dict of equally long column arrays, sorted by the first column."""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+        self.key = columns[0][0]
+        self.data = self._arrays([], False)
+
+    def __len__(self):
+        return len(self.data[self.key])
+
+    def __getitem__(self, column):
+        return self.data[column]
+
+    def _arrays(self, rows, archived):
+        values = list(zip(*rows)) if rows else [()] * len(self.columns)
+        arrays = {
+            name: np.array(column, dtype=dtype)
+            for (name, dtype), column in zip(self.columns, values)
+        }
+        arrays["archived"] = np.full(len(rows), archived, dtype=bool)
+        return arrays
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self.data.values())
+
+    def load(self, chunks):
+        """Replace the contents with (rows, archived) chunks; a key seen twice keeps its last copy."""
+        parts = [self._arrays(rows, archived) for rows, archived in chunks if rows]
+        if not parts:
+            self.data = self._arrays([], False)
+            return
+        data = {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+        # Reversed, so np.unique's first occurrence is the last one loaded
+        keys = data[self.key][::-1]
+        _, first = np.unique(keys, return_index=True)
+        order = len(keys) - 1 - first
+        self.data = {column: array[order] for column, array in data.items()}
+
+    def find(self, keys):
+        """Positions of `keys` in the table and a mask of the ones present."""
+        table_keys = self.data[self.key]
+        keys = np.asarray(keys, dtype="i8")
+        if not len(table_keys):
+            return np.zeros(len(keys), dtype="i8"), np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(table_keys, keys), len(table_keys) - 1)
+        return positions, table_keys[positions] == keys
+
+    def upsert(self, rows, archived=False):
+        """Insert or overwrite rows, given in key order."""
+        if not rows:
+            return
+        new = self._arrays(rows, archived)
+        positions, found = self.find(new[self.key])
+        for column, array in self.data.items():
+            array[positions[found]] = new[column][found]
+        if not found.all():
+            where = np.searchsorted(self.data[self.key], new[self.key][~found])
+            self.data = {
+                column: np.insert(array, where, new[column][~found])
+                for column, array in self.data.items()
+            }
+
+    def delete(self, ids):
+        if not len(ids):
+            return
+        positions, found = self.find(np.asarray(ids, dtype="i8"))
+        if found.any():
+            self.data = {column: np.delete(array, positions[found]) for column, array in self.data.items()}
+
+    def mask(self, include_archive):
+        """Boolean row selector for the hot tier, or everything with include_archive."""
+        if include_archive:
+            return np.ones(len(self), dtype=bool)
+        return ~self.data["archived"]
+
+
+class AnalyticsStore:
+    """The columnar copy of RentalDB, plus the reports and group-bys it answers.
+
+    Thread-safe. The first query loads every table; later queries first
+    apply whatever the ChangeLog recorded since, at most every
+    REFRESH_SECONDS. If the log cannot say what changed (too many
+    changes, or pruned) the store reloads.
+    """
+
+    def __init__(self, refresh=REFRESH_SECONDS):
+        self.refresh_seconds = refresh
+        self._lock = threading.RLock()
+        self.tables = {name: ColumnTable(name, columns) for name, columns in TABLES.items()}
+        self.cursor = None      # changefeed.ChangeCursor
+        self._checked_at = None
+        self._joined = None
+        self._stats = {"loads": 0, "load_seconds": 0.0, "refreshes": 0, "changes_applied": 0,
+                       "refresh_seconds": 0.0, "loaded_at": None}
+
+    # ----- loading -----
+
+    @staticmethod
+    def _read(cursor, source, columns):
+        """Yield one table's rows in keyset chunks of LOAD_CHUNK."""
+        names = ", ".join(name for name, _ in columns)
+        key = columns[0][0]
+        after_id = 0
+        while True:
+            cursor.execute(
+                f"SELECT {names} FROM {source} WHERE {key} > %s ORDER BY {key} LIMIT %s",
+                (after_id, LOAD_CHUNK)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+
+    def load(self):
+        """Read every table (both tiers) from scratch."""
+        with self._lock:
+            started = time.perf_counter()
+            # Taken first: changes made during the load are applied again on the next refresh
+            change_cursor = current_cursor()
+            conn = connect_db()
+            try:
+                cursor = conn.cursor()
+                for name, table in self.tables.items():
+                    # The hot tier is read before the archive, so a row moved in
+                    # between is seen twice (the archived copy wins), never missed
+                    chunks = [(rows, False) for rows in self._read(cursor, name, table.columns)]
+                    if name in ARCHIVE_TABLES:
+                        archive = ARCHIVE_TABLES[name][0]
+                        chunks += [(rows, True) for rows in self._read(cursor, archive, table.columns)]
+                    table.load(chunks)
+                cursor.close()
+            finally:
+                conn.close()
+            self.cursor = change_cursor
+            self._joined = None
+            self._checked_at = time.monotonic()
+            self._stats["loads"] += 1
+            self._stats["load_seconds"] = time.perf_counter() - started
+            self._stats["loaded_at"] = datetime.now().replace(microsecond=0)
+
+    def _fetch_archived(self, table, ids):
+        if table not in ARCHIVE_TABLES or not ids:
+            return []
+        columns = self.tables[table].columns
+        key = columns[0][0]
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(name for name, _ in columns)} FROM {ARCHIVE_TABLES[table][0]} "
+                f"WHERE {key} IN ({', '.join(['%s'] * len(ids))}) ORDER BY {key}",
+                list(ids)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def refresh(self):
+        """Apply the ChangeLog entries since the last load or refresh; returns how many."""
+        with self._lock:
+            if self.cursor is None:
+                self.load()
+                return 0
+            started = time.perf_counter()
+            changes, complete, cursor = read_changes(self.cursor, list(self.tables))
+            if not complete:
+                self.load()
+                return 0
+            touched = {}
+            for _, table, row_id, _ in changes:
+                touched.setdefault(table, set()).add(row_id)
+            for name, ids in touched.items():
+                table = self.tables[name]
+                width = len(table.columns)
+                rows = [row[:width] for row in fetch_by_id(name, sorted(ids))]
+                # Gone from the hot table: deleted, or moved to the archive
+                gone = ids - {row[0] for row in rows}
+                table.delete(sorted(gone))
+                table.upsert(rows)
+                table.upsert(self._fetch_archived(name, sorted(gone)), archived=True)
+            self.cursor = cursor
+            if changes:
+                self._joined = None
+            self._checked_at = time.monotonic()
+            self._stats["refreshes"] += 1
+            self._stats["changes_applied"] += len(changes)
+            self._stats["refresh_seconds"] = time.perf_counter() - started
+            return len(changes)
+
+    def _ensure_fresh(self):
+        if self.cursor is None:
+            self.load()
+        elif time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self.refresh()
+
+    def stats(self):
+        # Without the lock: the diagnostics tab must not wait out a full load
+        stats = dict(self._stats)
+        stats["version"] = self.cursor.version if self.cursor else None
+        stats["rows"] = {name: len(table) for name, table in self.tables.items()}
+        stats["bytes"] = sum(table.nbytes() for table in self.tables.values())
+        return stats
+
+    # ----- joins -----
+
+    def _joins(self):
+        """Join positions and per-rental totals, cached until the data next changes.
+
+        rental_car / rental_customer are each rental's row in Cars /
+        Customers, with masks for rentals whose car or customer is gone
+        (archived rentals have no foreign keys). rental_car_type codes
+        index car_types, with len(car_types) for a missing car.
+        """
+        if self._joined is None:
+            rentals, invoices = self.tables["Rentals"], self.tables["Invoices"]
+            cars, customers = self.tables["Cars"], self.tables["Customers"]
+            invoice_rental, invoice_found = rentals.find(invoices["rental_id"])
+            rental_car, car_found = cars.find(rentals["car_id"])
+            rental_customer, customer_found = customers.find(rentals["customer_id"])
+            car_types, car_type_codes = np.unique(cars["car_type"], return_inverse=True)
+            self._joined = {
+                "invoiced": np.bincount(invoice_rental[invoice_found], invoices["invoice_amount"][invoice_found],
+                                        minlength=len(rentals)),
+                "paid": np.bincount(invoice_rental[invoice_found], invoices["amount_paid"][invoice_found],
+                                    minlength=len(rentals)),
+                "rental_car": rental_car,
+                "car_found": car_found,
+                "rental_customer": rental_customer,
+                "customer_found": customer_found,
+                "car_types": car_types,
+                "rental_car_type": np.where(
+                    car_found, car_type_codes.reshape(-1)[rental_car] if len(cars) else 0, len(car_types)
+                )
+            }
+        return self._joined
+
+    # ----- reports -----
+
+    def _table_report(self, name, include_archive):
+        table = self.tables[name]
+        selected = table.mask(include_archive)
+        columns = [column for column, _ in table.columns]
+        arrays = [
+            _cents(table[column][selected]) if dtype == "f8" else table[column][selected]
+            for column, dtype in table.columns
+        ]
+        if name == "Invoices":
+            columns.append("balance")
+            arrays.append(_cents(table["invoice_amount"][selected] - table["amount_paid"][selected]))
+        return Frame(columns, arrays)
+
+    def _car_totals(self, include_archive):
+        """(car_ids, car_types, rental counts, earnings) of the cars rented at least once."""
+        joins, cars = self._joins(), self.tables["Cars"]
+        found = joins["car_found"] & self.tables["Rentals"].mask(include_archive)
+        counts = np.bincount(joins["rental_car"][found], minlength=len(cars))
+        earnings = np.bincount(joins["rental_car"][found], joins["invoiced"][found], minlength=len(cars))
+        rented = counts > 0
+        return cars["car_id"][rented], cars["car_type"][rented], counts[rented], earnings[rented]
+
+    def _invoice_status(self, include_archive, unpaid_only=False):
+        invoices = self.tables["Invoices"]
+        selected = invoices.mask(include_archive)
+        if unpaid_only:
+            selected &= invoices["invoice_amount"] - invoices["amount_paid"] >= 0.005
+        amount = invoices["invoice_amount"][selected]
+        paid = invoices["amount_paid"][selected]
+        arrays = [invoices["invoice_id"][selected], invoices["rental_id"][selected],
+                  _cents(amount), _cents(paid), _cents(amount - paid)]
+        if unpaid_only:
+            # ORDER BY balance DESC; the stable sort leaves ties in invoice_id order
+            order = np.argsort(-arrays[4], kind="stable")
+            arrays = [array[order] for array in arrays]
+        return arrays
+
+    def report(self, label, include_archive=False):
+        """One of the Reports-tab reports as a Frame, matching services.run_report()."""
+        if label not in REPORT_QUERIES:
+            raise ValueError(f"Unknown report {label!r}")
+        with self._lock:
+            self._ensure_fresh()
+            if label.startswith("All "):
+                return self._table_report(label[len("All "):], include_archive)
+
+            if label == "Total Earnings per Car":
+                car_ids, car_types, _, earnings = self._car_totals(include_archive)
+                return Frame(["car_id", "car_type", "TotalEarnings"], [car_ids, car_types, _cents(earnings)])
+            if label == "Most Rented Cars":
+                car_ids, car_types, counts, _ = self._car_totals(include_archive)
+                order = np.argsort(-counts, kind="stable")
+                return Frame(["car_id", "car_type", "NumberOfRentals"],
+                             [car_ids[order], car_types[order], counts[order]])
+            if label == "Total Rentals per Customer":
+                joins, customers = self._joins(), self.tables["Customers"]
+                found = joins["customer_found"] & self.tables["Rentals"].mask(include_archive)
+                counts = np.bincount(joins["rental_customer"][found], minlength=len(customers))
+                rented = counts > 0
+                return Frame(
+                    ["customer_id", "first_name", "last_name", "TotalRentals"],
+                    [customers["customer_id"][rented], customers["first_name"][rented],
+                     customers["last_name"][rented], counts[rented]]
+                )
+            if label == "Invoice Payment Status":
+                return Frame(["invoice_id", "rental_id", "invoice_amount", "total_paid", "balance"],
+                             self._invoice_status(include_archive))
+            if label == "Unpaid Invoices":
+                # Archived invoices are settled, so the archive adds nothing here
+                return Frame(["invoice_id", "rental_id", "invoice_amount", "amount_paid", "balance"],
+                             self._invoice_status(False, unpaid_only=True))
+            raise ValueError(f"Report {label!r} has no analytics version")
+
+    # ----- ad-hoc aggregates -----
+
+    def group_by(self, dimensions, start=None, end=None, include_archive=True):
+        """Rentals grouped by any of DIMENSIONS, as a Frame.
+
+        Rentals are picked by start date, start <= rental_start_date < end
+        (either bound optional). Each group has the MEASURES: rentals,
+        rental_days (billed days, at least one per rental), invoiced, paid
+        and balance. Groups come back sorted by their dimensions; a car
+        that no longer exists groups under car_type None.
+        """
+        dimensions = list(dimensions)
+        unknown = [d for d in dimensions if d not in DIMENSIONS]
+        if not dimensions or unknown:
+            raise ValueError(f"Group by one or more of {', '.join(DIMENSIONS)}")
+        with self._lock:
+            self._ensure_fresh()
+            rentals, joins = self.tables["Rentals"], self._joins()
+            selected = rentals.mask(include_archive)
+            starts = rentals["rental_start_date"]
+            if start not in (None, ""):
+                selected &= starts >= np.datetime64(parse_date(start), "D")
+            if end not in (None, ""):
+                selected &= starts < np.datetime64(parse_date(end), "D")
+            selected = np.flatnonzero(selected)
+            starts = starts[selected]
+            invoiced, paid = joins["invoiced"][selected], joins["paid"][selected]
+            days = np.maximum((rentals["rental_end_date"][selected] - starts).astype("i8"), 1)
+
+            # Every dimension as integers over a dense range, so the groups
+            # are found by counting into one array instead of sorting
+            values = []
+            for dimension in dimensions:
+                if dimension == "month":
+                    values.append(starts.astype("M8[M]").astype("i8"))
+                elif dimension == "car_type":
+                    values.append(joins["rental_car_type"][selected])
+                else:
+                    values.append(rentals["customer_id" if dimension == "customer" else "car_id"][selected])
+            lows = [int(v.min()) if len(v) else 0 for v in values]
+            shape = tuple(int(v.max()) - low + 1 if len(v) else 1 for v, low in zip(values, lows))
+            keys = np.ravel_multi_index([v - low for v, low in zip(values, lows)], shape)
+            slots = int(np.prod(shape, dtype=np.float64))
+            if slots <= max(DENSE_GROUPS, 4 * len(keys)):
+                counts = np.bincount(keys, minlength=slots)
+                groups = np.flatnonzero(counts)
+                inverse = (np.cumsum(counts > 0) - 1)[keys]
+            else:
+                groups, inverse = np.unique(keys, return_inverse=True)
+                inverse = inverse.reshape(-1)
+
+            columns, arrays = [], []
+            for dimension, low, code in zip(dimensions, lows, np.unravel_index(groups, shape)):
+                group_values = code + low
+                if dimension == "month":
+                    columns.append("month")
+                    arrays.append(np.datetime_as_string(group_values.astype("M8[M]"), unit="M").astype(object))
+                elif dimension == "car_type":
+                    columns.append("car_type")
+                    arrays.append(np.append(joins["car_types"], None).astype(object)[group_values])
+                elif dimension == "car":
+                    columns.append("car_id")
+                    arrays.append(group_values)
+                else:
+                    customers = self.tables["Customers"]
+                    positions, found = customers.find(group_values)
+                    names = np.full(len(group_values), None, dtype=object)
+                    names[found] = (customers["first_name"][positions[found]] + " "
+                                    + customers["last_name"][positions[found]])
+                    columns += ["customer_id", "customer_name"]
+                    arrays += [group_values, names]
+
+            size = len(groups)
+            invoiced_total = np.bincount(inverse, invoiced, minlength=size)
+            paid_total = np.bincount(inverse, paid, minlength=size)
+            columns += MEASURES
+            arrays += [
+                np.bincount(inverse, minlength=size),
+                np.bincount(inverse, days, minlength=size).astype("i8"),
+                _cents(invoiced_total),
+                _cents(paid_total),
+                _cents(invoiced_total - paid_total)
+            ]
+            return Frame(columns, arrays)
+
+    # ----- checking -----
+
+    def compare(self, label, include_archive=False):
+        """Rows in only one of the SQL and the analytics report, as (sql_rows, analytics_rows).
+
+        Compared as sets of rows, since the SQL order of ties (equal
+        balances, equal rental counts) is unspecified.
+        """
+        _, expected = sql_report(label, include_archive)
+        actual = self.report(label, include_archive).rows()
+
+        def normal(rows):
+            return Counter(
+                tuple(round(float(value), 2) if isinstance(value, (Decimal, float)) else value for value in row)
+                for row in rows
+            )
+
+        expected, actual = normal(expected), normal(actual)
+        return sorted((expected - actual).elements()), sorted((actual - expected).elements())
+
+
+store = AnalyticsStore()
+
+
+def sql_report(label, include_archive=False):
+    """The same report from the database, as (column_names, rows); see services.run_report()."""
+    if include_archive and label in ARCHIVE_REPORT_QUERIES:
+        return statements.fetch(f"report:{label}:archive")
+    return statements.fetch(f"report:{label}")
+
+
+class FrameSource:
+    """Page source (see paged_view.PagedTreeview) over a Frame computed on first use.
+
+    `compute(*args)` runs on the worker pool, like the SQL sources'
+    queries; the pages are then slices of the frame.
+    """
+
+    def __init__(self, compute, *args):
+        self.compute = compute
+        self.args = args
+        self.frame = None
+
+    def first(self, limit):
+        self.frame = self.compute(*self.args)
+        return self.frame.columns, self.frame.rows(0, limit), len(self.frame)
+
+    def after(self, offset, last_row, limit):
+        return self.frame.rows(offset, offset + limit)
+
+    def before(self, offset, first_row, limit):
+        return self.frame.rows(max(offset - limit, 0), offset)
+
+    def sort_key(self, row):
+        return (row[0],)
+
+
+# ==========================
+# Command Line
+# ==========================
+
+def print_frame(frame, limit=None):
+    print("  ".join(f"{column:>14}" for column in frame.columns))
+    for row in frame.rows(0, limit):
+        print("  ".join(f"{'' if value is None else str(value):>14}" for value in row))
+    if limit is not None and len(frame) > limit:
+        print(f"... {len(frame) - limit} more rows")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Answer the reports and ad-hoc group-bys from an in-memory column store."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="run one of the Reports-tab reports")
+    report.add_argument("label", choices=list(REPORT_QUERIES))
+    report.add_argument("--include-archive", action="store_true")
+    report.add_argument("--limit", type=int, default=50)
+    group = commands.add_parser("group", help="group rentals by month, car_type, customer and/or car")
+    group.add_argument("dimensions", nargs="+", choices=DIMENSIONS)
+    group.add_argument("--from", dest="start", help="first rental start date, YYYY-MM-DD")
+    group.add_argument("--to", dest="end", help="rental start dates before this, YYYY-MM-DD")
+    group.add_argument("--hot-only", action="store_true", help="leave out the archive tier")
+    group.add_argument("--limit", type=int, default=50)
+    commands.add_parser("compare", help="time every report against SQL and check the results agree")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    store.load()
+    rows = store.stats()["rows"]
+    print(f"Loaded {sum(rows.values())} rows in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    try:
+        if args.command == "report":
+            started = time.perf_counter()
+            frame = store.report(args.label, args.include_archive)
+            elapsed = time.perf_counter() - started
+            print_frame(frame, args.limit)
+            print(f"{len(frame)} rows in {elapsed * 1000:.1f}ms", file=sys.stderr)
+        elif args.command == "group":
+            started = time.perf_counter()
+            frame = store.group_by(args.dimensions, args.start, args.end, not args.hot_only)
+            elapsed = time.perf_counter() - started
+            print_frame(frame, args.limit)
+            print(f"{len(frame)} groups in {elapsed * 1000:.1f}ms", file=sys.stderr)
+        else:
+            failed = 0
+            for label in REPORT_QUERIES:
+                started = time.perf_counter()
+                sql_report(label)
+                sql_seconds = time.perf_counter() - started
+                started = time.perf_counter()
+                store.report(label).rows()
+                memory_seconds = time.perf_counter() - started
+                missing, extra = store.compare(label)
+                failed += bool(missing or extra)
+                print(f"  {label:<28} sql {sql_seconds * 1000:9.1f}ms  "
+                      f"analytics {memory_seconds * 1000:9.1f}ms  "
+                      f"{'OK' if not (missing or extra) else f'{len(missing)} missing, {len(extra)} extra rows'}")
+            return 1 if failed else 0
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+from db_pool import connect_db, get_backend
+from transactions import run_transaction
+
+
+# ==========================
+# Archive Job
+# ==========================
+# Moves closed periods out of the hot tables: rentals that ended before
+# the cutoff and whose invoices are fully paid go to RentalsArchive, with
+# their invoices and payments in InvoicesArchive / PaymentsArchive (see
+# create.sql). The hot tables then hold only the active period, so the
+# reports and the rentals view stop scanning years of closed history;
+# reports.ARCHIVE_REPORT_QUERIES and rentals_view's include_archive read
+# both tiers on request. On MySQL the archive tables are compressed and
+# range-partitioned by year; ensure_partitions() splits a partition per
+# new year off pmax before anything lands there.
+# Rentals are moved CHUNK_SIZE at a time, one transaction per chunk:
+# lock the rentals and their invoices, copy the three tables, delete the
+# rentals (the foreign keys cascade to invoices and payments). During the
+# delete the summary triggers are told to skip, so archived rentals keep
+# counting in the report totals, and the chunk is added to the archive
+# summaries that reports.py subtracts for active-period totals; ChangeLog
+# still records the deletes, so open views drop the rows.
+
+ARCHIVE_AFTER_DAYS = 365     # default: archive rentals that ended a year ago or more
+CHUNK_SIZE = 1000
+
+PARTITIONED_TABLES = ["RentalsArchive", "InvoicesArchive", "PaymentsArchive"]
+
+CANDIDATES = """
+    SELECT r.rental_id
+    FROM Rentals r
+    WHERE r.rental_start_date < %s
+      AND r.rental_end_date < %s
+      AND r.rental_id > %s
+      AND NOT EXISTS (
+            SELECT 1 FROM Invoices i WHERE i.rental_id = r.rental_id AND i.balance > 0
+          )
+    ORDER BY r.rental_id
+    LIMIT %s
+"""
+
+
+def default_cutoff(days=ARCHIVE_AFTER_DAYS):
+    return date.today() - timedelta(days=days)
+
+
+def _set_archiving(tx, on):
+    """Make the summary triggers skip the deletes of this transaction.
+
+    MySQL uses the @archiving session variable. SQLite triggers cannot
+    read session state, so there a row in ArchiveRun, visible only to
+    this uncommitted transaction, plays the same role.
+    """
+    if get_backend().name == "sqlite":
+        tx.execute("INSERT INTO ArchiveRun DEFAULT VALUES" if on else "DELETE FROM ArchiveRun")
+    else:
+        # Pooled connections are reused, so this must always be reset
+        tx.execute("SET @archiving = %s", (1 if on else None,))
+
+
+def _add_to_archive_summaries(tx, ids):
+    """Add the rentals being archived to ArchiveCarSummary / ArchiveCustomerSummary."""
+    placeholders = ", ".join(["%s"] * len(ids))
+    if get_backend().name == "sqlite":
+        car_upsert = (
+            "ON CONFLICT (car_id) DO UPDATE SET "
+            "rental_count = rental_count + excluded.rental_count, "
+            "total_earnings = total_earnings + excluded.total_earnings"
+        )
+        customer_upsert = (
+            "ON CONFLICT (customer_id) DO UPDATE SET "
+            "rental_count = rental_count + excluded.rental_count"
+        )
+    else:
+        car_upsert = (
+            "ON DUPLICATE KEY UPDATE "
+            "rental_count = rental_count + VALUES(rental_count), "
+            "total_earnings = total_earnings + VALUES(total_earnings)"
+        )
+        customer_upsert = "ON DUPLICATE KEY UPDATE rental_count = rental_count + VALUES(rental_count)"
+    tx.execute(
+        f"""
+        INSERT INTO ArchiveCarSummary (car_id, rental_count, total_earnings)
+        SELECT r.car_id, COUNT(*), IFNULL(SUM(i.amount), 0)
+        FROM Rentals r
+        LEFT JOIN (
+            SELECT rental_id, SUM(invoice_amount) AS amount
+            FROM Invoices
+            WHERE rental_id IN ({placeholders})
+            GROUP BY rental_id
+        ) i ON i.rental_id = r.rental_id
+        WHERE r.rental_id IN ({placeholders})
+        GROUP BY r.car_id
+        {car_upsert}
+        """,
+        ids + ids
+    )
+    tx.execute(
+        f"""
+        INSERT INTO ArchiveCustomerSummary (customer_id, rental_count)
+        SELECT customer_id, COUNT(*)
+        FROM Rentals
+        WHERE rental_id IN ({placeholders})
+        GROUP BY customer_id
+        {customer_upsert}
+        """,
+        ids
+    )
+
+
+def _archive_chunk(tx, cutoff, after_id, limit):
+    """Move one chunk; returns (last_rental_id, rentals, invoices, payments)."""
+    ids = [row[0] for row in tx.lock(CANDIDATES + " FOR UPDATE", (cutoff, cutoff, after_id, limit))]
+    if not ids:
+        return None, 0, 0, 0
+    placeholders = ", ".join(["%s"] * len(ids))
+
+    # Locking the invoices holds off payments to them until the move commits
+    tx.lock(
+        f"SELECT invoice_id FROM Invoices WHERE rental_id IN ({placeholders}) "
+        f"ORDER BY invoice_id FOR UPDATE",
+        ids
+    )
+
+    tx.execute(
+        f"""
+        INSERT INTO RentalsArchive
+            (rental_id, customer_id, car_id, rental_start_date, rental_end_date)
+        SELECT rental_id, customer_id, car_id, rental_start_date, rental_end_date
+        FROM Rentals
+        WHERE rental_id IN ({placeholders})
+        """,
+        ids
+    )
+    invoices = tx.execute(
+        f"""
+        INSERT INTO InvoicesArchive
+            (invoice_id, rental_id, rental_start_date, invoice_amount, amount_paid, balance)
+        SELECT i.invoice_id, i.rental_id, r.rental_start_date,
+               i.invoice_amount, i.amount_paid, i.balance
+        FROM Invoices i
+        JOIN Rentals r ON r.rental_id = i.rental_id
+        WHERE i.rental_id IN ({placeholders})
+        """,
+        ids
+    ).rowcount
+    payments = tx.execute(
+        f"""
+        INSERT INTO PaymentsArchive
+            (payment_id, invoice_id, payment_date, amount, payment_method)
+        SELECT p.payment_id, p.invoice_id, p.payment_date, p.amount, p.payment_method
+        FROM Payments p
+        JOIN Invoices i ON i.invoice_id = p.invoice_id
+        WHERE i.rental_id IN ({placeholders})
+        """,
+        ids
+    ).rowcount
+
+    _add_to_archive_summaries(tx, ids)
+    _set_archiving(tx, True)
+    try:
+        tx.execute(f"DELETE FROM Rentals WHERE rental_id IN ({placeholders})", ids)
+    finally:
+        _set_archiving(tx, False)
+    return ids[-1], len(ids), invoices, payments
+
+
+def ensure_partitions(through_year=None):
+    """Give every archive table a partition per year up to through_year (MySQL only).
+
+    Years are split off the catch-all pmax partition, which stays empty
+    as long as this runs before rows for a new year are archived, so the
+    reorganisation has nothing to copy. Returns the partitions added.
+    """
+    if get_backend().name != "mysql":
+        return []
+    through_year = through_year or date.today().year
+    added = []
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        for table in PARTITIONED_TABLES:
+            cursor.execute(
+                """
+                SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                """,
+                (table,)
+            )
+            years = [int(name[1:]) for (name,) in cursor.fetchall() if name[1:].isdigit()]
+            new_years = range(max(years, default=through_year - 1) + 1, through_year + 1)
+            if not new_years:
+                continue
+            partitions = ", ".join(
+                f"PARTITION p{year} VALUES LESS THAN ('{year + 1}-01-01')" for year in new_years
+            )
+            cursor.execute(
+                f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+                f"({partitions}, PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+            )
+            added += [f"{table}.p{year}" for year in new_years]
+        cursor.close()
+    finally:
+        conn.close()
+    return added
+
+
+def count_candidates(cutoff):
+    """How many rentals archive() would move for this cutoff."""
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM ({CANDIDATES}) AS candidates", (cutoff, cutoff, 0, 2 ** 31))
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+    finally:
+        conn.close()
+
+
+def archive(cutoff=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Archive the closed, fully paid rentals that ended before cutoff.
+
+    cutoff defaults to ARCHIVE_AFTER_DAYS ago. Returns a stats dict:
+    cutoff, rentals, invoices, payments, partitions (added on MySQL),
+    seconds and rows_per_second (rentals).
+    """
+    cutoff = cutoff or default_cutoff()
+    if not isinstance(cutoff, date):
+        cutoff = date.fromisoformat(str(cutoff))
+    stats = {"cutoff": cutoff, "rentals": 0, "invoices": 0, "payments": 0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    # Payments of archived rentals may be dated up to today
+    stats["partitions"] = ensure_partitions()
+    after_id = 0
+    while True:
+        last_id, rentals, invoices, payments = run_transaction(
+            "archive", _archive_chunk, cutoff, after_id, chunk_size,
+            isolation_level="READ COMMITTED"
+        )
+        if last_id is None:
+            break
+        after_id = last_id
+        stats["rentals"] += rentals
+        stats["invoices"] += invoices
+        stats["payments"] += payments
+        stats["seconds"] = time.perf_counter() - started
+        if progress is not None:
+            progress(stats)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["rentals"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def print_progress(stats):
+    rate = stats["rentals"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"  {stats['rentals']:>10} rentals  {stats['invoices']:>10} invoices  "
+        f"{stats['payments']:>10} payments  {rate:,.0f} rentals/s",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Move closed, fully paid rentals to the archive tables."
+    )
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="archive rentals that ended at least this many days ago")
+    parser.add_argument("--before", help="archive rentals that ended before this date (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be archived")
+    args = parser.parse_args(argv)
+
+    cutoff = date.fromisoformat(args.before) if args.before else default_cutoff(args.days)
+    if args.dry_run:
+        print(f"Would archive {count_candidates(cutoff)} rentals that ended before {cutoff}")
+        return 0
+
+    stats = archive(cutoff, args.chunk_size, print_progress)
+    for partition in stats["partitions"]:
+        print(f"  added partition {partition}")
+    print(
+        f"Archived {stats['rentals']} rentals, {stats['invoices']} invoices and "
+        f"{stats['payments']} payments that ended before {cutoff} in {stats['seconds']:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+import bisect
+import threading
+import time
+from datetime import date, timedelta
+
+from db_pool import connect_db
+from statements import run, sql
+
+
+# ==========================
+# Fleet Availability Index
+# ==========================
+# Bookings are half-open date ranges [start, end): a car returned on the
+# 5th can be picked up again on the 5th. Same-day rentals are billed as
+# one day by trg_after_rental_insert, so they occupy [start, start + 1).
+#
+# The index keeps every booking that ends on or after HORIZON_DAYS ago in
+# memory, one CarSchedule per car. Questions about older dates fall back
+# to SQL, which the (car_id, rental_start_date, rental_end_date) index in
+# create.sql answers from the index alone.
+
+HORIZON_DAYS = 30          # history kept in memory
+REFRESH_SECONDS = 300.0    # reload to pick up writes made by other clients
+
+
+def parse_date(value):
+    """YYYY-MM-DD string (or date) -> date; ValueError on bad input."""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD") from None
+
+
+def booking_range(start, end):
+    """Validate a rental's dates and return the [start, end) range it occupies."""
+    start, end = parse_date(start), parse_date(end)
+    if end < start:
+        raise ValueError("End date cannot be before start date.")
+    return start, max(end, start + timedelta(days=1))
+
+
+class CarSchedule:
+    """Bookings for one car, sorted by start date.
+
+    Alongside the sorted starts it keeps the running maximum end date, which
+    plays the role of the max-end augmentation of an interval tree: every
+    booking that starts before a query's end is a prefix of the list, and
+    the prefix maximum says at once whether any of them reaches past the
+    query's start. Lookups are O(log n); inserts are O(n) but n is the
+    number of bookings of a single car inside the horizon.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._bookings = []    # (start, end, rental_id), sorted by start
+        self._max_end = []     # _max_end[i] = max end of _bookings[:i + 1]
+
+    def __len__(self):
+        return len(self._bookings)
+
+    def _rebuild_max_end(self, from_index):
+        running = self._max_end[from_index - 1] if from_index else date.min
+        del self._max_end[from_index:]
+        for _, end, _ in self._bookings[from_index:]:
+            running = max(running, end)
+            self._max_end.append(running)
+
+    def add(self, start, end, rental_id):
+        i = bisect.bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._bookings.insert(i, (start, end, rental_id))
+        self._max_end.insert(i, end)
+        self._rebuild_max_end(i)
+
+    def remove(self, rental_id):
+        """Drop a booking; returns False if it was not in this schedule."""
+        for i, booking in enumerate(self._bookings):
+            if booking[2] == rental_id:
+                del self._starts[i]
+                del self._bookings[i]
+                del self._max_end[i]
+                self._rebuild_max_end(i)
+                return True
+        return False
+
+    def is_free(self, start, end, ignore=None):
+        i = bisect.bisect_left(self._starts, end)
+        if i == 0 or self._max_end[i - 1] <= start:
+            return True
+        return not self.conflicts(start, end, ignore)
+
+    def conflicts(self, start, end, ignore=None):
+        """Bookings overlapping [start, end), excluding rental_id ignore."""
+        found = []
+        i = bisect.bisect_left(self._starts, end) - 1
+        while i >= 0 and self._max_end[i] > start:
+            booking = self._bookings[i]
+            if booking[1] > start and booking[2] != ignore:
+                found.append(booking)
+            i -= 1
+        found.reverse()
+        return found
+
+
+class AvailabilityIndex:
+    """In-memory CarSchedule per car, loaded lazily and kept in sync by services.py.
+
+    Thread-safe; the whole index is reloaded after REFRESH_SECONDS so that
+    bookings made by other clients (or bulk_import.py) are picked up.
+    """
+
+    def __init__(self, horizon_days=HORIZON_DAYS, refresh=REFRESH_SECONDS):
+        self.horizon_days = horizon_days
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._schedules = {}   # car_id -> CarSchedule
+        self._rentals = {}     # rental_id -> car_id
+        self._horizon = None
+        self._loaded_at = None
+
+    # ----- loading -----
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh:
+            return
+        horizon = date.today() - timedelta(days=self.horizon_days)
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT car_id FROM Cars")
+            car_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                """
+                SELECT rental_id, car_id, rental_start_date, rental_end_date
+                FROM Rentals
+                WHERE rental_end_date >= %s
+                """,
+                (horizon,)
+            )
+            rentals = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        schedules = {car_id: CarSchedule() for car_id in car_ids}
+        for rental_id, car_id, start, end in sorted(rentals, key=lambda r: r[2]):
+            schedules.setdefault(car_id, CarSchedule()).add(
+                start, max(end, start + timedelta(days=1)), rental_id
+            )
+        self._schedules = schedules
+        self._rentals = {r[0]: r[1] for r in rentals}
+        self._horizon = horizon
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Forget everything; the next query reloads from the database."""
+        with self._lock:
+            self._loaded_at = None
+
+    # ----- queries -----
+
+    def conflicts(self, car_id, start, end, ignore=None):
+        """Bookings of car_id that overlap the rental dates, as (start, end, rental_id)."""
+        start, end = booking_range(start, end)
+        car_id = int(car_id)
+        with self._lock:
+            self._ensure_loaded()
+            if start >= self._horizon:
+                schedule = self._schedules.get(car_id)
+                return schedule.conflicts(start, end, ignore) if schedule else []
+        conn = connect_db()
+        try:
+            return prepared_conflicts(conn, car_id, start, end, ignore)
+        finally:
+            conn.close()
+
+    def confirm(self, car_id, start, end, ignore=None):
+        """conflicts() read from the database, bypassing the index.
+
+        If the index held bookings the database no longer has (cancelled
+        or moved by another client since the last load), it is reloaded.
+        """
+        start, end = booking_range(start, end)
+        car_id = int(car_id)
+        conn = connect_db()
+        try:
+            conflicts = prepared_conflicts(conn, car_id, start, end, ignore)
+        finally:
+            conn.close()
+        indexed = {rental_id for _, _, rental_id in self.conflicts(car_id, start, end, ignore)}
+        if not indexed <= {rental_id for _, _, rental_id in conflicts}:
+            self.invalidate()
+        return conflicts
+
+    def is_available(self, car_id, start, end, ignore=None):
+        return not self.conflicts(car_id, start, end, ignore)
+
+    def free_cars(self, start, end):
+        """Sorted car_ids with no booking overlapping the rental dates."""
+        start, end = booking_range(start, end)
+        with self._lock:
+            self._ensure_loaded()
+            if start >= self._horizon:
+                return sorted(
+                    car_id for car_id, schedule in self._schedules.items()
+                    if schedule.is_free(start, end)
+                )
+        return _sql_free_cars(start, end)
+
+    def car_of(self, rental_id):
+        """car_id of a rental the index holds, or None."""
+        with self._lock:
+            return self._rentals.get(int(rental_id))
+
+    # ----- write hooks -----
+
+    def add(self, rental_id, car_id, start, end):
+        start, end = booking_range(start, end)
+        with self._lock:
+            if self._loaded_at is None or end < self._horizon:
+                return
+            self._schedules.setdefault(int(car_id), CarSchedule()).add(start, end, rental_id)
+            self._rentals[rental_id] = int(car_id)
+
+    def remove(self, rental_id):
+        with self._lock:
+            car_id = self._rentals.pop(rental_id, None)
+            if car_id is not None:
+                self._schedules[car_id].remove(rental_id)
+
+    def move(self, rental_id, car_id, start, end):
+        self.remove(rental_id)
+        self.add(rental_id, car_id, start, end)
+
+    def add_car(self, car_id):
+        """Register a new car with an empty schedule, so free_cars() lists it."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._schedules.setdefault(int(car_id), CarSchedule())
+
+    def remove_car(self, car_id):
+        with self._lock:
+            schedule = self._schedules.pop(int(car_id), None)
+            if schedule is not None:
+                for _, _, rental_id in schedule.conflicts(date.min, date.max):
+                    self._rentals.pop(rental_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cars": len(self._schedules),
+                "bookings": len(self._rentals),
+                "horizon": self._horizon
+            }
+
+
+# ==========================
+# SQL Fallback
+# ==========================
+
+def sql_conflicts(cursor, car_id, start, end, ignore=None):
+    """conflicts() answered by the database on an existing cursor.
+
+    Dates must already be normalised with booking_range().
+    """
+    cursor.execute(sql("car_conflicts"), (car_id, end, start, ignore or 0))
+    return cursor.fetchall()
+
+
+def prepared_conflicts(conn, car_id, start, end, ignore=None):
+    """sql_conflicts() through a pooled connection's prepared statement."""
+    return run(conn, "car_conflicts", (car_id, end, start, ignore or 0)).rows
+
+
+def sql_free_cars(cursor, start, end):
+    """free_cars() answered by the database on an existing cursor."""
+    cursor.execute(
+        """
+        SELECT c.car_id
+        FROM Cars c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM Rentals r
+            WHERE r.car_id = c.car_id
+              AND r.rental_start_date < %s
+              AND GREATEST(r.rental_end_date, ADDDATE(r.rental_start_date, 1)) > %s
+        )
+        ORDER BY c.car_id
+        """,
+        (end, start)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _sql_free_cars(start, end):
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        rows = sql_free_cars(cursor, start, end)
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+availability = AvailabilityIndex()
@@ -0,0 +1,387 @@
+import itertools
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import mysql.connector
+
+
+# ==========================
+# Storage Backends
+# ==========================
+# db_pool asks the configured backend for new connections; everything
+# above it keeps writing MySQL-flavoured SQL with %s placeholders.
+#   mysql  - a MySQL server set up with create.sql (the default).
+#   sqlite - an embedded database file set up with schema_sqlite.sql on
+#            first use, for branches without a MySQL server. Its
+#            connections translate the few MySQL-only constructs the
+#            code uses (see SQLiteCursor) and register the MySQL
+#            functions it calls (DATEDIFF, GREATEST, ADDDATE, CURDATE).
+# RENTALDB_BACKEND picks one; RENTALDB_SQLITE_PATH names the database
+# file, and ":memory:" gives a shared in-process database.
+
+BACKEND = os.environ.get("RENTALDB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("RENTALDB_SQLITE_PATH", "rentaldb.sqlite3")
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_sqlite.sql")
+SQLITE_BUSY_TIMEOUT = 10.0   # seconds a writer waits for the database lock
+
+BACKENDS = ["mysql", "sqlite"]
+
+# Names the in-memory databases; id() can be reused by a later backend
+# while a connection to an earlier one's database is still open
+_memory_databases = itertools.count(1)
+
+
+class MySQLBackend:
+    name = "mysql"
+    supports_fulltext = True
+
+    def __init__(self, config):
+        self.config = dict(config)
+
+    def connect(self):
+        return mysql.connector.connect(**self.config)
+
+    def describe(self):
+        return f"MySQL {self.config.get('user')}@{self.config.get('host')}/{self.config.get('database')}"
+
+
+# ==========================
+# SQLite
+# ==========================
+
+CENTS = Decimal("0.01")
+
+# Column values come back as the Python types mysql.connector returns
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()).quantize(CENTS))
+
+
+def _to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _datediff(end, start):
+    if end is None or start is None:
+        return None
+    return (_to_date(end) - _to_date(start)).days
+
+
+def _adddate(value, days):
+    if value is None or days is None:
+        return None
+    return (_to_date(value) + timedelta(days=int(days))).isoformat()
+
+
+def _greatest(*values):
+    if any(value is None for value in values):
+        return None
+    return max(values)
+
+
+def _curdate():
+    return date.today().isoformat()
+
+
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+_LIKE_PARAM = re.compile(r"\bLIKE\s+%s", re.IGNORECASE)
+_TRUNCATE = re.compile(r"^\s*TRUNCATE\s+(?:TABLE\s+)?(\w+)\s*;?\s*$", re.IGNORECASE)
+_FOREIGN_KEY_CHECKS = re.compile(r"^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*([01])\s*;?\s*$", re.IGNORECASE)
+
+_translated = {}
+
+
+def translate(sql):
+    """MySQL statement text -> SQLite statement text (cached per statement)."""
+    result = _translated.get(sql)
+    if result is None:
+        result = _FOR_UPDATE.sub("", sql)       # a write transaction already locks the database
+        result = _LIKE_PARAM.sub("LIKE %s ESCAPE '\\\\'", result)
+        result = result.replace("%s", "?")
+        if len(_translated) < 2048:
+            _translated[sql] = result
+    return result
+
+
+# Stored procedures called through cursor.callproc(), as fn(cursor, *args).
+# A procedure that returns result sets returns them as a list of
+# (column_names, rows); the caller reads them with cursor.stored_results().
+SQLITE_PROCEDURES = {}
+
+
+def sqlite_procedure(name):
+    """Register the SQLite stand-in for the MySQL stored procedure `name`."""
+    def register(fn):
+        SQLITE_PROCEDURES[name] = fn
+        return fn
+    return register
+
+
+@sqlite_procedure("sp_rebuild_report_summaries")
+def _rebuild_report_summaries(cursor):
+    cursor.execute("DELETE FROM CarRentalSummary")
+    cursor.execute(
+        """
+        INSERT INTO CarRentalSummary (car_id, rental_count, total_earnings)
+        SELECT r.car_id, COUNT(*), IFNULL(SUM(i.amount), 0)
+          FROM (
+                SELECT rental_id, car_id FROM Rentals
+                UNION ALL
+                SELECT rental_id, car_id FROM RentalsArchive
+               ) r
+          LEFT JOIN (
+                SELECT rental_id, SUM(invoice_amount) AS amount
+                  FROM (
+                        SELECT rental_id, invoice_amount FROM Invoices
+                        UNION ALL
+                        SELECT rental_id, invoice_amount FROM InvoicesArchive
+                       )
+                 GROUP BY rental_id
+               ) i ON i.rental_id = r.rental_id
+         GROUP BY r.car_id
+        """
+    )
+    cursor.execute("DELETE FROM CustomerRentalSummary")
+    cursor.execute(
+        """
+        INSERT INTO CustomerRentalSummary (customer_id, rental_count)
+        SELECT customer_id, COUNT(*)
+          FROM (
+                SELECT customer_id FROM Rentals
+                UNION ALL
+                SELECT customer_id FROM RentalsArchive
+               )
+         GROUP BY customer_id
+        """
+    )
+    cursor.execute("DELETE FROM ArchiveCarSummary")
+    cursor.execute(
+        """
+        INSERT INTO ArchiveCarSummary (car_id, rental_count, total_earnings)
+        SELECT r.car_id, COUNT(*), IFNULL(SUM(i.amount), 0)
+          FROM RentalsArchive r
+          LEFT JOIN (
+                SELECT rental_id, SUM(invoice_amount) AS amount
+                  FROM InvoicesArchive
+                 GROUP BY rental_id
+               ) i ON i.rental_id = r.rental_id
+         GROUP BY r.car_id
+        """
+    )
+    cursor.execute("DELETE FROM ArchiveCustomerSummary")
+    cursor.execute(
+        """
+        INSERT INTO ArchiveCustomerSummary (customer_id, rental_count)
+        SELECT customer_id, COUNT(*)
+          FROM RentalsArchive
+         GROUP BY customer_id
+        """
+    )
+    cursor.execute(
+        """
+        UPDATE Invoices
+           SET amount_paid = paid
+          FROM (
+                SELECT i.invoice_id, ROUND(IFNULL(SUM(p.amount), 0), 2) AS paid
+                  FROM Invoices i
+                  LEFT JOIN Payments p ON p.invoice_id = i.invoice_id
+                 GROUP BY i.invoice_id
+               ) AS totals
+         WHERE Invoices.invoice_id = totals.invoice_id
+           AND Invoices.amount_paid <> totals.paid
+        """
+    )
+
+
+class StoredResult:
+    """One result set of a procedure call, read like mysql.connector's stored_results()."""
+
+    def __init__(self, columns, rows):
+        self.description = [(name,) + (None,) * 6 for name in columns]
+        self._rows = list(rows)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+
+class SQLiteCursor:
+    """DB-API cursor that accepts the MySQL dialect used across the app."""
+
+    def __init__(self, conn, raw):
+        self._conn = conn
+        self._raw = raw
+        self._results = []
+
+    @property
+    def connection(self):
+        return self._conn
+
+    def execute(self, operation, params=None):
+        truncate = _TRUNCATE.match(operation)
+        if truncate:
+            # TRUNCATE empties the table, resets AUTO_INCREMENT and commits
+            table = truncate.group(1)
+            self._raw.execute(f"DELETE FROM {table}")
+            self._raw.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+            self._conn.commit()
+            return None
+        checks = _FOREIGN_KEY_CHECKS.match(operation)
+        if checks:
+            # PRAGMA foreign_keys is a no-op inside a transaction
+            self._conn.commit()
+            self._raw.execute(f"PRAGMA foreign_keys = {'ON' if checks.group(1) == '1' else 'OFF'}")
+            return None
+        self._raw.execute(translate(operation), tuple(params) if params is not None else ())
+        return None
+
+    def executemany(self, operation, seq_params):
+        self._raw.executemany(translate(operation), (tuple(params) for params in seq_params))
+
+    def callproc(self, procname, args=()):
+        try:
+            procedure = SQLITE_PROCEDURES[procname]
+        except KeyError:
+            raise sqlite3.OperationalError(f"PROCEDURE {procname} does not exist") from None
+        results = procedure(self, *args)
+        self._results = [StoredResult(columns, rows) for columns, rows in results or ()]
+        return args
+
+    def stored_results(self):
+        results, self._results = self._results, []
+        return iter(results)
+
+    def fetchone(self):
+        return self._raw.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._raw.fetchmany(size)
+
+    def fetchall(self):
+        return self._raw.fetchall()
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._raw.lastrowid
+
+    def close(self):
+        self._raw.close()
+
+
+class SQLiteConnection:
+    """The parts of the mysql.connector connection API the app relies on."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self, *args, **kwargs):
+        # buffered/prepared/dictionary options have no SQLite equivalent
+        return SQLiteCursor(self, self._raw.cursor())
+
+    def start_transaction(self, isolation_level=None, readonly=False, **kwargs):
+        # SQLite transactions are serializable; IMMEDIATE takes the write
+        # lock up front so FOR UPDATE-style read-then-write stays atomic.
+        if self._raw.in_transaction:
+            raise sqlite3.ProgrammingError("Transaction already in progress")
+        self._raw.execute("BEGIN" if readonly else "BEGIN IMMEDIATE")
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._raw.execute("SELECT 1").fetchone()
+
+    def close(self):
+        self._raw.close()
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    supports_fulltext = False
+
+    def __init__(self, path=SQLITE_PATH, schema=SQLITE_SCHEMA):
+        self.path = path
+        self.schema = schema
+        self._uri = path == ":memory:"
+        if self._uri:
+            # One database shared by every pooled connection in this process
+            self.path = f"file:rentaldb_{next(_memory_databases)}?mode=memory&cache=shared"
+        self._keeper = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def connect(self):
+        raw = sqlite3.connect(
+            self.path,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,   # pooled connections move between threads
+            uri=self._uri
+        )
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.execute("PRAGMA synchronous = NORMAL")
+        raw.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+        raw.create_function("ADDDATE", 2, _adddate, deterministic=True)
+        raw.create_function("GREATEST", -1, _greatest, deterministic=True)
+        raw.create_function("CURDATE", 0, _curdate)
+        if not self._ready:
+            self._initialise(raw)
+        return SQLiteConnection(raw)
+
+    def _initialise(self, raw):
+        with self._lock:
+            if self._ready:
+                return
+            if self._uri:
+                # An in-memory database lives as long as one connection to it
+                self._keeper = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+            else:
+                raw.execute("PRAGMA journal_mode = WAL")
+            exists = raw.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Customers'"
+            ).fetchone()
+            if not exists:
+                with open(self.schema, encoding="utf-8") as handle:
+                    raw.executescript(handle.read())
+            self._ready = True
+
+    def describe(self):
+        return "SQLite (in memory)" if self._uri else f"SQLite {os.path.abspath(self.path)}"
+
+
+def create_backend(name=BACKEND, mysql_config=None, sqlite_path=SQLITE_PATH):
+    """Build the backend called `name` ("mysql" or "sqlite")."""
+    if name == "mysql":
+        return MySQLBackend(mysql_config or {})
+    if name == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    raise ValueError(f"Unknown storage backend {name!r} (expected one of {', '.join(BACKENDS)})")
@@ -0,0 +1,7 @@
+"""Synthetic-data benchmarks for RentalDB.
+
+    python -m benchmarks.generate --rentals 100000 --reset
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.roundtrips --rtt-ms 20
+"""
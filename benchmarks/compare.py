@@ -0,0 +1,79 @@
+import argparse
+import json
+import sys
+
+
+# ==========================
+# Benchmark Comparison
+# ==========================
+# Compares the median of every benchmark present in both files. A change
+# counts as a regression (or improvement) only if it exceeds --threshold
+# and is larger than the spread of the baseline runs (p95 - min), so
+# noisy benchmarks do not fail the comparison on their own.
+
+THRESHOLD = 0.10
+
+
+def load(path):
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Return a list of (name, base_median, new_median, ratio, verdict) rows."""
+    rows = []
+    base_results = baseline["results"]
+    new_results = current["results"]
+    for name in sorted(set(base_results) | set(new_results)):
+        base = base_results.get(name)
+        new = new_results.get(name)
+        if base is None or new is None:
+            rows.append((name, base and base["median"], new and new["median"], None,
+                         "added" if base is None else "removed"))
+            continue
+
+        ratio = new["median"] / base["median"] if base["median"] else float("inf")
+        noise = base["p95"] - base["min"]
+        change = new["median"] - base["median"]
+        if abs(ratio - 1) <= threshold or abs(change) <= noise:
+            verdict = "same"
+        elif ratio > 1:
+            verdict = "SLOWER"
+        else:
+            verdict = "faster"
+        rows.append((name, base["median"], new["median"], ratio, verdict))
+    return rows
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative change treated as significant (default 0.10)")
+    args = parser.parse_args(argv)
+
+    baseline, current = load(args.baseline), load(args.current)
+    for label, data in (("baseline", baseline), ("current", current)):
+        meta = data["meta"]
+        print(f"{label:>8}: commit {meta.get('commit')} at {meta.get('timestamp')}, tables {meta.get('tables')}")
+    if baseline["meta"].get("tables") != current["meta"].get("tables"):
+        print("warning: the runs used different data sets")
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"\n{'benchmark':<48} {'base ms':>10} {'new ms':>10} {'ratio':>7}  verdict")
+    for name, base, new, ratio, verdict in rows:
+        ratio_text = "-" if ratio is None else f"{ratio:.2f}x"
+        print(f"{name:<48} {_ms(base):>10} {_ms(new):>10} {ratio_text:>7}  {verdict}")
+
+    regressions = [row for row in rows if row[4] == "SLOWER"]
+    print(f"\n{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import argparse
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from bulk_import import bulk_import, print_progress
+from db_pool import connect_db
+
+
+# ==========================
+# Synthetic RentalDB Data
+# ==========================
+# Deterministic for a given --seed. Shapes are chosen to look like a real
+# rental business rather than uniform noise:
+#   * car types, colours and prices follow a weighted mix (prices vary
+#     around a per-type base rate);
+#   * each car has its own popularity, and its rentals are laid out back to
+#     back with random gaps, so no car is ever double-booked;
+#   * customer activity is long-tailed (a few regulars, many one-offs);
+#   * most finished rentals are paid, some partially or in two parts.
+# Ids are assigned explicitly on empty tables, so invoice_id == rental_id
+# (invoices are still created by trg_after_rental_insert).
+
+CAR_TYPES = {
+    # type: (share of fleet, base daily rate)
+    "Compact": (0.22, 28.0),
+    "Sedan": (0.26, 35.0),
+    "SUV": (0.20, 55.0),
+    "Truck": (0.08, 60.0),
+    "Van": (0.07, 65.0),
+    "Minivan": (0.07, 50.0),
+    "Convertible": (0.05, 80.0),
+    "Luxury": (0.05, 120.0)
+}
+CAR_COLORS = {
+    "Black": 0.22, "White": 0.24, "Silver": 0.16, "Gray": 0.14,
+    "Blue": 0.10, "Red": 0.09, "Green": 0.03, "Yellow": 0.02
+}
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+    "David", "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Priya", "Wei", "Carlos", "Fatima", "Olga", "Kenji", "Amara"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas",
+    "Taylor", "Moore", "Jackson", "Martin", "Lee", "Patel", "Nguyen", "Kim", "Chen"
+]
+PAYMENT_METHODS = {"Credit Card": 0.60, "Debit Card": 0.25, "Cash": 0.10, "Online": 0.05}
+
+RESET_TABLES = [
+    "Payments", "Invoices", "Rentals", "Cars", "Customers",
+    "CarRentalSummary", "CustomerRentalSummary", "ChangeLog",
+    "RentalsArchive", "InvoicesArchive", "PaymentsArchive",
+    "ArchiveCarSummary", "ArchiveCustomerSummary"
+]
+
+RENTALS_PER_CUSTOMER = 8
+RENTALS_PER_CAR = 150
+
+
+def _choice(rng, weights, size):
+    names = list(weights)
+    shares = np.array([w[0] if isinstance(w, tuple) else w for w in weights.values()])
+    picks = rng.choice(len(names), size=size, p=shares / shares.sum())
+    return [names[i] for i in picks]
+
+
+def make_customers(rng, count):
+    first = [FIRST_NAMES[i] for i in rng.integers(0, len(FIRST_NAMES), count)]
+    last = [LAST_NAMES[i] for i in rng.integers(0, len(LAST_NAMES), count)]
+    for i in range(count):
+        customer_id = i + 1
+        yield {
+            "customer_id": customer_id,
+            "first_name": first[i],
+            "last_name": last[i],
+            "email": f"{first[i].lower()}.{last[i].lower()}{customer_id}@example.com",
+            "phone": f"555-{customer_id // 10000 % 1000:03d}-{customer_id % 10000:04d}"
+        }
+
+
+def make_cars(rng, count):
+    types = _choice(rng, CAR_TYPES, count)
+    colors = _choice(rng, CAR_COLORS, count)
+    base = np.array([CAR_TYPES[t][1] for t in types])
+    prices = np.round(base * rng.lognormal(0.0, 0.15, count), 2)
+    cars = [
+        {"car_id": i + 1, "car_type": types[i], "car_color": colors[i], "car_price": f"{prices[i]:.2f}"}
+        for i in range(count)
+    ]
+    return cars, prices
+
+
+def make_rentals(rng, count, customers, cars, today):
+    """Return (customer_ids, car_ids, starts, ends) arrays sorted by start date."""
+    popularity = rng.gamma(2.0, 1.0, cars)
+    car_ids = np.sort(rng.choice(cars, size=count, p=popularity / popularity.sum())) + 1
+
+    durations = rng.geometric(0.3, count)             # days, mean ~3.3
+    gaps = rng.geometric(0.15, count) - 1             # idle days before each rental
+    steps = gaps + durations
+    # Offset of every rental from the start of its car's timeline
+    ends_offset = np.cumsum(steps)
+    first_of_car = np.r_[0, np.flatnonzero(np.diff(car_ids)) + 1]
+    car_base = np.repeat(ends_offset[first_of_car] - steps[first_of_car],
+                         np.diff(np.r_[first_of_car, count]))
+    ends_offset = ends_offset - car_base
+    starts_offset = ends_offset - durations
+
+    # Shift each car's timeline so it finishes within the next 60 days
+    last_of_car = np.r_[first_of_car[1:] - 1, count - 1]
+    shift = ends_offset[last_of_car] - rng.integers(0, 60, len(last_of_car))
+    shift = np.repeat(shift, np.diff(np.r_[first_of_car, count]))
+    origin = np.datetime64(today, "D")
+    starts = origin + (starts_offset - shift)
+    ends = origin + (ends_offset - shift)
+
+    ranks = np.arange(1, customers + 1)
+    activity = 1.0 / ranks ** 0.8
+    customer_ids = rng.permutation(customers)[
+        rng.choice(customers, size=count, p=activity / activity.sum())
+    ] + 1
+
+    order = np.argsort(starts, kind="stable")
+    return customer_ids[order], car_ids[order], starts[order], ends[order]
+
+
+def rental_records(customer_ids, car_ids, starts, ends):
+    start_text = starts.astype(str).tolist()
+    end_text = ends.astype(str).tolist()
+    for i in range(len(car_ids)):
+        yield {
+            "rental_id": i + 1,
+            "customer_id": int(customer_ids[i]),
+            "car_id": int(car_ids[i]),
+            "rental_start_date": start_text[i],
+            "rental_end_date": end_text[i]
+        }
+
+
+def payment_records(rng, amounts, ends, today):
+    """Payments for finished rentals; invoice i + 1 belongs to rental i + 1."""
+    finished = np.flatnonzero(ends < np.datetime64(today, "D"))
+    outcome = rng.random(len(finished))
+    methods = _choice(rng, PAYMENT_METHODS, len(finished) * 2)
+    delays = rng.geometric(0.3, len(finished)) - 1
+    payment_id = 0
+
+    for n, i in enumerate(finished):
+        if outcome[n] >= 0.92:
+            continue                                  # unpaid
+        amount = float(amounts[i])
+        paid_on = ends[i] + delays[n]
+        if outcome[n] < 0.08:
+            parts = [round(amount * 0.5, 2)]           # partial payment
+        elif outcome[n] < 0.16:
+            half = round(amount / 2, 2)
+            parts = [half, round(amount - half, 2)]    # paid in two parts
+        else:
+            parts = [amount]
+        for k, part in enumerate(parts):
+            payment_id += 1
+            yield {
+                "payment_id": payment_id,
+                "invoice_id": int(i) + 1,
+                "payment_date": str(paid_on + 7 * k),
+                "amount": f"{part:.2f}",
+                "payment_method": methods[2 * n + k]
+            }
+
+
+def reset_tables():
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in RESET_TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def table_counts(tables=("Customers", "Cars", "Rentals", "Invoices", "Payments")):
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        counts = {}
+        for table in tables:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+        cursor.close()
+        return counts
+    finally:
+        conn.close()
+
+
+def generate(rentals, customers=None, cars=None, seed=42, today=None, progress=None):
+    """Load a synthetic data set into empty tables; returns per-entity import stats."""
+    customers = customers or max(rentals // RENTALS_PER_CUSTOMER, 10)
+    cars = cars or max(rentals // RENTALS_PER_CAR, 5)
+    today = today or date.today()
+    rng = np.random.default_rng(seed)
+
+    existing = table_counts()
+    if any(existing.values()):
+        raise RuntimeError(f"Target tables are not empty ({existing}); use --reset")
+
+    stats = {}
+    stats["customers"] = bulk_import("customers", make_customers(rng, customers), progress=progress)
+    car_rows, prices = make_cars(rng, cars)
+    stats["cars"] = bulk_import("cars", car_rows, progress=progress)
+
+    customer_ids, car_ids, starts, ends = make_rentals(rng, rentals, customers, cars, today)
+    stats["rentals"] = bulk_import(
+        "rentals", rental_records(customer_ids, car_ids, starts, ends), progress=progress
+    )
+
+    counts = table_counts(("Invoices",))
+    if counts["Invoices"] != rentals:
+        raise RuntimeError("Invoice ids do not line up with rental ids; load into empty tables")
+    days = np.maximum((ends - starts).astype(np.int64), 1)
+    amounts = np.round(prices[car_ids - 1] * days, 2)
+    stats["payments"] = bulk_import(
+        "payments", payment_records(rng, amounts, ends, today), progress=progress
+    )
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill RentalDB with synthetic benchmark data.")
+    parser.add_argument("--rentals", type=int, default=100000, help="number of rentals (1e3 to 1e7)")
+    parser.add_argument("--customers", type=int, help=f"default: rentals / {RENTALS_PER_CUSTOMER}")
+    parser.add_argument("--cars", type=int, help=f"default: rentals / {RENTALS_PER_CAR}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate every RentalDB table first")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        reset_tables()
+    started = time.perf_counter()
+    stats = generate(args.rentals, args.customers, args.cars, args.seed, progress=print_progress)
+    for entity, result in stats.items():
+        print(f"{entity:>10}: {result['inserted']} rows, {result['rejected']} rejected")
+    print(f"Generated in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
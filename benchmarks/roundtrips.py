@@ -0,0 +1,254 @@
+import argparse
+import socket
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import db_pool
+import procedures
+import services
+from availability import booking_range
+from benchmarks.generate import table_counts
+from benchmarks.run import BOOKING_YEAR, REPEAT, print_result, timed
+from cache import get_car
+from pricing import RATES, quote
+from transactions import run_transaction
+
+
+# ==========================
+# Round-Trip Benchmark
+# ==========================
+# Books and re-books rentals two ways against the same database:
+#   statements - the client drives the transaction one statement at a
+#                time (lock the car, check overlaps, insert/update, fix
+#                the invoice, commit), as services.py did before the
+#                stored procedures;
+#   procedure  - one sp_create_rental / sp_update_rental call.
+# For MySQL the connections go through a local TCP proxy that delays
+# every client request by --rtt-ms, the way a remote server would, and
+# counts requests, so the output shows round trips per operation and
+# what they cost at that latency. SQLite has no network to emulate;
+# there the timings only compare the two code paths.
+
+RTT_MS = 20.0
+
+
+class LatencyProxy:
+    """Forwards TCP connections to target, delaying each client request by `delay` seconds."""
+
+    def __init__(self, target, delay):
+        self.target = target
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.address = self._listener.getsockname()
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def close(self):
+        self._listener.close()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(client, upstream, True), daemon=True).start()
+            threading.Thread(target=self._pump, args=(upstream, client, False), daemon=True).start()
+
+    def _pump(self, source, sink, is_request):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if is_request:
+                    with self._lock:
+                        self.requests += 1
+                    time.sleep(self.delay)
+                sink.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, sink):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+# ----- the statement-at-a-time flow -----
+
+def _lock_and_check(tx, car_id, start, end, rental_id=None):
+    rows = tx.execute(
+        "SELECT car_id, car_type, car_price FROM Cars WHERE car_id = %s FOR UPDATE", (car_id,)
+    ).fetchall()
+    first, last = booking_range(start, end)
+    conflicts = tx.execute(
+        """
+        SELECT rental_id FROM Rentals
+        WHERE car_id = %s AND rental_start_date < %s
+          AND GREATEST(rental_end_date, ADDDATE(rental_start_date, 1)) > %s
+          AND rental_id <> %s
+        """,
+        (car_id, last, first, rental_id or 0)
+    ).fetchall()
+    if not rows or conflicts:
+        raise ValueError(f"Car {car_id} cannot be booked")
+    return rows[0]
+
+
+def _book(tx, customer_id, car_id, start, end):
+    car = _lock_and_check(tx, car_id, start, end)
+    tx.execute(
+        "INSERT INTO Rentals (customer_id, car_id, rental_start_date, rental_end_date) "
+        "VALUES (%s, %s, %s, %s)",
+        (customer_id, car_id, start, end)
+    )
+    rental_id = tx.cursor.lastrowid
+    if not RATES.is_flat():
+        tx.execute(
+            "UPDATE Invoices SET invoice_amount = %s WHERE rental_id = %s",
+            (quote(car[2], start, end)[1], rental_id)
+        )
+    return rental_id
+
+
+def _rebook(tx, rental_id, start, end):
+    car_id = tx.fetchone("SELECT car_id FROM Rentals WHERE rental_id = %s", (rental_id,))[0]
+    car = _lock_and_check(tx, car_id, start, end, rental_id)
+    tx.execute(
+        "UPDATE Rentals SET rental_start_date = %s, rental_end_date = %s WHERE rental_id = %s",
+        (start, end, rental_id)
+    )
+    tx.execute(
+        "UPDATE Invoices SET invoice_amount = %s WHERE rental_id = %s",
+        (quote(car[2], start, end)[1], rental_id)
+    )
+
+
+def statements_create(customer_id, car_id, start, end):
+    return run_transaction("bench_create", _book, customer_id, car_id, start, end,
+                           isolation_level="READ COMMITTED")
+
+
+def statements_update(rental_id, start, end):
+    run_transaction("bench_update", _rebook, rental_id, start, end,
+                    isolation_level="READ COMMITTED")
+
+
+_booked_cars = {}   # rental_id -> car_id of the rentals procedure_create made
+
+
+def procedure_create(customer_id, car_id, start, end):
+    price = get_car(car_id)[3]
+    rental_id = procedures.call(
+        "sp_create_rental", customer_id, car_id, start, end, price, quote(price, start, end)[1]
+    )["rental_id"]
+    _booked_cars[rental_id] = car_id
+    return rental_id
+
+
+def procedure_update(rental_id, start, end):
+    price = get_car(_booked_cars[rental_id])[3]
+    procedures.call("sp_update_rental", rental_id, start, end, price, quote(price, start, end)[1])
+
+
+FLOWS = {
+    "statements": (statements_create, statements_update),
+    "procedure": (procedure_create, procedure_update)
+}
+
+
+# ----- driver -----
+
+def run(repeat=REPEAT, proxy=None, progress=None):
+    """Time create/update with each flow; returns {name: timing dict plus round_trips}."""
+    customers = table_counts(("Customers",))["Customers"]
+    cars = [row[0] for row in services.fetch_rows("SELECT car_id FROM Cars LIMIT 100")[1]]
+    if not customers or not cars:
+        raise SystemExit("The database has no customers or cars; run benchmarks.generate first.")
+
+    slots = iter(range(10 ** 6))
+    created = []
+
+    def next_booking():
+        slot = next(slots)
+        start = date(BOOKING_YEAR + 1, 1, 1) + timedelta(days=10 * (slot // len(cars)))
+        return 1 + slot % customers, cars[slot % len(cars)], start
+
+    results = {}
+    try:
+        for flow, (create, update) in FLOWS.items():
+            def do_create(create=create):
+                customer_id, car_id, start = next_booking()
+                rental_id = create(customer_id, car_id, start.isoformat(),
+                                   (start + timedelta(days=3)).isoformat())
+                created.append((rental_id, start))
+
+            def do_update(update=update):
+                rental_id, start = created[-1]
+                update(rental_id, start.isoformat(), (start + timedelta(days=4)).isoformat())
+
+            for op, fn in (("create", do_create), ("update", do_update)):
+                name = f"{op}:{flow}"
+                before = proxy.requests if proxy else 0
+                results[name] = timed(fn, repeat)
+                if proxy:
+                    results[name]["round_trips"] = (proxy.requests - before) / (repeat + 1)
+                if progress is not None:
+                    progress(name, results[name])
+    finally:
+        for rental_id, _ in created:
+            services.delete_rental(rental_id)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare statement-at-a-time bookings with stored procedure calls."
+    )
+    parser.add_argument("--rtt-ms", type=float, default=RTT_MS,
+                        help="simulated network round-trip time for MySQL (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+
+    proxy = None
+    backend = db_pool.get_backend()
+    if backend.name == "mysql" and args.rtt_ms > 0:
+        target = (db_pool.DB_CONFIG["host"], db_pool.DB_CONFIG.get("port", 3306))
+        proxy = LatencyProxy(target, args.rtt_ms / 1000).start()
+        db_pool.DB_CONFIG.update(host=proxy.address[0], port=proxy.address[1])
+        db_pool.use_backend("mysql")
+        print(f"Routing through a proxy adding {args.rtt_ms:g}ms per round trip", file=sys.stderr)
+    else:
+        print(f"{backend.describe()}: no network latency is simulated", file=sys.stderr)
+
+    def progress(name, result):
+        print_result(name, result)
+        if "round_trips" in result:
+            print(f"  {'':<48} {result['round_trips']:.1f} round trips", file=sys.stderr)
+
+    try:
+        results = run(args.repeat, proxy, progress)
+    finally:
+        if proxy is not None:
+            proxy.close()
+
+    for op in ("create", "update"):
+        before, after = results[f"{op}:statements"], results[f"{op}:procedure"]
+        print(f"{op}: {before['median'] * 1000:.1f}ms -> {after['median'] * 1000:.1f}ms "
+              f"({before['median'] / after['median']:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
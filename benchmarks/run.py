@@ -0,0 +1,245 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import services
+from analytics import store as analytics_store
+from benchmarks.generate import table_counts
+from pricing import RateTable, price_rentals
+from reports import REPORT_QUERIES, TABLE_REPORTS
+from rentals_view import RentalsSource
+from search import ID_FIELDS, SEARCH_FIELDS, SEARCH_MODES, prefix_cache, search_rows
+
+
+# ==========================
+# Benchmark Runner
+# ==========================
+# Times the operations behind the UI against whatever database connect_db()
+# points at, after benchmarks.generate has loaded it. Every benchmark is
+# warmed up once and then run --repeat times; the JSON output holds
+# min/median/p95/mean seconds per benchmark plus enough metadata (commit,
+# table sizes) for benchmarks.compare to tell regressions from noise.
+
+REPEAT = 5
+PAGE_SIZE = 200
+BOOKING_YEAR = 2100     # far-future dates so benchmark bookings never overlap real ones
+
+
+def timed(fn, repeat=REPEAT, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "mean": statistics.fmean(samples)
+    }
+
+
+# ----- benchmark definitions -----
+
+def report_benchmarks():
+    for label, query in REPORT_QUERIES.items():
+        if label in TABLE_REPORTS:
+            # The Reports tab only ever fetches the first page of a table
+            query = f"{query.strip().rstrip(';')} LIMIT {PAGE_SIZE}"
+            yield f"report:{label}", lambda q=query: services.fetch_rows(q)
+        else:
+            yield f"report:{label}", lambda name=label: services.run_report(name)
+
+
+def analytics_benchmarks():
+    # The warm-up run loads the store; the timed runs only read memory
+    for label in REPORT_QUERIES:
+        limit = PAGE_SIZE if label in TABLE_REPORTS else None
+        yield f"analytics:{label}", lambda name=label, n=limit: analytics_store.report(name).rows(0, n)
+    for dimensions in (["month"], ["car_type"], ["customer"], ["month", "car_type"]):
+        yield (
+            f"analytics:group_by:{'+'.join(dimensions)}",
+            lambda d=dimensions: analytics_store.group_by(d).rows()
+        )
+
+
+def rentals_view_benchmarks():
+    yield "rentals_view:first_page", lambda: RentalsSource().first(PAGE_SIZE)
+    yield "rentals_view:by_start_desc", lambda: RentalsSource({}, "rental_start_date", True).first(PAGE_SIZE)
+    yield "rentals_view:car_type_filter", lambda: RentalsSource({"car_type": "SUV"}).first(PAGE_SIZE)
+
+
+def search_benchmarks(rng):
+    samples = {
+        "Customers": services.fetch_rows(
+            "SELECT * FROM Customers WHERE customer_id = %s",
+            (int(rng.integers(1, table_counts(("Customers",))["Customers"] + 1)),)
+        )[1],
+        "Cars": services.fetch_rows(
+            "SELECT * FROM Cars WHERE car_id = %s",
+            (int(rng.integers(1, table_counts(("Cars",))["Cars"] + 1)),)
+        )[1]
+    }
+    for table, fields in SEARCH_FIELDS.items():
+        if not samples[table]:
+            continue
+        row = samples[table][0]
+        for column, field in enumerate(fields):
+            value = str(row[column])
+            for mode in (["exact"] if field in ID_FIELDS else SEARCH_MODES):
+                term = value[:3] if mode == "prefix" else value
+                yield (
+                    f"search:{table}.{field}:{mode}",
+                    lambda t=table, f=field, v=term, m=mode: search_rows(t, f, v, m, 50)
+                )
+
+    last_name = samples["Customers"][0][2] if samples["Customers"] else "Smith"
+
+    def type_ahead():
+        prefix_cache.invalidate()
+        for length in range(1, len(last_name) + 1):
+            services.live_search_customers("last_name", last_name[:length])
+
+    yield "search:live_type_ahead", type_ahead
+
+
+def booking_benchmarks(rng):
+    """create_rental / update_rental on far-future dates.
+
+    Returns (benchmarks, created); the caller deletes the created rentals.
+    """
+    customers = table_counts(("Customers",))["Customers"]
+    cars = services.fetch_rows("SELECT car_id FROM Cars LIMIT 1000")[1]
+    if not customers or not cars:
+        return [], []
+    created = []
+    slots = iter(range(10 ** 6))
+
+    def next_booking():
+        slot = next(slots)
+        car_id = cars[slot % len(cars)][0]
+        start = date(BOOKING_YEAR, 1, 1) + timedelta(days=10 * (slot // len(cars)))
+        return int(rng.integers(1, customers + 1)), car_id, start
+
+    def create():
+        customer_id, car_id, start = next_booking()
+        summary = services.create_rental(
+            customer_id, car_id, start.isoformat(), (start + timedelta(days=3)).isoformat()
+        )
+        created.append((summary["rental_id"], start))
+
+    updates = iter(range(10 ** 6))
+
+    def update():
+        if not created:
+            create()
+        rental_id, start = created[next(updates) % len(created)]
+        services.update_rental(
+            rental_id, start.isoformat(), (start + timedelta(days=int(rng.integers(1, 6)))).isoformat()
+        )
+
+    def free_cars():
+        start = date.today() + timedelta(days=30)
+        services.free_cars(start.isoformat(), (start + timedelta(days=7)).isoformat())
+    return [
+        ("rental:create", create),
+        ("rental:update", update),
+        ("rental:free_cars", free_cars)
+    ], created
+
+
+def pricing_benchmarks(rng):
+    count = 1_000_000
+    starts = np.datetime64(date.today(), "D") + rng.integers(-1000, 365, count)
+    ends = starts + rng.integers(0, 21, count)
+    rates = rng.uniform(20, 150, count)
+    seasonal = RateTable(1.2, [("Summer", "06-15", "08-31", 1.3), ("Holidays", "12-20", "01-05", 1.5)])
+    yield "pricing:1e6_flat", lambda: price_rentals(rates, starts, ends)
+    yield "pricing:1e6_seasonal", lambda: price_rentals(rates, starts, ends, seasonal)
+
+
+# ----- driver -----
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(repeat=REPEAT, seed=7, only=None, progress=None):
+    """Run every benchmark whose name starts with one of `only`; return the results dict."""
+    rng = np.random.default_rng(seed)
+    benchmarks = []
+    benchmarks += report_benchmarks()
+    benchmarks += analytics_benchmarks()
+    benchmarks += rentals_view_benchmarks()
+    benchmarks += search_benchmarks(rng)
+    booking, created = booking_benchmarks(rng)
+    benchmarks += booking
+    benchmarks += pricing_benchmarks(rng)
+
+    results = {}
+    try:
+        for name, fn in benchmarks:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = timed(fn, repeat)
+            if progress is not None:
+                progress(name, results[name])
+    finally:
+        for rental_id, _ in created:
+            services.delete_rental(rental_id)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "tables": table_counts()
+        },
+        "results": results
+    }
+
+
+def print_result(name, result):
+    print(
+        f"  {name:<48} median {result['median'] * 1000:9.2f}ms  "
+        f"min {result['min'] * 1000:9.2f}ms  p95 {result['p95'] * 1000:9.2f}ms",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time RentalDB operations and write JSON results.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", action="append", help="run benchmarks with this name prefix (repeatable)")
+    args = parser.parse_args(argv)
+
+    data = run(args.repeat, args.seed, args.only, progress=print_result)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, default=str)
+    print(f"Wrote {len(data['results'])} results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+
+from db_pool import connect_db
+
+
+# ==========================
+# Import Definitions
+# ==========================
+# Each entity lists the columns it accepts, which of them must be present
+# and which ones reference another table. Primary key columns are
+# optional so migrated books can keep their original ids.
+
+IMPORT_SPECS = {
+    "customers": {
+        "table": "Customers",
+        "columns": ["customer_id", "first_name", "last_name", "email", "phone"],
+        "required": ["first_name", "last_name", "email"],
+        "foreign_keys": {}
+    },
+    "cars": {
+        "table": "Cars",
+        "columns": ["car_id", "car_type", "car_color", "car_price"],
+        "required": ["car_type", "car_color", "car_price"],
+        "foreign_keys": {}
+    },
+    "rentals": {
+        "table": "Rentals",
+        "columns": ["rental_id", "customer_id", "car_id", "rental_start_date", "rental_end_date"],
+        "required": ["customer_id", "car_id", "rental_start_date", "rental_end_date"],
+        "foreign_keys": {
+            "customer_id": ("Customers", "customer_id"),
+            "car_id": ("Cars", "car_id")
+        }
+    },
+    "payments": {
+        "table": "Payments",
+        "columns": ["payment_id", "invoice_id", "payment_date", "amount", "payment_method"],
+        "required": ["invoice_id", "payment_date", "amount", "payment_method"],
+        "foreign_keys": {
+            "invoice_id": ("Invoices", "invoice_id")
+        }
+    }
+}
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_REJECTS = 20
+
+
+# ==========================
+# Input Readers
+# ==========================
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    return open(path, newline="", encoding="utf-8")
+
+
+def read_records(path, fmt=None):
+    """Yield one dict per input record from a CSV or JSON-lines file."""
+    if fmt is None:
+        fmt = "jsonl" if ".jsonl" in path or ".ndjson" in path else "csv"
+
+    handle = open_input(path)
+    try:
+        if fmt == "csv":
+            for record in csv.DictReader(handle):
+                yield record
+        else:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ==========================
+# Validation
+# ==========================
+
+def missing_references(cursor, table, column, values):
+    """Return the subset of values that do not exist in table.column."""
+    values = list(values)
+    if not values:
+        return set()
+
+    placeholders = ", ".join(["%s"] * len(values))
+    cursor.execute(
+        f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})",
+        values
+    )
+    found = {str(row[0]) for row in cursor.fetchall()}
+    return {v for v in values if str(v) not in found}
+
+
+def validate_chunk(cursor, spec, records):
+    """Split a chunk into (valid_records, rejects) with FK checks done in bulk."""
+    valid = []
+    rejects = []
+    for record in records:
+        missing = [c for c in spec["required"] if record.get(c) in (None, "")]
+        if missing:
+            rejects.append((record, f"missing {', '.join(missing)}"))
+        else:
+            valid.append(record)
+
+    for column, (table, ref_column) in spec["foreign_keys"].items():
+        ids = {str(r[column]).strip() for r in valid}
+        unknown = missing_references(cursor, table, ref_column, ids)
+        if unknown:
+            kept = []
+            for record in valid:
+                if str(record[column]).strip() in unknown:
+                    rejects.append((record, f"unknown {column} {record[column]}"))
+                else:
+                    kept.append(record)
+            valid = kept
+
+    return valid, rejects
+
+
+# ==========================
+# Loader
+# ==========================
+
+def insert_chunk(conn, cursor, sql, rows):
+    """Insert rows in one transaction; on failure retry one by one.
+
+    Returns a list of (row_index, error_message) for the rows that failed.
+    """
+    if not rows:
+        return []
+    try:
+        cursor.executemany(sql, rows)
+        conn.commit()
+        return []
+    except Exception:
+        conn.rollback()
+
+    failed = []
+    for i, row in enumerate(rows):
+        try:
+            cursor.execute(sql, row)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            failed.append((i, str(e)))
+    return failed
+
+
+def override_invoice_amounts(conn, cursor, records):
+    """Apply invoice_amount from the input to the trigger-created invoices.
+
+    Only rentals imported with an explicit rental_id can be matched.
+    """
+    updates = [
+        (r["invoice_amount"], r["rental_id"])
+        for r in records
+        if r.get("invoice_amount") not in (None, "") and r.get("rental_id") not in (None, "")
+    ]
+    if updates:
+        cursor.executemany(
+            "UPDATE Invoices SET invoice_amount = %s WHERE rental_id = %s",
+            updates
+        )
+        conn.commit()
+
+
+def bulk_import(entity, records, chunk_size=CHUNK_SIZE, progress=None):
+    """Load an iterable of dict records into the entity's table.
+
+    Rentals still get their invoices from trg_after_rental_insert, which
+    fires for every row of a multi-row INSERT; an invoice_amount column
+    in the input (with rental_id) overrides the computed amount.
+    Returns a stats dict with counts, rejects and rows per second.
+    """
+    spec = IMPORT_SPECS[entity]
+    stats = {"read": 0, "inserted": 0, "rejected": 0, "rejects": [], "seconds": 0.0}
+    started = time.perf_counter()
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        columns = None
+        sql = None
+
+        for chunk in chunked(records, chunk_size):
+            stats["read"] += len(chunk)
+            if columns is None:
+                # Use the optional id column only if the input provides it
+                columns = [
+                    c for c in spec["columns"]
+                    if c in spec["required"] or chunk[0].get(c) not in (None, "")
+                ]
+                placeholders = ", ".join(["%s"] * len(columns))
+                sql = (
+                    f"INSERT INTO {spec['table']} ({', '.join(columns)}) "
+                    f"VALUES ({placeholders})"
+                )
+
+            valid, rejects = validate_chunk(cursor, spec, chunk)
+            rows = [tuple(r.get(c) for c in columns) for r in valid]
+            failed = insert_chunk(conn, cursor, sql, rows)
+            failed_rows = {i for i, _ in failed}
+            loaded = [r for i, r in enumerate(valid) if i not in failed_rows]
+            rejects += [(valid[i], reason) for i, reason in failed]
+            if entity == "rentals":
+                override_invoice_amounts(conn, cursor, loaded)
+
+            stats["inserted"] += len(loaded)
+            for record, reason in rejects:
+                stats["rejected"] += 1
+                if len(stats["rejects"]) < MAX_REPORTED_REJECTS:
+                    stats["rejects"].append((record, reason))
+
+            stats["seconds"] = time.perf_counter() - started
+            if progress is not None:
+                progress(stats)
+
+        cursor.close()
+    finally:
+        conn.close()
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def print_progress(stats):
+    rate = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"  {stats['read']:>10} read  {stats['inserted']:>10} inserted  "
+        f"{stats['rejected']:>6} rejected  {rate:,.0f} rows/s",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk load RentalDB data from CSV or JSON lines.")
+    parser.add_argument("entity", choices=sorted(IMPORT_SPECS))
+    parser.add_argument("path", help="input file (.csv, .jsonl, optionally .gz) or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="override format detection")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    stats = bulk_import(
+        args.entity,
+        read_records(args.path, args.format),
+        chunk_size=args.chunk_size,
+        progress=print_progress
+    )
+
+    print(
+        f"Imported {stats['inserted']} of {stats['read']} {args.entity} "
+        f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s), "
+        f"{stats['rejected']} rejected"
+    )
+    for record, reason in stats["rejects"]:
+        print(f"  rejected: {reason}: {record}")
+    return 0 if stats["rejected"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
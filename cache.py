@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from statements import fetch
+
+
+# ==========================
+# LRU + TTL Lookup Cache
+# ==========================
+
+CACHE_SIZE = 1024      # entries kept per table
+CACHE_TTL = 300.0      # seconds before an entry is re-read from MySQL
+
+_MISSING = object()
+
+
+class LookupCache:
+    """Thread-safe read-through cache of table rows keyed by id.
+
+    Entries are evicted least-recently-used once `size` is exceeded and
+    re-read once older than `ttl` seconds. Writers call invalidate() so
+    the next read goes back to the database.
+
+    The loader runs outside the lock. Every invalidation bumps a
+    generation (per key while a load of that key is in flight, and one
+    for the whole cache), and a load that raced an invalidation returns
+    its row without storing it, so a row read before a write can never
+    be cached after it.
+    """
+
+    def __init__(self, loader, size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.loader = loader
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (row, loaded_at)
+        self._lock = threading.Lock()
+        self._epoch = 0                 # bumped by invalidate() of everything
+        self._loading = {}              # key -> loads in flight
+        self._generations = {}          # key -> invalidations during those loads
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the row for key (None if it does not exist)."""
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            self._loading[key] = self._loading.get(key, 0) + 1
+            seen = (self._epoch, self._generations.get(key, 0))
+
+        try:
+            row = self.loader(key)
+        except BaseException:
+            with self._lock:
+                self._finish_load(key)
+            raise
+        with self._lock:
+            if self._finish_load(key) == seen:
+                self._entries[key] = (row, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return row
+
+    def _finish_load(self, key):
+        """End one in-flight load of key; returns the generation it ends at."""
+        current = (self._epoch, self._generations.get(key, 0))
+        if self._loading[key] == 1:
+            del self._loading[key]
+            self._generations.pop(key, None)
+        else:
+            self._loading[key] -= 1
+        return current
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._epoch += 1
+            else:
+                key = int(key)
+                self._entries.pop(key, None)
+                if key in self._loading:
+                    self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries)
+            }
+
+
+# ==========================
+# Customer / Car Caches
+# ==========================
+
+def _load_row(statement, key):
+    rows = fetch(statement, (key,))[1]
+    return rows[0] if rows else None
+
+
+customer_cache = LookupCache(lambda key: _load_row("customer_by_id", key))
+car_cache = LookupCache(lambda key: _load_row("car_by_id", key))
+
+
+def get_customer(customer_id):
+    """(customer_id, first_name, last_name, email, phone) or None."""
+    return customer_cache.get(customer_id)
+
+
+def get_car(car_id):
+    """(car_id, car_type, car_color, car_price) or None."""
+    return car_cache.get(car_id)
+
+
+def cache_stats():
+    return {"Customers": customer_cache.stats(), "Cars": car_cache.stats()}
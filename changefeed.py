@@ -0,0 +1,330 @@
+import argparse
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from db_pool import connect_db
+
+
+# ==========================
+# Change Feed
+# ==========================
+# The trg_changelog_* triggers (create.sql, schema_sqlite.sql) append one
+# ChangeLog row per inserted, updated or deleted row of the tracked
+# tables: (version, table_name, row_id, operation I/U/D). version is an
+# increasing id, so "what changed since N" is a primary-key range scan and
+# costs O(changes) however big the tables are. MySQL does not fire
+# triggers for ON DELETE CASCADE, so there the parent's delete trigger
+# also logs the rows its cascade removes.
+# version is an AUTO_INCREMENT value taken when the row is inserted, not
+# when its transaction commits, so a lower version can become visible
+# after a higher one has been read. Readers that follow the log keep a
+# ChangeCursor: besides the highest version read it remembers the
+# missing versions below it, and read_changes() picks those up if they
+# commit later. A version still missing after GAP_SECONDS is taken to
+# belong to a rolled-back transaction and is forgotten.
+
+TRACKED_TABLES = {
+    "Customers": "customer_id",
+    "Cars": "car_id",
+    "Rentals": "rental_id",
+    "Invoices": "invoice_id",
+    "Payments": "payment_id"
+}
+
+MAX_CHANGES = 10000          # beyond this many, readers should reload instead
+GAP_SECONDS = 120.0          # how long a missing version is waited for
+MAX_GAPS = 1000              # missing versions remembered per cursor (the newest)
+RETENTION_DAYS = 7           # default age for prune_older_than()
+PRUNE_CHUNK = 10000
+
+
+def current_version():
+    """The newest change version (0 when the log is empty)."""
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT IFNULL(MAX(version), 0) FROM ChangeLog")
+        version = cursor.fetchone()[0]
+        cursor.close()
+        return int(version)
+    finally:
+        conn.close()
+
+
+# version: highest version read; gaps: ((missing_version, first_seen), ...)
+# below it, first_seen on the time.monotonic() clock
+ChangeCursor = namedtuple("ChangeCursor", ["version", "gaps"])
+
+
+def _missing(after, versions):
+    """Versions after `after` and below the last of the sorted `versions` that are not among them."""
+    if not versions:
+        return []
+    present = set(versions)
+    return [v for v in range(int(after) + 1, versions[-1]) if v not in present]
+
+
+def current_cursor():
+    """A cursor at the newest version, still waiting for the recent versions not yet committed."""
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM ChangeLog ORDER BY version DESC LIMIT %s", (MAX_GAPS,))
+        versions = sorted(row[0] for row in cursor.fetchall())
+        cursor.close()
+    finally:
+        conn.close()
+    if not versions:
+        return ChangeCursor(0, ())
+    now = time.monotonic()
+    return ChangeCursor(versions[-1], tuple((v, now) for v in _missing(versions[0], versions)))
+
+
+def read_changes(cursor, tables=None, limit=MAX_CHANGES):
+    """ChangeLog rows after a ChangeCursor, including late commits into its gaps.
+
+    Returns (changes, complete, next_cursor): changes as for
+    changes_since(), and the cursor to pass next time. complete is False
+    when the caller should reload and resume from current_cursor().
+    """
+    now = time.monotonic()
+    waiting = [(v, seen) for v, seen in cursor.gaps if now - seen < GAP_SECONDS]
+    conn = connect_db()
+    try:
+        db_cursor = conn.cursor()
+        db_cursor.execute("SELECT MIN(version) FROM ChangeLog")
+        oldest = db_cursor.fetchone()[0]
+        # Not filtered by table: every version counts when looking for gaps
+        db_cursor.execute(
+            """
+            SELECT version, table_name, row_id, operation
+            FROM ChangeLog
+            WHERE version > %s
+            ORDER BY version
+            LIMIT %s
+            """,
+            (int(cursor.version), limit + 1)
+        )
+        changes = db_cursor.fetchall()
+        late = []
+        if waiting:
+            db_cursor.execute(
+                f"""
+                SELECT version, table_name, row_id, operation
+                FROM ChangeLog
+                WHERE version IN ({', '.join(['%s'] * len(waiting))})
+                ORDER BY version
+                """,
+                [v for v, _ in waiting]
+            )
+            late = db_cursor.fetchall()
+        db_cursor.close()
+    finally:
+        conn.close()
+
+    pruned = oldest is not None and int(cursor.version) + 1 < oldest
+    complete = len(changes) <= limit and not pruned
+    changes = changes[:limit]
+    filled = {row[0] for row in late}
+    gaps = [(v, seen) for v, seen in waiting if v not in filled]
+    gaps += [(v, now) for v in _missing(cursor.version, [row[0] for row in changes])]
+    next_cursor = ChangeCursor(changes[-1][0] if changes else cursor.version, tuple(gaps[-MAX_GAPS:]))
+
+    changes = late + changes
+    if tables:
+        changes = [row for row in changes if row[1] in tables]
+    return changes, complete, next_cursor
+
+
+def changes_since(version, tables=None, limit=MAX_CHANGES):
+    """ChangeLog rows after `version`, oldest first, as (version, table, row_id, operation).
+
+    Returns (changes, complete). complete is False when more than `limit`
+    changes are waiting or when entries after `version` have been pruned;
+    the caller should then reload from scratch and resume from
+    current_version(). A bare version skips changes that commit late
+    below it; readers that follow the log use read_changes().
+    """
+    conditions = ["version > %s"]
+    params = [int(version)]
+    if tables:
+        conditions.append(f"table_name IN ({', '.join(['%s'] * len(tables))})")
+        params += list(tables)
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(version) FROM ChangeLog")
+        oldest = cursor.fetchone()[0]
+        cursor.execute(
+            f"""
+            SELECT version, table_name, row_id, operation
+            FROM ChangeLog
+            WHERE {' AND '.join(conditions)}
+            ORDER BY version
+            LIMIT %s
+            """,
+            params + [limit + 1]
+        )
+        changes = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    pruned = oldest is not None and int(version) + 1 < oldest
+    complete = len(changes) <= limit and not pruned
+    return changes[:limit], complete
+
+
+def summarize(changes):
+    """Collapse a change list to {table: {"inserted", "updated", "deleted"}} id sets.
+
+    Each row is reported once, by its net effect over the list: a row
+    inserted and then updated counts as inserted, one inserted and then
+    deleted does not appear at all.
+    """
+    first, last = {}, {}
+    for _, table, row_id, operation in changes:
+        first.setdefault((table, row_id), operation)
+        last[(table, row_id)] = operation
+    result = {}
+    for (table, row_id), operation in last.items():
+        sets = result.setdefault(table, {"inserted": set(), "updated": set(), "deleted": set()})
+        created = first[(table, row_id)] == "I"
+        if operation == "D":
+            if not created:
+                sets["deleted"].add(row_id)
+        elif created:
+            sets["inserted"].add(row_id)
+        else:
+            sets["updated"].add(row_id)
+    return result
+
+
+def sortable(value):
+    """Order-preserving key for a row value as shown in a Treeview.
+
+    Treeview hands values back as strings, so numbers are recognised and
+    compared numerically; everything else (ISO dates included) compares
+    as text.
+    """
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return 0, value
+    text = value.isoformat() if isinstance(value, date) else str(value)
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return 1, text
+    return (0, number) if number.is_finite() else (1, text)
+
+
+def changed_rows(table, cursor, limit=MAX_CHANGES):
+    """Current rows of `table` changed after a ChangeCursor.
+
+    Returns (next_cursor, rows, deleted_ids, complete); rows are full
+    SELECT * rows in id order. next_cursor is the cursor to pass next
+    time.
+    """
+    changes, complete, next_cursor = read_changes(cursor, [table], limit)
+    sets = summarize(changes).get(table, {"inserted": set(), "updated": set(), "deleted": set()})
+    upserted = sets["inserted"] | sets["updated"]
+    rows = fetch_by_id(table, sorted(upserted))
+    # A row updated and then removed by a cascade may be logged as U only
+    deleted = sets["deleted"] | (upserted - {row[0] for row in rows})
+    return next_cursor, rows, sorted(deleted), complete
+
+
+def fetch_by_id(table, ids):
+    if not ids:
+        return []
+    key = TRACKED_TABLES[table]
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM {table} WHERE {key} IN ({', '.join(['%s'] * len(ids))}) ORDER BY {key}",
+            list(ids)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+# ==========================
+# Retention
+# ==========================
+
+def prune(before_version):
+    """Delete log entries up to and including before_version; returns rows removed."""
+    removed = 0
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        while True:
+            # Bounded chunks keep each transaction (and its locks) short
+            cursor.execute(
+                "SELECT version FROM ChangeLog WHERE version <= %s ORDER BY version LIMIT %s",
+                (int(before_version), PRUNE_CHUNK)
+            )
+            versions = [row[0] for row in cursor.fetchall()]
+            if not versions:
+                break
+            cursor.execute(
+                "DELETE FROM ChangeLog WHERE version BETWEEN %s AND %s",
+                (versions[0], versions[-1])
+            )
+            removed += cursor.rowcount
+            conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return removed
+
+
+def prune_older_than(days=RETENTION_DAYS):
+    """Delete log entries older than `days` days; returns rows removed."""
+    cutoff = datetime.now() - timedelta(days=days)
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(version) FROM ChangeLog WHERE changed_at < %s", (cutoff,))
+        last = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        conn.close()
+    return prune(last) if last is not None else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or prune the RentalDB change log.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    since = commands.add_parser("since", help="list changes after a version")
+    since.add_argument("version", type=int)
+    since.add_argument("--table", action="append", choices=sorted(TRACKED_TABLES))
+    commands.add_parser("version", help="print the current version")
+    prune_cmd = commands.add_parser("prune", help="delete old change log entries")
+    prune_cmd.add_argument("--days", type=float, default=RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    if args.command == "version":
+        print(current_version())
+    elif args.command == "since":
+        changes, complete = changes_since(args.version, args.table)
+        for version, table, row_id, operation in changes:
+            print(f"{version:>10} {operation} {table}.{row_id}")
+        if not complete:
+            print("(incomplete: reload instead of applying these changes)")
+    else:
+        started = time.perf_counter()
+        removed = prune_older_than(args.days)
+        print(f"Removed {removed} entries in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
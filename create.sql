@@ -10,8 +10,15 @@ CREATE TABLE IF NOT EXISTS Customers (
     first_name  VARCHAR(50)  NOT NULL,
     last_name   VARCHAR(50)  NOT NULL,
     email       VARCHAR(100) NOT NULL,
-    phone       VARCHAR(15)
+    phone       VARCHAR(15),
     -- FD: customer_id -> first_name, last_name, email, phone
+    -- Exact / prefix search (see search.py)
+    INDEX idx_customers_first_name (first_name),
+    INDEX idx_customers_last_name (last_name),
+    INDEX idx_customers_email (email),
+    INDEX idx_customers_phone (phone),
+    -- Fuzzy (substring) search
+    FULLTEXT INDEX ft_customers_search (first_name, last_name, email, phone) WITH PARSER ngram
 );
 
 -- Cars table
@@ -19,8 +26,13 @@ CREATE TABLE IF NOT EXISTS Cars (
     car_id     INT AUTO_INCREMENT PRIMARY KEY,
     car_type   VARCHAR(50)   NOT NULL,
     car_color  VARCHAR(30)   NOT NULL,
-    car_price  DECIMAL(10,2) NOT NULL
+    car_price  DECIMAL(10,2) NOT NULL,
     -- FD: car_id -> car_type, car_color, car_price
+    -- Exact / prefix search (see search.py)
+    INDEX idx_cars_type (car_type),
+    INDEX idx_cars_color (car_color),
+    -- Fuzzy (substring) search
+    FULLTEXT INDEX ft_cars_search (car_type, car_color) WITH PARSER ngram
 );
 
 -- Rentals table
@@ -31,6 +43,10 @@ CREATE TABLE IF NOT EXISTS Rentals (
     rental_start_date DATE NOT NULL,
     rental_end_date   DATE NOT NULL,
     -- FD: rental_id -> customer_id, car_id, rental_start_date, rental_end_date
+    -- Supports the date-range filter and date sort in the rentals view
+    INDEX idx_rentals_start_date (rental_start_date),
+    -- Covers overlap checks for one car (availability.py SQL fallback)
+    INDEX idx_rentals_car_dates (car_id, rental_start_date, rental_end_date),
     CONSTRAINT fk_rentals_customer
         FOREIGN KEY (customer_id) REFERENCES Customers(customer_id)
         ON DELETE CASCADE,
@@ -44,10 +60,15 @@ CREATE TABLE IF NOT EXISTS Invoices (
     invoice_id     INT AUTO_INCREMENT PRIMARY KEY,
     rental_id      INT NOT NULL,
     invoice_amount DECIMAL(10,2) NOT NULL,
-    -- FD: invoice_id -> rental_id, invoice_amount
+    -- Running total of the invoice's payments, kept by trg_payment_*
+    amount_paid    DECIMAL(12,2) NOT NULL DEFAULT 0,
+    balance        DECIMAL(12,2) AS (invoice_amount - amount_paid) STORED,
+    -- FD: invoice_id -> rental_id, invoice_amount, amount_paid
     CONSTRAINT fk_invoices_rental
         FOREIGN KEY (rental_id) REFERENCES Rentals(rental_id)
-        ON DELETE CASCADE
+        ON DELETE CASCADE,
+    -- Covers the unpaid-invoices list (balance > 0) without touching rows
+    INDEX idx_invoices_balance (balance, rental_id, invoice_amount, amount_paid)
 );
 
 -- Payments table (5th table)
@@ -60,12 +81,89 @@ CREATE TABLE IF NOT EXISTS Payments (
     -- FD: payment_id -> invoice_id, payment_date, amount, payment_method
     CONSTRAINT fk_payments_invoice
         FOREIGN KEY (invoice_id) REFERENCES Invoices(invoice_id)
-        ON DELETE CASCADE
+        ON DELETE CASCADE,
+    -- Also serves as the foreign key's index
+    INDEX idx_payments_invoice_date (invoice_id, payment_date)
 );
 
+-- ================= UPGRADING AN EXISTING RentalDB =================
+-- CREATE TABLE IF NOT EXISTS leaves a table made by an earlier version
+-- of this script as it was, so the columns and indexes added since are
+-- added here when missing. Every trigger and procedure is dropped and
+-- re-created, and the CALL at the end backfills Invoices.amount_paid and
+-- the summary tables, so re-running the whole script upgrades an
+-- existing database in place.
+
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS sp_add_column//
+CREATE PROCEDURE sp_add_column(p_table VARCHAR(64), p_column VARCHAR(64), p_definition TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+         WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND COLUMN_NAME = p_column
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_table, ' ADD COLUMN ', p_column, ' ', p_definition);
+        PREPARE ddl FROM @ddl;
+        EXECUTE ddl;
+        DEALLOCATE PREPARE ddl;
+    END IF;
+END;
+//
+
+DROP PROCEDURE IF EXISTS sp_add_index//
+CREATE PROCEDURE sp_add_index(p_table VARCHAR(64), p_index VARCHAR(64), p_definition TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+         WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND INDEX_NAME = p_index
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE ', p_table, ' ADD ', p_definition);
+        PREPARE ddl FROM @ddl;
+        EXECUTE ddl;
+        DEALLOCATE PREPARE ddl;
+    END IF;
+END;
+//
+
+DELIMITER ;
+
+-- Search indexes
+CALL sp_add_index('Customers', 'idx_customers_first_name', 'INDEX idx_customers_first_name (first_name)');
+CALL sp_add_index('Customers', 'idx_customers_last_name', 'INDEX idx_customers_last_name (last_name)');
+CALL sp_add_index('Customers', 'idx_customers_email', 'INDEX idx_customers_email (email)');
+CALL sp_add_index('Customers', 'idx_customers_phone', 'INDEX idx_customers_phone (phone)');
+CALL sp_add_index('Customers', 'ft_customers_search',
+    'FULLTEXT INDEX ft_customers_search (first_name, last_name, email, phone) WITH PARSER ngram');
+CALL sp_add_index('Cars', 'idx_cars_type', 'INDEX idx_cars_type (car_type)');
+CALL sp_add_index('Cars', 'idx_cars_color', 'INDEX idx_cars_color (car_color)');
+CALL sp_add_index('Cars', 'ft_cars_search',
+    'FULLTEXT INDEX ft_cars_search (car_type, car_color) WITH PARSER ngram');
+
+-- Rentals view and availability
+CALL sp_add_index('Rentals', 'idx_rentals_start_date', 'INDEX idx_rentals_start_date (rental_start_date)');
+CALL sp_add_index('Rentals', 'idx_rentals_car_dates',
+    'INDEX idx_rentals_car_dates (car_id, rental_start_date, rental_end_date)');
+
+-- Invoice balances and payments
+CALL sp_add_column('Invoices', 'amount_paid', 'DECIMAL(12,2) NOT NULL DEFAULT 0 AFTER invoice_amount');
+CALL sp_add_column('Invoices', 'balance',
+    'DECIMAL(12,2) AS (invoice_amount - amount_paid) STORED AFTER amount_paid');
+CALL sp_add_index('Invoices', 'idx_invoices_balance',
+    'INDEX idx_invoices_balance (balance, rental_id, invoice_amount, amount_paid)');
+CALL sp_add_index('Payments', 'idx_payments_invoice_date',
+    'INDEX idx_payments_invoice_date (invoice_id, payment_date)');
+
+-- The per-invoice payment totals amount_paid replaced
+DROP TRIGGER IF EXISTS trg_summary_payment_insert;
+DROP TRIGGER IF EXISTS trg_summary_payment_update;
+DROP TRIGGER IF EXISTS trg_summary_payment_delete;
+DROP TABLE IF EXISTS InvoicePaymentSummary;
+
 -- Trigger to auto-generate invoice after inserting a rental
 DELIMITER //
 
+DROP TRIGGER IF EXISTS trg_after_rental_insert//
 CREATE TRIGGER trg_after_rental_insert
 AFTER INSERT ON Rentals
 FOR EACH ROW
@@ -80,7 +178,7 @@ BEGIN
       FROM Cars
      WHERE car_id = NEW.car_id;
 
-    -- Calculate number of days (at least 1 day)
+    -- Calculate number of days (at least 1 day, the rule pricing.py uses)
     SET num_days = DATEDIFF(NEW.rental_end_date, NEW.rental_start_date);
     IF num_days <= 0 THEN
         SET num_days = 1;
@@ -96,3 +194,850 @@ END;
 //
 
 DELIMITER ;
+
+-- ================= REPORT SUMMARY TABLES =================
+-- Incrementally maintained aggregates behind the Reports tab, so report
+-- cost depends on the number of cars/customers/invoices rather than on
+-- the size of the rental and payment history.
+-- Note: rows removed by ON DELETE CASCADE do not fire triggers, so the
+-- parent tables' BEFORE DELETE triggers account for their children.
+
+CREATE TABLE IF NOT EXISTS CarRentalSummary (
+    car_id         INT PRIMARY KEY,
+    rental_count   INT           NOT NULL DEFAULT 0,
+    total_earnings DECIMAL(12,2) NOT NULL DEFAULT 0,
+    CONSTRAINT fk_car_summary_car
+        FOREIGN KEY (car_id) REFERENCES Cars(car_id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS CustomerRentalSummary (
+    customer_id  INT PRIMARY KEY,
+    rental_count INT NOT NULL DEFAULT 0,
+    CONSTRAINT fk_customer_summary_customer
+        FOREIGN KEY (customer_id) REFERENCES Customers(customer_id)
+        ON DELETE CASCADE
+);
+
+DELIMITER //
+
+-- ----- Rentals -----
+
+DROP TRIGGER IF EXISTS trg_summary_rental_insert//
+CREATE TRIGGER trg_summary_rental_insert
+AFTER INSERT ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO CarRentalSummary (car_id, rental_count)
+    VALUES (NEW.car_id, 1)
+    ON DUPLICATE KEY UPDATE rental_count = rental_count + 1;
+
+    INSERT INTO CustomerRentalSummary (customer_id, rental_count)
+    VALUES (NEW.customer_id, 1)
+    ON DUPLICATE KEY UPDATE rental_count = rental_count + 1;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_summary_rental_update//
+CREATE TRIGGER trg_summary_rental_update
+AFTER UPDATE ON Rentals
+FOR EACH ROW
+BEGIN
+    DECLARE earned DECIMAL(12,2);
+
+    IF NEW.car_id <> OLD.car_id THEN
+        SELECT IFNULL(SUM(invoice_amount), 0)
+          INTO earned
+          FROM Invoices
+         WHERE rental_id = NEW.rental_id;
+
+        UPDATE CarRentalSummary
+           SET rental_count = rental_count - 1,
+               total_earnings = total_earnings - earned
+         WHERE car_id = OLD.car_id;
+
+        INSERT INTO CarRentalSummary (car_id, rental_count, total_earnings)
+        VALUES (NEW.car_id, 1, earned)
+        ON DUPLICATE KEY UPDATE rental_count = rental_count + 1,
+                                total_earnings = total_earnings + earned;
+    END IF;
+
+    IF NEW.customer_id <> OLD.customer_id THEN
+        UPDATE CustomerRentalSummary
+           SET rental_count = rental_count - 1
+         WHERE customer_id = OLD.customer_id;
+
+        INSERT INTO CustomerRentalSummary (customer_id, rental_count)
+        VALUES (NEW.customer_id, 1)
+        ON DUPLICATE KEY UPDATE rental_count = rental_count + 1;
+    END IF;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_summary_rental_delete//
+CREATE TRIGGER trg_summary_rental_delete
+BEFORE DELETE ON Rentals
+FOR EACH ROW
+BEGIN
+    DECLARE earned DECIMAL(12,2);
+
+    -- Archived rentals still count towards the totals (see archive.py)
+    IF @archiving IS NULL THEN
+        -- The rental's invoices are about to be removed by cascade
+        SELECT IFNULL(SUM(invoice_amount), 0)
+          INTO earned
+          FROM Invoices
+         WHERE rental_id = OLD.rental_id;
+
+        UPDATE CarRentalSummary
+           SET rental_count = rental_count - 1,
+               total_earnings = total_earnings - earned
+         WHERE car_id = OLD.car_id;
+
+        UPDATE CustomerRentalSummary
+           SET rental_count = rental_count - 1
+         WHERE customer_id = OLD.customer_id;
+    END IF;
+END;
+//
+
+-- ----- Invoices -----
+
+DROP TRIGGER IF EXISTS trg_summary_invoice_insert//
+CREATE TRIGGER trg_summary_invoice_insert
+AFTER INSERT ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO CarRentalSummary (car_id, total_earnings)
+    SELECT car_id, NEW.invoice_amount
+      FROM Rentals
+     WHERE rental_id = NEW.rental_id
+    ON DUPLICATE KEY UPDATE total_earnings = total_earnings + NEW.invoice_amount;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_summary_invoice_update//
+CREATE TRIGGER trg_summary_invoice_update
+AFTER UPDATE ON Invoices
+FOR EACH ROW
+BEGIN
+    IF NEW.invoice_amount <> OLD.invoice_amount OR NEW.rental_id <> OLD.rental_id THEN
+        UPDATE CarRentalSummary s
+          JOIN Rentals r ON r.car_id = s.car_id
+           SET s.total_earnings = s.total_earnings - OLD.invoice_amount
+         WHERE r.rental_id = OLD.rental_id;
+
+        UPDATE CarRentalSummary s
+          JOIN Rentals r ON r.car_id = s.car_id
+           SET s.total_earnings = s.total_earnings + NEW.invoice_amount
+         WHERE r.rental_id = NEW.rental_id;
+    END IF;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_summary_invoice_delete//
+CREATE TRIGGER trg_summary_invoice_delete
+AFTER DELETE ON Invoices
+FOR EACH ROW
+BEGIN
+    UPDATE CarRentalSummary s
+      JOIN Rentals r ON r.car_id = s.car_id
+       SET s.total_earnings = s.total_earnings - OLD.invoice_amount
+     WHERE r.rental_id = OLD.rental_id;
+END;
+//
+
+-- ----- Payments -----
+-- Invoices.amount_paid (and with it the generated balance) moves in the
+-- same transaction as the payment row itself.
+
+DROP TRIGGER IF EXISTS trg_payment_insert//
+CREATE TRIGGER trg_payment_insert
+AFTER INSERT ON Payments
+FOR EACH ROW
+BEGIN
+    UPDATE Invoices
+       SET amount_paid = amount_paid + NEW.amount
+     WHERE invoice_id = NEW.invoice_id;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_payment_update//
+CREATE TRIGGER trg_payment_update
+AFTER UPDATE ON Payments
+FOR EACH ROW
+BEGIN
+    IF NEW.amount <> OLD.amount OR NEW.invoice_id <> OLD.invoice_id THEN
+        UPDATE Invoices
+           SET amount_paid = amount_paid - OLD.amount
+         WHERE invoice_id = OLD.invoice_id;
+
+        UPDATE Invoices
+           SET amount_paid = amount_paid + NEW.amount
+         WHERE invoice_id = NEW.invoice_id;
+    END IF;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_payment_delete//
+CREATE TRIGGER trg_payment_delete
+AFTER DELETE ON Payments
+FOR EACH ROW
+BEGIN
+    UPDATE Invoices
+       SET amount_paid = amount_paid - OLD.amount
+     WHERE invoice_id = OLD.invoice_id;
+END;
+//
+
+-- ----- Cascading parent deletes -----
+
+DROP TRIGGER IF EXISTS trg_summary_customer_delete//
+CREATE TRIGGER trg_summary_customer_delete
+BEFORE DELETE ON Customers
+FOR EACH ROW
+BEGIN
+    -- Take this customer's rentals (and their invoices) out of the per-car totals
+    UPDATE CarRentalSummary s
+      JOIN (
+            SELECT r.car_id,
+                   COUNT(*) AS rentals,
+                   IFNULL(SUM(i.amount), 0) AS earned
+              FROM Rentals r
+              LEFT JOIN (
+                    SELECT rental_id, SUM(invoice_amount) AS amount
+                      FROM Invoices
+                     GROUP BY rental_id
+                   ) i ON i.rental_id = r.rental_id
+             WHERE r.customer_id = OLD.customer_id
+             GROUP BY r.car_id
+           ) d ON d.car_id = s.car_id
+       SET s.rental_count = s.rental_count - d.rentals,
+           s.total_earnings = s.total_earnings - d.earned;
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_summary_car_delete//
+CREATE TRIGGER trg_summary_car_delete
+BEFORE DELETE ON Cars
+FOR EACH ROW
+BEGIN
+    -- Take this car's rentals out of the per-customer counts
+    UPDATE CustomerRentalSummary s
+      JOIN (
+            SELECT customer_id, COUNT(*) AS rentals
+              FROM Rentals
+             WHERE car_id = OLD.car_id
+             GROUP BY customer_id
+           ) d ON d.customer_id = s.customer_id
+       SET s.rental_count = s.rental_count - d.rentals;
+END;
+//
+
+-- ----- Full rebuild -----
+
+DROP PROCEDURE IF EXISTS sp_rebuild_report_summaries//
+CREATE PROCEDURE sp_rebuild_report_summaries()
+BEGIN
+    START TRANSACTION;
+
+    -- The totals include the archive tier, which also has its own
+    DELETE FROM CarRentalSummary;
+    INSERT INTO CarRentalSummary (car_id, rental_count, total_earnings)
+    SELECT r.car_id,
+           COUNT(*),
+           IFNULL(SUM(i.amount), 0)
+      FROM (
+            SELECT rental_id, car_id FROM Rentals
+            UNION ALL
+            SELECT rental_id, car_id FROM RentalsArchive
+           ) r
+      LEFT JOIN (
+            SELECT rental_id, SUM(invoice_amount) AS amount
+              FROM (
+                    SELECT rental_id, invoice_amount FROM Invoices
+                    UNION ALL
+                    SELECT rental_id, invoice_amount FROM InvoicesArchive
+                   ) all_invoices
+             GROUP BY rental_id
+           ) i ON i.rental_id = r.rental_id
+     GROUP BY r.car_id;
+
+    DELETE FROM CustomerRentalSummary;
+    INSERT INTO CustomerRentalSummary (customer_id, rental_count)
+    SELECT customer_id, COUNT(*)
+      FROM (
+            SELECT customer_id FROM Rentals
+            UNION ALL
+            SELECT customer_id FROM RentalsArchive
+           ) r
+     GROUP BY customer_id;
+
+    DELETE FROM ArchiveCarSummary;
+    INSERT INTO ArchiveCarSummary (car_id, rental_count, total_earnings)
+    SELECT r.car_id, COUNT(*), IFNULL(SUM(i.amount), 0)
+      FROM RentalsArchive r
+      LEFT JOIN (
+            SELECT rental_id, SUM(invoice_amount) AS amount
+              FROM InvoicesArchive
+             GROUP BY rental_id
+           ) i ON i.rental_id = r.rental_id
+     GROUP BY r.car_id;
+
+    DELETE FROM ArchiveCustomerSummary;
+    INSERT INTO ArchiveCustomerSummary (customer_id, rental_count)
+    SELECT customer_id, COUNT(*)
+      FROM RentalsArchive
+     GROUP BY customer_id;
+
+    UPDATE Invoices i
+      LEFT JOIN (
+            SELECT invoice_id, SUM(amount) AS paid
+              FROM Payments
+             GROUP BY invoice_id
+           ) p ON p.invoice_id = i.invoice_id
+       SET i.amount_paid = IFNULL(p.paid, 0)
+     WHERE i.amount_paid <> IFNULL(p.paid, 0);
+
+    COMMIT;
+END;
+//
+
+DELIMITER ;
+
+-- ================= ARCHIVE TIER =================
+-- Closed, fully paid rentals are moved here with their invoices and
+-- payments by archive.py, so the hot tables above (and every query and
+-- index scan on them) only hold the active period. InnoDB cannot
+-- partition tables that have foreign keys or are referenced by them, so
+-- the hot tables stay unpartitioned; the archive tables carry no
+-- foreign keys and are range-partitioned by year and compressed.
+-- Partitions for new years are split off pmax by archive.py. Rows that
+-- are archived keep counting in the report summary tables: the archive
+-- job sets @archiving, which trg_summary_rental_delete skips on. The job
+-- also adds each chunk to ArchiveCarSummary / ArchiveCustomerSummary, so
+-- the active period's totals are the summaries minus these (reports.py).
+
+CREATE TABLE IF NOT EXISTS RentalsArchive (
+    rental_id         INT  NOT NULL,
+    customer_id       INT  NOT NULL,
+    car_id            INT  NOT NULL,
+    rental_start_date DATE NOT NULL,
+    rental_end_date   DATE NOT NULL,
+    -- The partitioning column must be part of every unique key
+    PRIMARY KEY (rental_id, rental_start_date),
+    INDEX idx_rentals_archive_customer (customer_id),
+    INDEX idx_rentals_archive_car (car_id, rental_start_date)
+) ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8
+PARTITION BY RANGE COLUMNS (rental_start_date) (
+    PARTITION pold  VALUES LESS THAN ('2023-01-01'),
+    PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+    PARTITION pmax  VALUES LESS THAN (MAXVALUE)
+);
+
+-- rental_start_date is copied from the rental so invoices partition
+-- (and prune) the same way
+CREATE TABLE IF NOT EXISTS InvoicesArchive (
+    invoice_id        INT           NOT NULL,
+    rental_id         INT           NOT NULL,
+    rental_start_date DATE          NOT NULL,
+    invoice_amount    DECIMAL(10,2) NOT NULL,
+    amount_paid       DECIMAL(12,2) NOT NULL,
+    balance           DECIMAL(12,2) NOT NULL,
+    PRIMARY KEY (invoice_id, rental_start_date),
+    INDEX idx_invoices_archive_rental (rental_id)
+) ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8
+PARTITION BY RANGE COLUMNS (rental_start_date) (
+    PARTITION pold  VALUES LESS THAN ('2023-01-01'),
+    PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+    PARTITION pmax  VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE IF NOT EXISTS ArchiveCarSummary (
+    car_id         INT           PRIMARY KEY,
+    rental_count   INT           NOT NULL DEFAULT 0,
+    total_earnings DECIMAL(12,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ArchiveCustomerSummary (
+    customer_id  INT PRIMARY KEY,
+    rental_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS PaymentsArchive (
+    payment_id     INT           NOT NULL,
+    invoice_id     INT           NOT NULL,
+    payment_date   DATE          NOT NULL,
+    amount         DECIMAL(10,2) NOT NULL,
+    payment_method VARCHAR(20)   NOT NULL,
+    PRIMARY KEY (payment_id, payment_date),
+    INDEX idx_payments_archive_invoice_date (invoice_id, payment_date)
+) ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8
+PARTITION BY RANGE COLUMNS (payment_date) (
+    PARTITION pold  VALUES LESS THAN ('2023-01-01'),
+    PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+    PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+    PARTITION pmax  VALUES LESS THAN (MAXVALUE)
+);
+
+-- ================= CHANGE LOG =================
+-- One row per inserted/updated/deleted row of the base tables, read by
+-- changefeed.py so open views can apply just the rows that changed.
+-- As with the summaries, ON DELETE CASCADE fires no triggers, so each
+-- parent's BEFORE DELETE trigger also logs the children it takes along.
+
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    version    BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(20)  NOT NULL,
+    row_id     INT          NOT NULL,
+    operation  CHAR(1)      NOT NULL,   -- I(nsert), U(pdate), D(elete)
+    changed_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_changelog_changed_at (changed_at)
+);
+
+DELIMITER //
+
+-- ----- Customers -----
+
+DROP TRIGGER IF EXISTS trg_changelog_customer_insert//
+CREATE TRIGGER trg_changelog_customer_insert
+AFTER INSERT ON Customers
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Customers', NEW.customer_id, 'I');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_customer_update//
+CREATE TRIGGER trg_changelog_customer_update
+AFTER UPDATE ON Customers
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Customers', NEW.customer_id, 'U');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_customer_delete//
+CREATE TRIGGER trg_changelog_customer_delete
+BEFORE DELETE ON Customers
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Payments', p.payment_id, 'D'
+      FROM Payments p
+      JOIN Invoices i ON i.invoice_id = p.invoice_id
+      JOIN Rentals r ON r.rental_id = i.rental_id
+     WHERE r.customer_id = OLD.customer_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Invoices', i.invoice_id, 'D'
+      FROM Invoices i
+      JOIN Rentals r ON r.rental_id = i.rental_id
+     WHERE r.customer_id = OLD.customer_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Rentals', rental_id, 'D'
+      FROM Rentals
+     WHERE customer_id = OLD.customer_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Customers', OLD.customer_id, 'D');
+END;
+//
+
+-- ----- Cars -----
+
+DROP TRIGGER IF EXISTS trg_changelog_car_insert//
+CREATE TRIGGER trg_changelog_car_insert
+AFTER INSERT ON Cars
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Cars', NEW.car_id, 'I');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_car_update//
+CREATE TRIGGER trg_changelog_car_update
+AFTER UPDATE ON Cars
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Cars', NEW.car_id, 'U');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_car_delete//
+CREATE TRIGGER trg_changelog_car_delete
+BEFORE DELETE ON Cars
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Payments', p.payment_id, 'D'
+      FROM Payments p
+      JOIN Invoices i ON i.invoice_id = p.invoice_id
+      JOIN Rentals r ON r.rental_id = i.rental_id
+     WHERE r.car_id = OLD.car_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Invoices', i.invoice_id, 'D'
+      FROM Invoices i
+      JOIN Rentals r ON r.rental_id = i.rental_id
+     WHERE r.car_id = OLD.car_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Rentals', rental_id, 'D'
+      FROM Rentals
+     WHERE car_id = OLD.car_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Cars', OLD.car_id, 'D');
+END;
+//
+
+-- ----- Rentals -----
+
+DROP TRIGGER IF EXISTS trg_changelog_rental_insert//
+CREATE TRIGGER trg_changelog_rental_insert
+AFTER INSERT ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Rentals', NEW.rental_id, 'I');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_rental_update//
+CREATE TRIGGER trg_changelog_rental_update
+AFTER UPDATE ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Rentals', NEW.rental_id, 'U');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_rental_delete//
+CREATE TRIGGER trg_changelog_rental_delete
+BEFORE DELETE ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Payments', p.payment_id, 'D'
+      FROM Payments p
+      JOIN Invoices i ON i.invoice_id = p.invoice_id
+     WHERE i.rental_id = OLD.rental_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Invoices', invoice_id, 'D'
+      FROM Invoices
+     WHERE rental_id = OLD.rental_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Rentals', OLD.rental_id, 'D');
+END;
+//
+
+-- ----- Invoices -----
+
+DROP TRIGGER IF EXISTS trg_changelog_invoice_insert//
+CREATE TRIGGER trg_changelog_invoice_insert
+AFTER INSERT ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Invoices', NEW.invoice_id, 'I');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_invoice_update//
+CREATE TRIGGER trg_changelog_invoice_update
+AFTER UPDATE ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Invoices', NEW.invoice_id, 'U');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_invoice_delete//
+CREATE TRIGGER trg_changelog_invoice_delete
+BEFORE DELETE ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    SELECT 'Payments', payment_id, 'D'
+      FROM Payments
+     WHERE invoice_id = OLD.invoice_id;
+
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Invoices', OLD.invoice_id, 'D');
+END;
+//
+
+-- ----- Payments -----
+
+DROP TRIGGER IF EXISTS trg_changelog_payment_insert//
+CREATE TRIGGER trg_changelog_payment_insert
+AFTER INSERT ON Payments
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Payments', NEW.payment_id, 'I');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_payment_update//
+CREATE TRIGGER trg_changelog_payment_update
+AFTER UPDATE ON Payments
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Payments', NEW.payment_id, 'U');
+END;
+//
+
+DROP TRIGGER IF EXISTS trg_changelog_payment_delete//
+CREATE TRIGGER trg_changelog_payment_delete
+AFTER DELETE ON Payments
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Payments', OLD.payment_id, 'D');
+END;
+//
+
+DELIMITER ;
+
+-- ================= BOOKING PROCEDURES =================
+-- Each procedure runs one whole write (checks, statements, transaction)
+-- on the server and returns a one-row summary, so the client makes a
+-- single CALL instead of a round trip per statement (see procedures.py).
+-- Validation failures SIGNAL SQLSTATE '45000' with the message the
+-- client shows. The client prices the rental with pricing.quote() and
+-- passes the total along with the car_price it used; the procedure
+-- stores that total as is (prices are rounded in one place, on the
+-- client) and SIGNALs 'Car price changed.' if the car_price it has
+-- locked differs, in which case the client re-reads it and retries.
+
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS sp_create_rental//
+CREATE PROCEDURE sp_create_rental(
+    IN p_customer_id INT,
+    IN p_car_id      INT,
+    IN p_start       DATE,
+    IN p_end         DATE,
+    IN p_car_price   DECIMAL(10,2),
+    IN p_total       DECIMAL(10,2)
+)
+BEGIN
+    DECLARE v_customer  VARCHAR(101);
+    DECLARE v_car_type  VARCHAR(50);
+    DECLARE v_price     DECIMAL(10,2);
+    DECLARE v_booked    TEXT;
+    DECLARE v_message   VARCHAR(255);
+    DECLARE v_rental_id INT;
+    DECLARE v_days      INT;
+    DECLARE v_total     DECIMAL(10,2);
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    SET TRANSACTION ISOLATION LEVEL READ COMMITTED;
+    START TRANSACTION;
+
+    SELECT CONCAT(first_name, ' ', last_name)
+      INTO v_customer
+      FROM Customers
+     WHERE customer_id = p_customer_id;
+    IF v_customer IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Customer not found.';
+    END IF;
+
+    -- Every booking of a car takes this row lock first, so concurrent
+    -- bookings of one car are serialised before the overlap check
+    SELECT car_type, car_price
+      INTO v_car_type, v_price
+      FROM Cars
+     WHERE car_id = p_car_id
+       FOR UPDATE;
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Car not found.';
+    END IF;
+    IF v_price <> p_car_price THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Car price changed.';
+    END IF;
+
+    SELECT GROUP_CONCAT(
+               CONCAT('#', rental_id, ' (', rental_start_date, ' to ',
+                      GREATEST(rental_end_date, rental_start_date + INTERVAL 1 DAY), ')')
+               ORDER BY rental_start_date SEPARATOR ', ')
+      INTO v_booked
+      FROM Rentals
+     WHERE car_id = p_car_id
+       AND rental_start_date < GREATEST(p_end, p_start + INTERVAL 1 DAY)
+       AND GREATEST(rental_end_date, rental_start_date + INTERVAL 1 DAY) > p_start;
+    IF v_booked IS NOT NULL THEN
+        SET v_message = LEFT(CONCAT('Car ', p_car_id, ' is already booked: ', v_booked), 255);
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = v_message;
+    END IF;
+
+    -- trg_after_rental_insert bills car_price * days
+    INSERT INTO Rentals (customer_id, car_id, rental_start_date, rental_end_date)
+    VALUES (p_customer_id, p_car_id, p_start, p_end);
+    SET v_rental_id = LAST_INSERT_ID();
+
+    SET v_days = GREATEST(DATEDIFF(p_end, p_start), 1);
+    SET v_total = p_total;
+    IF v_total <> v_price * v_days THEN
+        UPDATE Invoices SET invoice_amount = v_total WHERE rental_id = v_rental_id;
+    END IF;
+
+    COMMIT;
+
+    SELECT v_rental_id AS rental_id,
+           v_customer  AS customer_name,
+           v_car_type  AS car_type,
+           v_days      AS days,
+           v_total     AS total;
+END;
+//
+
+DROP PROCEDURE IF EXISTS sp_update_rental//
+CREATE PROCEDURE sp_update_rental(
+    IN p_rental_id INT,
+    IN p_start     DATE,
+    IN p_end       DATE,
+    IN p_car_price DECIMAL(10,2),
+    IN p_total     DECIMAL(10,2)
+)
+BEGIN
+    DECLARE v_car_id  INT;
+    DECLARE v_price   DECIMAL(10,2);
+    DECLARE v_booked  TEXT;
+    DECLARE v_message VARCHAR(255);
+    DECLARE v_days    INT;
+    DECLARE v_total   DECIMAL(10,2);
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    SET TRANSACTION ISOLATION LEVEL READ COMMITTED;
+    START TRANSACTION;
+
+    SELECT car_id INTO v_car_id FROM Rentals WHERE rental_id = p_rental_id;
+    IF v_car_id IS NOT NULL THEN
+        SELECT car_price INTO v_price FROM Cars WHERE car_id = v_car_id FOR UPDATE;
+    END IF;
+    IF v_price IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Rental or car not found.';
+    END IF;
+    IF v_price <> p_car_price THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Car price changed.';
+    END IF;
+
+    SELECT GROUP_CONCAT(
+               CONCAT('#', rental_id, ' (', rental_start_date, ' to ',
+                      GREATEST(rental_end_date, rental_start_date + INTERVAL 1 DAY), ')')
+               ORDER BY rental_start_date SEPARATOR ', ')
+      INTO v_booked
+      FROM Rentals
+     WHERE car_id = v_car_id
+       AND rental_id <> p_rental_id
+       AND rental_start_date < GREATEST(p_end, p_start + INTERVAL 1 DAY)
+       AND GREATEST(rental_end_date, rental_start_date + INTERVAL 1 DAY) > p_start;
+    IF v_booked IS NOT NULL THEN
+        SET v_message = LEFT(CONCAT('Car ', v_car_id, ' is already booked: ', v_booked), 255);
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = v_message;
+    END IF;
+
+    UPDATE Rentals
+       SET rental_start_date = p_start, rental_end_date = p_end
+     WHERE rental_id = p_rental_id;
+
+    SET v_days = GREATEST(DATEDIFF(p_end, p_start), 1);
+    SET v_total = p_total;
+    UPDATE Invoices SET invoice_amount = v_total WHERE rental_id = p_rental_id;
+
+    COMMIT;
+
+    SELECT p_rental_id AS rental_id,
+           v_car_id    AS car_id,
+           v_days      AS days,
+           v_total     AS total;
+END;
+//
+
+DROP PROCEDURE IF EXISTS sp_record_payment//
+CREATE PROCEDURE sp_record_payment(
+    IN p_invoice_id INT,
+    IN p_amount     DECIMAL(10,2),
+    IN p_method     VARCHAR(20),
+    IN p_date       DATE
+)
+BEGIN
+    DECLARE v_invoice_amount DECIMAL(10,2);
+    DECLARE v_payment_id     INT;
+    DECLARE v_paid           DECIMAL(12,2);
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    IF p_amount IS NULL OR p_amount <= 0 THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Payment amount must be positive.';
+    END IF;
+
+    START TRANSACTION;
+
+    -- Serialises payments against one invoice
+    SELECT invoice_amount
+      INTO v_invoice_amount
+      FROM Invoices
+     WHERE invoice_id = p_invoice_id
+       FOR UPDATE;
+    IF v_invoice_amount IS NULL THEN
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Invoice not found.';
+    END IF;
+
+    INSERT INTO Payments (invoice_id, payment_date, amount, payment_method)
+    VALUES (p_invoice_id, IFNULL(p_date, CURDATE()), p_amount, p_method);
+    SET v_payment_id = LAST_INSERT_ID();
+
+    -- trg_payment_insert has already added the amount
+    SELECT amount_paid
+      INTO v_paid
+      FROM Invoices
+     WHERE invoice_id = p_invoice_id;
+
+    COMMIT;
+
+    SELECT v_payment_id                AS payment_id,
+           p_invoice_id                AS invoice_id,
+           v_invoice_amount            AS invoice_amount,
+           v_paid                      AS total_paid,
+           v_invoice_amount - v_paid   AS balance;
+END;
+//
+
+DELIMITER ;
+
+-- Fill amount_paid and the summary tables of an upgraded database (a
+-- no-op on a new one); see UPGRADING AN EXISTING RentalDB above
+CALL sp_rebuild_report_summaries();
@@ -0,0 +1,299 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+from backends import BACKEND, SQLITE_PATH, create_backend
+from instrumentation import InstrumentedCursor, record_connect
+
+
+# ==========================
+# Connection Settings
+# ==========================
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "Toor",
+    "database": "RentalDB"
+}
+
+POOL_SIZE = 5            # maximum number of open connections
+POOL_TIMEOUT = 10.0      # seconds to wait for a free connection
+MAX_IDLE_SECONDS = 300   # recycle connections idle longer than this
+
+
+# ==========================
+# Pooled Connection Wrapper
+# ==========================
+
+class PooledConnection:
+    """Proxy around a real connection whose close() returns it to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._checked_out_at = time.perf_counter()
+        self._closed = False
+
+    def close(self):
+        """Hand the connection back to the pool instead of closing it."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.release(self._raw, time.perf_counter() - self._checked_out_at)
+
+    def cursor(self, *args, **kwargs):
+        """A cursor on the real connection, timed by the instrumentation layer."""
+        return InstrumentedCursor(self.__getattr__("cursor")(*args, **kwargs))
+
+    def statement(self, name):
+        """This connection's server-side prepared cursor for statement `name`.
+
+        The cursor is created on first use and kept with the connection,
+        so the statement is parsed once per connection rather than once
+        per call (see statements.py). Do not close it.
+        """
+        if self._closed:
+            raise mysql.connector.errors.OperationalError(
+                "Connection already returned to the pool"
+            )
+        return self._pool.statement_cursor(self._raw, name)
+
+    def __del__(self):
+        # Handlers that hit an exception before conn.close() would otherwise
+        # leak their slot and eventually exhaust the pool.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        if self._closed:
+            raise mysql.connector.errors.OperationalError(
+                "Connection already returned to the pool"
+            )
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# ==========================
+# Connection Pool
+# ==========================
+
+class ConnectionPool:
+    """Fixed-size pool of warm connections with health checks and stats."""
+
+    def __init__(self, factory, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 max_idle=MAX_IDLE_SECONDS):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+
+        self._idle = deque()      # (raw_connection, returned_at)
+        self._open = 0
+        self._statements = {}     # id(raw_connection) -> {statement name: cursor}
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.stats = {
+            "checkouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "hold_time_total": 0.0,
+            "hold_time_max": 0.0
+        }
+
+    def get_connection(self):
+        """Check out a healthy connection, waiting up to `timeout` seconds."""
+        started = time.perf_counter()
+        deadline = started + self.timeout
+
+        while True:
+            raw = None
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    if self._closed:
+                        raise mysql.connector.errors.PoolError("Connection pool is closed")
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise mysql.connector.errors.PoolError(
+                            f"No connection available within {self.timeout}s "
+                            f"(pool size {self.size})"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    raw, returned_at = self._idle.popleft()
+                    if time.perf_counter() - returned_at > self.max_idle:
+                        self.stats["recycled"] += 1
+                        self._discard(raw)
+                        raw = None
+                if raw is None:
+                    self._open += 1  # reserve a slot for a new connection
+
+            if raw is None:
+                try:
+                    raw = self.factory()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.stats["created"] += 1
+            elif not self._is_healthy(raw):
+                with self._cond:
+                    self.stats["failed_health_checks"] += 1
+                    self._discard(raw)
+                continue
+
+            waited = time.perf_counter() - started
+            with self._cond:
+                self.stats["checkouts"] += 1
+                self.stats["wait_time_total"] += waited
+                self.stats["wait_time_max"] = max(self.stats["wait_time_max"], waited)
+            return PooledConnection(self, raw)
+
+    def statement_cursor(self, raw, name):
+        """The prepared cursor for statement `name` on raw, created on first use."""
+        with self._cond:
+            cursors = self._statements.setdefault(id(raw), {})
+            cursor = cursors.get(name)
+        if cursor is None:
+            cursor = InstrumentedCursor(raw.cursor(prepared=True), statement=name)
+            with self._cond:
+                cursors[name] = cursor
+        return cursor
+
+    def release(self, raw, held_for):
+        """Return a connection to the idle queue, rolling back open work."""
+        healthy = True
+        try:
+            # Error paths in the handlers return without rollback; make sure
+            # no locks or half-finished transactions leak to the next user.
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self.stats["hold_time_total"] += held_for
+            self.stats["hold_time_max"] = max(self.stats["hold_time_max"], held_for)
+            if healthy and not self._closed:
+                self._idle.append((raw, time.perf_counter()))
+            else:
+                self._discard(raw)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._cond:
+            while self._idle:
+                raw, _ = self._idle.popleft()
+                self._discard(raw)
+            self._closed = True
+            self.size = 0
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Return a copy of the pool statistics plus current occupancy."""
+        with self._cond:
+            data = dict(self.stats)
+            data["open"] = self._open
+            data["idle"] = len(self._idle)
+            data["in_use"] = self._open - len(self._idle)
+        checkouts = data["checkouts"] or 1
+        data["wait_time_avg"] = data["wait_time_total"] / checkouts
+        data["hold_time_avg"] = data["hold_time_total"] / checkouts
+        return data
+
+    def _is_healthy(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, raw):
+        # Caller holds self._cond.
+        self._open -= 1
+        self._statements.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+# ==========================
+# Module-level Pool
+# ==========================
+
+_pool = None
+_pool_lock = threading.Lock()
+_backend = None
+
+
+def get_backend():
+    """Return the storage backend new connections come from (see backends.py)."""
+    global _backend
+    with _pool_lock:
+        if _backend is None:
+            _backend = create_backend(BACKEND, DB_CONFIG, SQLITE_PATH)
+        return _backend
+
+
+def use_backend(name, sqlite_path=SQLITE_PATH):
+    """Switch to another storage backend, replacing the shared pool."""
+    global _backend, _pool
+    backend = create_backend(name, DB_CONFIG, sqlite_path)
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+        _backend = backend
+    return backend
+
+
+def get_pool():
+    """Return the shared pool, creating it on first use."""
+    global _pool
+    backend = get_backend()
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(backend.connect)
+        return _pool
+
+
+def configure_pool(size=POOL_SIZE, timeout=POOL_TIMEOUT, max_idle=MAX_IDLE_SECONDS):
+    """Replace the shared pool with one using the given settings."""
+    global _pool
+    backend = get_backend()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(
+            backend.connect,
+            size=size,
+            timeout=timeout,
+            max_idle=max_idle
+        )
+        return _pool
+
+
+def connect_db():
+    """Check out a pooled database connection; close() returns it to the pool."""
+    started = time.perf_counter()
+    conn = get_pool().get_connection()
+    record_connect(time.perf_counter() - started)
+    return conn
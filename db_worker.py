@@ -0,0 +1,126 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import current_handler, handler_scope
+
+
+# ==========================
+# Background Database Worker
+# ==========================
+
+WORKER_THREADS = 4     # keep at or below db_pool.POOL_SIZE
+POLL_INTERVAL_MS = 30  # how often the Tk loop drains finished jobs
+
+
+class DbWorker:
+    """Run database calls on a thread pool and deliver results on the Tk loop.
+
+    Tkinter widgets may only be touched from the main thread, so jobs run
+    plain functions in the background and their results are queued; the
+    UI drains that queue with root.after() and calls the callbacks there.
+    Jobs submitted with a key supersede any earlier job with the same key:
+    the older one is cancelled if it has not started, and its result is
+    dropped if it has.
+    """
+
+    def __init__(self, root, threads=WORKER_THREADS, on_busy_change=None):
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads,
+            thread_name_prefix="db-worker"
+        )
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._latest = {}      # key -> (generation, future)
+        self._generation = 0
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, fn, *args, key=None, on_success=None, on_error=None):
+        """Queue fn(*args) in the background; callbacks run on the UI thread."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if key is not None and key in self._latest:
+                _, previous = self._latest[key]
+                if previous.cancel():
+                    self._pending -= 1
+
+            self._pending += 1
+            future = self._executor.submit(
+                self._run, key, generation, fn, args, on_success, on_error,
+                current_handler() or getattr(fn, "__name__", "-")
+            )
+            if key is not None:
+                self._latest[key] = (generation, future)
+
+        self._busy_changed()
+        self._ensure_polling()
+        return future
+
+    def cancel(self, key):
+        """Cancel (or discard the result of) the latest job for key."""
+        with self._lock:
+            entry = self._latest.pop(key, None)
+            if entry and entry[1].cancel():
+                self._pending -= 1
+        self._busy_changed()
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, key, generation, fn, args, on_success, on_error, handler):
+        try:
+            with handler_scope(handler):
+                result = fn(*args)
+        except Exception as e:
+            self._results.put((key, generation, on_error, e))
+        else:
+            self._results.put((key, generation, on_success, result))
+
+    def _is_current(self, key, generation):
+        if key is None:
+            return True
+        with self._lock:
+            entry = self._latest.get(key)
+            if entry and entry[0] == generation:
+                del self._latest[key]
+                return True
+            return False
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                key, generation, callback, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                self._pending -= 1
+            if self._is_current(key, generation) and callback is not None:
+                try:
+                    callback(payload)
+                except Exception as e:
+                    # Never let one bad callback stop the poll loop.
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+            self._busy_changed()
+
+        if self._pending > 0:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _busy_changed(self):
+        if self.on_busy_change is not None:
+            self.on_busy_change(self._pending)
@@ -0,0 +1,279 @@
+import argparse
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import sys
+import time
+
+from mysql.connector import FieldType
+
+from db_pool import connect_db
+from reports import ARCHIVE_TABLES, BASE_TABLES, REPORT_QUERIES, report_query, with_archive
+
+
+# ==========================
+# Streaming Export
+# ==========================
+# Rows are read with an unbuffered cursor (MySQL streams the result set
+# instead of materialising it client-side) in CHUNK_SIZE batches and
+# written out incrementally, so memory stays bounded by one chunk.
+
+CHUNK_SIZE = 10000
+
+FORMATS = ["csv", "parquet", "arrow"]
+COMPRESSIONS = ["none", "gzip", "zstd"]
+
+
+def export_sources():
+    """Every exportable name: the report queries plus the base tables."""
+    names = list(REPORT_QUERIES)
+    names += [table for table in BASE_TABLES if table not in names]
+    return names
+
+
+def source_query(name, include_archive=False):
+    if name in REPORT_QUERIES:
+        return report_query(name, include_archive)
+    if name in BASE_TABLES:
+        if include_archive and name in ARCHIVE_TABLES:
+            return with_archive(name)
+        return f"SELECT * FROM {name}"
+    raise ValueError(f"Unknown report or table {name!r}")
+
+
+def detect_format(path):
+    """Guess (format, compression) from a file name."""
+    name = path.lower()
+    compression = "none"
+    if name.endswith(".gz"):
+        compression, name = "gzip", name[:-3]
+    elif name.endswith(".zst"):
+        compression, name = "zstd", name[:-4]
+
+    if name.endswith(".parquet"):
+        return "parquet", compression
+    if name.endswith(".arrow") or name.endswith(".feather"):
+        return "arrow", compression
+    return "csv", compression
+
+
+# ==========================
+# Writers
+# ==========================
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise RuntimeError(
+            "Parquet/Arrow export needs pyarrow (pip install pyarrow)"
+        ) from None
+
+
+def _open_compressed(path, compression):
+    """Open a binary output stream with optional gzip/zstd compression."""
+    if compression == "gzip":
+        return gzip.open(path, "wb")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(
+                "zstd compression needs zstandard (pip install zstandard)"
+            ) from None
+        raw = open(path, "wb")
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return open(path, "wb")
+
+
+class CsvWriter:
+    def __init__(self, path, columns, compression):
+        self._binary = _open_compressed(path, compression)
+        self._text = io.TextIOWrapper(self._binary, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._text.close()
+
+
+def _sample_type(sample_rows, i):
+    """FieldType for column i judged from its first non-NULL sample value."""
+    for row in sample_rows:
+        value = row[i]
+        if value is None:
+            continue
+        if isinstance(value, bool) or isinstance(value, int):
+            return FieldType.LONGLONG
+        if isinstance(value, float):
+            return FieldType.DOUBLE
+        if isinstance(value, decimal.Decimal):
+            return FieldType.NEWDECIMAL
+        if isinstance(value, datetime.datetime):
+            return FieldType.DATETIME
+        if isinstance(value, datetime.date):
+            return FieldType.DATE
+        return None
+    return None
+
+
+def arrow_schema(pa, description, sample_rows):
+    """Build an Arrow schema from cursor.description (+ first chunk for scales)."""
+    fields = []
+    for i, desc in enumerate(description):
+        name, type_code = desc[0], desc[1]
+        if type_code is None:
+            # SQLite cursors do not report column types
+            type_code = _sample_type(sample_rows, i)
+        if type_code in (FieldType.TINY, FieldType.SHORT, FieldType.LONG,
+                         FieldType.LONGLONG, FieldType.INT24, FieldType.YEAR):
+            arrow_type = pa.int64()
+        elif type_code in (FieldType.FLOAT, FieldType.DOUBLE):
+            arrow_type = pa.float64()
+        elif type_code in (FieldType.DECIMAL, FieldType.NEWDECIMAL):
+            scale = 2
+            for row in sample_rows:
+                if isinstance(row[i], decimal.Decimal):
+                    scale = max(-row[i].as_tuple().exponent, 0)
+                    break
+            arrow_type = pa.decimal128(38, scale)
+        elif type_code in (FieldType.DATE, FieldType.NEWDATE):
+            arrow_type = pa.date32()
+        elif type_code in (FieldType.DATETIME, FieldType.TIMESTAMP):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+class ArrowWriter:
+    """Writes record batches to Parquet or an Arrow IPC file."""
+
+    def __init__(self, path, description, first_rows, fmt, compression):
+        self.pa = _require_pyarrow()
+        self.schema = arrow_schema(self.pa, description, first_rows)
+        codec = None if compression == "none" else compression
+
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression=codec or "none")
+        else:
+            import pyarrow.ipc as ipc
+            options = ipc.IpcWriteOptions(compression="zstd" if codec else None)
+            self._sink = self.pa.OSFile(path, "wb")
+            self._writer = ipc.new_file(self._sink, self.schema, options=options)
+
+    def write(self, rows):
+        columns = list(zip(*rows)) if rows else [[] for _ in self.schema]
+        arrays = []
+        for values, field in zip(columns, self.schema):
+            if field.type == self.pa.string():
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(self.pa.array(list(values), type=field.type))
+        batch = self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+
+
+# ==========================
+# Export Driver
+# ==========================
+
+def export_query(query, path, fmt=None, compression=None, chunk_size=CHUNK_SIZE,
+                 params=(), progress=None):
+    """Stream the result of query into path; return (rows, seconds)."""
+    detected_fmt, detected_compression = detect_format(path)
+    fmt = fmt or detected_fmt
+    compression = compression or detected_compression
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}")
+
+    started = time.perf_counter()
+    written = 0
+    writer = None
+    conn = connect_db()
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(query, params)
+        columns = [desc[0] for desc in cursor.description]
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if writer is None:
+                if fmt == "csv":
+                    writer = CsvWriter(path, columns, compression)
+                else:
+                    writer = ArrowWriter(path, cursor.description, rows, fmt, compression)
+            if not rows:
+                break
+            writer.write(rows)
+            written += len(rows)
+            if progress is not None:
+                progress(written)
+
+        cursor.close()
+    finally:
+        if writer is not None:
+            writer.close()
+        conn.close()
+
+    return written, time.perf_counter() - started
+
+
+def export_source(name, path, include_archive=False, **kwargs):
+    """Export a report (by its Reports-tab label) or a base table.
+
+    include_archive adds the archived rows (see reports.ARCHIVE_TABLES).
+    """
+    return export_query(source_query(name, include_archive), path, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Stream a RentalDB report or table to CSV, Parquet or Arrow."
+    )
+    parser.add_argument("source", nargs="?", help="report label or table name")
+    parser.add_argument("path", nargs="?", help="output file; format follows the extension")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--compression", choices=COMPRESSIONS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--include-archive", action="store_true",
+                        help="add the archived rentals, invoices and payments")
+    parser.add_argument("--list", action="store_true", help="list exportable sources")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.source:
+        for name in export_sources():
+            print(name)
+        return 0
+    if not args.path:
+        parser.error("an output path is required")
+
+    rows, seconds = export_source(
+        args.source,
+        args.path,
+        include_archive=args.include_archive,
+        fmt=args.format,
+        compression=args.compression,
+        chunk_size=args.chunk_size,
+        progress=lambda n: print(f"  {n} rows", file=sys.stderr)
+    )
+    print(f"Exported {rows} rows to {args.path} in {seconds:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
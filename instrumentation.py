@@ -0,0 +1,300 @@
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+
+# ==========================
+# Query Instrumentation
+# ==========================
+# Every pooled connection hands out InstrumentedCursor objects (see
+# db_pool.PooledConnection.cursor), which time execute and fetch calls
+# and count rows. Each statement is attributed to the handler that caused
+# it: the UI handler decorated with @handler, carried over to the worker
+# thread by DbWorker, or the job function's own name. Cursors for named
+# statements (statements.py) are also counted per statement.
+
+SLOW_QUERY_MS = float(os.environ.get("RENTALDB_SLOW_MS", 200))
+SLOW_LOG_PATH = os.environ.get("RENTALDB_SLOW_LOG", "slow_queries.log")
+SLOW_LOG_MAX_BYTES = 5 * 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended
+HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+_local = threading.local()
+
+
+# ----- handler attribution -----
+
+def current_handler():
+    return getattr(_local, "handler", None)
+
+
+@contextmanager
+def handler_scope(name):
+    """Attribute the queries run inside the block to handler `name`."""
+    previous = current_handler()
+    _local.handler = name
+    try:
+        yield
+    finally:
+        _local.handler = previous
+
+
+def handler(fn):
+    """Decorator: queries caused by fn (directly or via DbWorker) are reported under its name."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if current_handler() is not None:
+            return fn(*args, **kwargs)
+        with handler_scope(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ----- statistics -----
+
+class QueryStats:
+    """Per-handler counters and latency histograms for connects and statements."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = {}
+
+    def _entry(self, name):
+        entry = self._handlers.get(name)
+        if entry is None:
+            entry = self._handlers[name] = {
+                "queries": 0, "rows": 0, "slow": 0,
+                "connects": 0, "connect_seconds": 0.0,
+                "execute_seconds": 0.0, "fetch_seconds": 0.0, "max_seconds": 0.0,
+                "histogram": [0] * (len(HISTOGRAM_BOUNDS) + 1)
+            }
+        return entry
+
+    def record_connect(self, name, seconds):
+        with self._lock:
+            entry = self._entry(name)
+            entry["connects"] += 1
+            entry["connect_seconds"] += seconds
+
+    def record_query(self, name, execute_seconds, fetch_seconds, rows, slow):
+        total_ms = (execute_seconds + fetch_seconds) * 1000
+        bucket = len(HISTOGRAM_BOUNDS)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if total_ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            entry = self._entry(name)
+            entry["queries"] += 1
+            entry["rows"] += rows
+            entry["slow"] += slow
+            entry["execute_seconds"] += execute_seconds
+            entry["fetch_seconds"] += fetch_seconds
+            entry["max_seconds"] = max(entry["max_seconds"], total_ms / 1000)
+            entry["histogram"][bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(entry, histogram=list(entry["histogram"]))
+                for name, entry in self._handlers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._handlers.clear()
+
+
+query_stats = QueryStats()        # per handler
+statement_stats = QueryStats()    # per registered statement name
+
+
+def percentile(histogram, fraction):
+    """Upper bound (ms) of the bucket holding the given fraction of samples."""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= fraction * total:
+            return HISTOGRAM_BOUNDS[i] if i < len(HISTOGRAM_BOUNDS) else float("inf")
+    return float("inf")
+
+
+def summary(stats=query_stats, key="handler"):
+    """One row per handler (or per statement) for display: counts, average/percentile timings in ms."""
+    rows = []
+    for name, entry in sorted(stats.snapshot().items()):
+        queries = entry["queries"] or 1
+        rows.append({
+            key: name,
+            "queries": entry["queries"],
+            "rows": entry["rows"],
+            "slow": entry["slow"],
+            "avg_connect_ms": entry["connect_seconds"] * 1000 / (entry["connects"] or 1),
+            "avg_execute_ms": entry["execute_seconds"] * 1000 / queries,
+            "avg_fetch_ms": entry["fetch_seconds"] * 1000 / queries,
+            "p50_ms": percentile(entry["histogram"], 0.5),
+            "p95_ms": percentile(entry["histogram"], 0.95),
+            "max_ms": entry["max_seconds"] * 1000
+        })
+    return rows
+
+
+# ----- slow query log -----
+
+_slow_logger = None
+_slow_logger_lock = threading.Lock()
+
+
+def slow_log():
+    """The rotating slow-query logger, created on first use."""
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            logger = logging.getLogger("rentaldb.slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            file_handler = RotatingFileHandler(
+                SLOW_LOG_PATH,
+                maxBytes=SLOW_LOG_MAX_BYTES,
+                backupCount=SLOW_LOG_BACKUPS,
+                encoding="utf-8"
+            )
+            file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(file_handler)
+            _slow_logger = logger
+        return _slow_logger
+
+
+def configure(slow_query_ms=None, slow_log_path=None):
+    """Change the slow-query threshold and/or log file at runtime."""
+    global SLOW_QUERY_MS, SLOW_LOG_PATH, _slow_logger
+    if slow_query_ms is not None:
+        SLOW_QUERY_MS = float(slow_query_ms)
+    if slow_log_path is not None:
+        with _slow_logger_lock:
+            SLOW_LOG_PATH = slow_log_path
+            if _slow_logger is not None:
+                for old in list(_slow_logger.handlers):
+                    _slow_logger.removeHandler(old)
+                    old.close()
+                _slow_logger = None
+
+
+def _one_line(sql, limit=500):
+    text = " ".join(str(sql).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+# ----- cursor wrapper -----
+
+def record_connect(seconds):
+    query_stats.record_connect(current_handler() or "-", seconds)
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times each statement from execute to its last fetch.
+
+    statement names the registered statement the cursor is dedicated to,
+    if any; its executions are then also recorded in statement_stats.
+    """
+
+    def __init__(self, raw, statement=None):
+        self._raw = raw
+        self.statement = statement
+        self._statement = None   # [sql, params, handler, execute_s, fetch_s, rows, fetched]
+
+    def _begin(self, sql, params, run):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return run()
+        finally:
+            self._statement = [
+                sql, params, current_handler() or "-",
+                time.perf_counter() - started, 0.0, 0, False
+            ]
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is None:
+            return
+        sql, params, name, execute_s, fetch_s, rows, fetched = statement
+        if not fetched:
+            rows = max(getattr(self._raw, "rowcount", 0) or 0, 0)
+        total_ms = (execute_s + fetch_s) * 1000
+        slow = total_ms >= SLOW_QUERY_MS
+        query_stats.record_query(name, execute_s, fetch_s, rows, slow)
+        if self.statement is not None:
+            statement_stats.record_query(self.statement, execute_s, fetch_s, rows, slow)
+        if slow:
+            slow_log().info(
+                "%.1fms handler=%s statement=%s execute=%.1fms fetch=%.1fms rows=%d sql=%s params=%s",
+                total_ms, name, self.statement or "-", execute_s * 1000, fetch_s * 1000, rows,
+                _one_line(sql), _one_line(repr(params), 200)
+            )
+
+    def finish(self):
+        """Record the current statement now instead of at the next execute or close.
+
+        For cursors kept open and reused, such as prepared statement cursors.
+        """
+        self._finish()
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self._raw, method)(*args)
+        if self._statement is not None:
+            self._statement[4] += time.perf_counter() - started
+            self._statement[6] = True
+            if method == "fetchone":
+                self._statement[5] += result is not None
+            else:
+                self._statement[5] += len(result)
+        return result
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._begin(
+            operation, params,
+            lambda: self._raw.execute(operation, params, *args, **kwargs)
+        )
+
+    def executemany(self, operation, seq_params):
+        seq_params = list(seq_params)
+        return self._begin(
+            operation, f"<{len(seq_params)} rows>",
+            lambda: self._raw.executemany(operation, seq_params)
+        )
+
+    def callproc(self, procname, args=()):
+        return self._begin(
+            f"CALL {procname}", args,
+            lambda: self._raw.callproc(procname, args)
+        )
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, size=1):
+        return self._fetch("fetchmany", size)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
@@ -0,0 +1,760 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+import services
+from availability import HORIZON_DAYS, booking_range, sql_conflicts, sql_free_cars
+from backends import SQLiteBackend
+from db_pool import ConnectionPool, connect_db
+from instrumentation import handler_scope
+from pricing import billable_days, quote
+from search import LIVE_SEARCH_LIMIT, build_search_query
+
+
+# ==========================
+# Offline-First Branch Client
+# ==========================
+# With RENTALDB_OFFLINE=1 the GUI talks to this module instead of
+# services.py. It exposes the same functions, but:
+#   * reads (searches, customer/car lookups, availability, estimates)
+#     are answered from a local SQLite replica of Customers, Cars and the
+#     Rentals ending within the last REPLICA_DAYS days;
+#   * writes are applied to the replica and recorded in its Outbox table
+#     in one local transaction, so they survive a crash or a dropped link;
+#   * SyncWorker replays the outbox in order through services.py against
+#     the central RentalDB (the same transactional, overlap-checked
+#     booking path the online client uses), then refreshes the replica.
+# A replayed write the central database rejects (typically a car booked
+# meanwhile by another branch) is marked 'conflict' and left in the
+# outbox for review; the next refresh drops its local effect. Delivery is
+# at-least-once: a crash between the central commit and marking the
+# outbox row done replays that write again.
+# Every function the GUI calls through services.py is defined here, and
+# its paged grids (Customers, Cars, the rentals view) read the replica
+# through connect_replica(), so branch mode reaches the central database
+# only through the sync worker. Payments need the central invoice
+# balances, and the Reports tab (reports, analytics, exports, summary
+# rebuilds) the full history and the archive, so both are disabled in
+# branch mode.
+
+OFFLINE = os.environ.get("RENTALDB_OFFLINE") == "1"
+REPLICA_PATH = os.environ.get("RENTALDB_REPLICA_PATH", "replica.sqlite3")
+REPLICA_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_replica.sql")
+
+REPLICA_DAYS = HORIZON_DAYS   # replicate rentals ending this many days ago or later
+SYNC_INTERVAL = 30.0          # seconds between sync rounds when nothing is written
+PULL_CHUNK = 5000             # rows fetched per round trip when refreshing
+
+# Errors meaning "central database unreachable": keep the write queued
+TRANSIENT_ERRORS = (
+    mysql.connector.errors.InterfaceError,
+    mysql.connector.errors.OperationalError,
+    mysql.connector.errors.PoolError,
+    sqlite3.OperationalError,
+    OSError
+)
+# Client errors for a refused, lost or unknown server connection
+LINK_ERRNOS = {2002, 2003, 2005, 2006, 2013, 2055}
+
+
+def is_transient(error):
+    """True when error means the central database could not be reached."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    return isinstance(error, mysql.connector.Error) and error.errno in LINK_ERRNOS
+
+
+# entity -> (table, id column)
+ENTITIES = {
+    "customer": ("Customers", "customer_id"),
+    "car": ("Cars", "car_id"),
+    "rental": ("Rentals", "rental_id")
+}
+
+# operation -> (services function, {argument position: entity id it holds}, entity created)
+OPERATIONS = {
+    "add_customer": (services.add_customer, {}, "customer"),
+    "update_customer": (services.update_customer, {0: "customer"}, None),
+    "delete_customer": (services.delete_customer, {0: "customer"}, None),
+    "add_car": (services.add_car, {}, "car"),
+    "update_car": (services.update_car, {0: "car"}, None),
+    "delete_car": (services.delete_car, {0: "car"}, None),
+    "create_rental": (services.create_rental, {0: "customer", 1: "car"}, "rental"),
+    "update_rental": (services.update_rental, {0: "rental"}, None),
+    "delete_rental": (services.delete_rental, {0: "rental"}, None)
+}
+
+PULL_QUERIES = [
+    (
+        "Customers",
+        "SELECT customer_id, first_name, last_name, email, phone FROM Customers",
+        "INSERT INTO Customers (customer_id, first_name, last_name, email, phone) "
+        "VALUES (%s, %s, %s, %s, %s)"
+    ),
+    (
+        "Cars",
+        "SELECT car_id, car_type, car_color, car_price FROM Cars",
+        "INSERT INTO Cars (car_id, car_type, car_color, car_price) VALUES (%s, %s, %s, %s)"
+    ),
+    (
+        "Rentals",
+        "SELECT rental_id, customer_id, car_id, rental_start_date, rental_end_date "
+        "FROM Rentals WHERE rental_end_date >= %s",
+        "INSERT INTO Rentals (rental_id, customer_id, car_id, rental_start_date, rental_end_date) "
+        "VALUES (%s, %s, %s, %s, %s)"
+    )
+]
+
+
+def _now():
+    return datetime.now().isoformat(sep=" ", timespec="seconds")
+
+
+class Replica:
+    """The branch's local copy of RentalDB and its outbox."""
+
+    def __init__(self, path=REPLICA_PATH):
+        self.pool = ConnectionPool(SQLiteBackend(path, REPLICA_SCHEMA).connect, size=3)
+        self._stats_lock = threading.Lock()
+        self.link_up = None          # unknown until the first sync round
+        self.last_error = None
+        self.last_push = None
+        self.pushed = 0
+        self.refused = 0
+
+    # ----- local reads -----
+
+    def fetch(self, query, params=()):
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def fetch_rows(self, query, params=()):
+        """fetch() that also returns the column names."""
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cols = [desc[0] for desc in cursor.description]
+            cursor.close()
+            return cols, rows
+        finally:
+            conn.close()
+
+    def search(self, table, field, value, mode="prefix", limit=None):
+        return self.fetch(*build_search_query(table, field, value, mode, limit, fulltext=False))
+
+    def get_customer(self, customer_id):
+        rows = self.fetch("SELECT * FROM Customers WHERE customer_id = %s", (int(customer_id),))
+        return rows[0] if rows else None
+
+    def get_car(self, car_id):
+        rows = self.fetch("SELECT * FROM Cars WHERE car_id = %s", (int(car_id),))
+        return rows[0] if rows else None
+
+    def customer_rentals(self, customer_id):
+        return self.fetch(
+            """
+            SELECT
+                Rentals.rental_id,
+                Cars.car_type,
+                Rentals.rental_start_date,
+                Rentals.rental_end_date
+            FROM Rentals
+            JOIN Cars ON Rentals.car_id = Cars.car_id
+            WHERE Rentals.customer_id = %s
+            """,
+            (int(customer_id),)
+        )
+
+    def conflicts(self, car_id, start, end, ignore=None):
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            rows = sql_conflicts(cursor, int(car_id), *booking_range(start, end), ignore)
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def free_car_ids(self, start, end):
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            rows = sql_free_cars(cursor, *booking_range(start, end))
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    # ----- local writes -----
+
+    def write(self, operation, args, apply):
+        """Apply a write to the replica and queue it for the central database.
+
+        apply(cursor) makes the local change and returns (result,
+        local_id), local_id being the temporary id of a row it created.
+        Both happen in one local transaction.
+        """
+        conn = self.pool.get_connection()
+        try:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            try:
+                result, local_id = apply(cursor)
+                cursor.execute(
+                    """
+                    INSERT INTO Outbox (operation, payload, local_id, created_at)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    (operation, json.dumps(args, default=str), local_id, _now())
+                )
+            finally:
+                cursor.close()
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+
+    @staticmethod
+    def next_local_id(cursor, entity):
+        """A temporary negative id for a row created offline."""
+        table, column = ENTITIES[entity]
+        cursor.execute(f"SELECT MIN({column}) FROM {table}")
+        lowest = cursor.fetchone()[0]
+        return min(lowest or 0, 0) - 1
+
+    # ----- outbox -----
+
+    def pending(self):
+        return self.fetch(
+            """
+            SELECT op_id, operation, payload, local_id
+            FROM Outbox
+            WHERE status = 'pending'
+            ORDER BY op_id
+            """
+        )
+
+    def outbox_counts(self):
+        return dict(self.fetch("SELECT status, COUNT(*) FROM Outbox GROUP BY status"))
+
+    def rejected(self):
+        """(op_id, operation, payload, status, last_error, created_at) of writes the central database refused."""
+        return self.fetch(
+            """
+            SELECT op_id, operation, payload, status, last_error, created_at
+            FROM Outbox
+            WHERE status <> 'pending'
+            ORDER BY op_id
+            """
+        )
+
+    def dismiss(self, op_id):
+        """Forget a conflicted or failed write once it has been dealt with."""
+        self._local_execute("DELETE FROM Outbox WHERE op_id = %s AND status <> 'pending'", (op_id,))
+
+    def _local_execute(self, query, params=()):
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def _central_id(self, entity, value):
+        value = int(value)
+        if value >= 0:
+            return value
+        rows = self.fetch(
+            "SELECT central_id FROM IdMap WHERE entity = %s AND local_id = %s",
+            (entity, value)
+        )
+        if not rows:
+            raise ValueError(f"The {entity} this change refers to was never created centrally")
+        return rows[0][0]
+
+    def _record_id(self, entity, local_id, central_id):
+        """Remember a central id and re-key the local row (cascading to its rentals)."""
+        table, column = ENTITIES[entity]
+        conn = self.pool.get_connection()
+        try:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO IdMap (entity, local_id, central_id) VALUES (%s, %s, %s)",
+                (entity, local_id, central_id)
+            )
+            cursor.execute(
+                f"UPDATE {table} SET {column} = %s WHERE {column} = %s",
+                (central_id, local_id)
+            )
+            cursor.close()
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _replay(self, operation, payload, local_id):
+        fn, references, creates = OPERATIONS[operation]
+        args = json.loads(payload)
+        for position, entity in references.items():
+            args[position] = self._central_id(entity, args[position])
+        with handler_scope(f"sync:{operation}"):
+            result = fn(*args)
+        if creates is not None and local_id is not None:
+            central_id = result["rental_id"] if creates == "rental" else result
+            self._record_id(creates, local_id, central_id)
+
+    def push(self):
+        """Replay pending writes in order; stop at the first transport error.
+
+        Returns the number of writes still pending.
+        """
+        queue = self.pending()
+        for n, (op_id, operation, payload, local_id) in enumerate(queue):
+            try:
+                self._replay(operation, payload, local_id)
+            except Exception as e:
+                if is_transient(e):
+                    self._local_execute(
+                        "UPDATE Outbox SET attempts = attempts + 1, last_error = %s WHERE op_id = %s",
+                        (str(e), op_id)
+                    )
+                    self._set_link(False, e)
+                    return len(queue) - n
+                status = "conflict" if isinstance(e, ValueError) else "failed"
+                self._local_execute(
+                    """
+                    UPDATE Outbox
+                    SET status = %s, attempts = attempts + 1, last_error = %s
+                    WHERE op_id = %s
+                    """,
+                    (status, str(e), op_id)
+                )
+                with self._stats_lock:
+                    self.refused += 1
+            else:
+                self._local_execute("DELETE FROM Outbox WHERE op_id = %s", (op_id,))
+                with self._stats_lock:
+                    self.pushed += 1
+            self._set_link(True)
+        with self._stats_lock:
+            self.last_push = _now()
+        return 0
+
+    # ----- refresh -----
+
+    def pull(self):
+        """Replace the replica with a fresh snapshot of the central tables.
+
+        Central rows are read before the local transaction starts, so the
+        replica stays readable and writable while the WAN transfer runs.
+        Skipped (returns False) if writes are still waiting to be pushed,
+        since the snapshot would hide them.
+        """
+        since = date.today() - timedelta(days=REPLICA_DAYS)
+        snapshot = []
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            for table, select, insert in PULL_QUERIES:
+                cursor.execute(select, (since,) if "%s" in select else ())
+                rows = []
+                while True:
+                    chunk = cursor.fetchmany(PULL_CHUNK)
+                    if not chunk:
+                        break
+                    rows.extend(chunk)
+                snapshot.append((table, insert, rows))
+            cursor.close()
+        finally:
+            conn.close()
+
+        local = self.pool.get_connection()
+        try:
+            local.start_transaction()
+            cursor = local.cursor()
+            cursor.execute("SELECT COUNT(*) FROM Outbox WHERE status = 'pending'")
+            if cursor.fetchone()[0]:
+                cursor.close()
+                local.rollback()
+                return False
+            for table, _, _ in reversed(snapshot):
+                cursor.execute(f"DELETE FROM {table}")
+            for table, insert, rows in snapshot:
+                cursor.executemany(insert, rows)
+            cursor.execute("DELETE FROM IdMap")
+            cursor.execute(
+                """
+                INSERT INTO SyncState (name, value) VALUES ('last_pull', %s)
+                ON CONFLICT (name) DO UPDATE SET value = excluded.value
+                """,
+                (_now(),)
+            )
+            cursor.close()
+            local.commit()
+        finally:
+            local.close()
+        self._set_link(True)
+        return True
+
+    def sync(self):
+        """One round: push the outbox, then refresh if it drained."""
+        try:
+            if self.push() == 0:
+                self.pull()
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            self._set_link(False, e)
+
+    def _set_link(self, up, error=None):
+        with self._stats_lock:
+            self.link_up = up
+            if error is not None:
+                self.last_error = str(error)
+
+    def stats(self):
+        rows = self.fetch("SELECT value FROM SyncState WHERE name = 'last_pull'")
+        counts = self.outbox_counts()
+        with self._stats_lock:
+            return {
+                "link_up": self.link_up,
+                "pending": counts.get("pending", 0),
+                "conflicts": counts.get("conflict", 0) + counts.get("failed", 0),
+                "pushed": self.pushed,
+                "last_push": self.last_push,
+                "last_pull": rows[0][0] if rows else None,
+                "last_error": self.last_error
+            }
+
+
+# ==========================
+# Sync Worker
+# ==========================
+
+class SyncWorker:
+    """Background thread running Replica.sync() every `interval` seconds
+    and promptly after each local write."""
+
+    def __init__(self, replica, interval=SYNC_INTERVAL):
+        self.replica = replica
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+            self._thread.start()
+
+    def sync_now(self):
+        self._wake.set()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.replica.sync()
+            except Exception as e:
+                self.replica._set_link(self.replica.link_up, e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+replica = Replica()
+sync_worker = SyncWorker(replica)
+
+
+def _queued(operation, args, apply):
+    result = replica.write(operation, args, apply)
+    sync_worker.sync_now()
+    return result
+
+
+# ==========================
+# services.py Interface
+# ==========================
+# There is deliberately no fallback to services.py: a function missing
+# here is a missing feature in branch mode, not a silent central query.
+
+def connect_replica():
+    """A pooled replica connection, for the GUI's paged grids (see paged_view.py)."""
+    return replica.pool.get_connection()
+
+
+PAYMENTS_OFFLINE = "Payments need the central database and are not available in branch mode."
+
+
+def fetch_rows(query, params=()):
+    """Run a SELECT on the replica and return (column_names, rows).
+
+    Only Customers, Cars and the Rentals ending within REPLICA_DAYS are
+    replicated; a query on any other table raises ValueError.
+    """
+    try:
+        return replica.fetch_rows(query, params)
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e):
+            raise ValueError(f"Not available in branch mode ({e}).") from e
+        raise
+
+
+def diagnostics():
+    data = services.diagnostics()
+    data["replica"] = replica.stats()
+    return data
+
+
+# ----- customers -----
+
+def live_search_customers(field, value, mode="prefix"):
+    value = value.strip()
+    return replica.search("Customers", field, value, mode, LIVE_SEARCH_LIMIT) if value else []
+
+
+def load_customer(customer_id):
+    customer = replica.get_customer(customer_id)
+    if customer is None:
+        return None, []
+    return customer, replica.customer_rentals(customer_id)
+
+
+def find_customer(field, value, mode="prefix"):
+    rows = replica.search("Customers", field, value, mode, 1)
+    if not rows:
+        return None, []
+    return rows[0], replica.customer_rentals(rows[0][0])
+
+
+def add_customer(first_name, last_name, email, phone):
+    def apply(cursor):
+        customer_id = Replica.next_local_id(cursor, "customer")
+        cursor.execute(
+            """
+            INSERT INTO Customers (customer_id, first_name, last_name, email, phone)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (customer_id, first_name, last_name, email, phone)
+        )
+        return customer_id, customer_id
+    return _queued("add_customer", [first_name, last_name, email, phone], apply)
+
+
+def update_customer(customer_id, first_name, last_name, email, phone):
+    def apply(cursor):
+        cursor.execute(
+            """
+            UPDATE Customers
+            SET first_name=%s, last_name=%s, email=%s, phone=%s
+            WHERE customer_id=%s
+            """,
+            (first_name, last_name, email, phone, customer_id)
+        )
+        return None, None
+    _queued("update_customer", [int(customer_id), first_name, last_name, email, phone], apply)
+
+
+def delete_customer(customer_id):
+    def apply(cursor):
+        cursor.execute("DELETE FROM Customers WHERE customer_id=%s", (customer_id,))
+        return None, None
+    _queued("delete_customer", [int(customer_id)], apply)
+
+
+# ----- cars -----
+
+def live_search_cars(field, value, mode="prefix"):
+    value = value.strip()
+    return replica.search("Cars", field, value, mode, LIVE_SEARCH_LIMIT) if value else []
+
+
+def find_car(field, value, mode="prefix"):
+    rows = replica.search("Cars", field, value, mode, 1)
+    return rows[0] if rows else None
+
+
+def add_car(car_type, car_color, car_price):
+    def apply(cursor):
+        car_id = Replica.next_local_id(cursor, "car")
+        cursor.execute(
+            "INSERT INTO Cars (car_id, car_type, car_color, car_price) VALUES (%s, %s, %s, %s)",
+            (car_id, car_type, car_color, car_price)
+        )
+        return car_id, car_id
+    return _queued("add_car", [car_type, car_color, car_price], apply)
+
+
+def update_car(car_id, car_type, car_color, car_price):
+    """Queue a car update; invoices are re-priced when it reaches the central database."""
+    def apply(cursor):
+        cursor.execute(
+            """
+            UPDATE Cars
+            SET car_type=%s, car_color=%s, car_price=%s
+            WHERE car_id=%s
+            """,
+            (car_type, car_color, car_price, car_id)
+        )
+        return 0, None
+    return _queued("update_car", [int(car_id), car_type, car_color, car_price], apply)
+
+
+def delete_car(car_id):
+    def apply(cursor):
+        cursor.execute("DELETE FROM Cars WHERE car_id=%s", (car_id,))
+        return None, None
+    _queued("delete_car", [int(car_id)], apply)
+
+
+# ----- rentals -----
+
+def check_availability(car_id, start, end, rental_id=None):
+    return replica.conflicts(car_id, start, end, ignore=rental_id)
+
+
+def free_cars(start, end):
+    return [replica.get_car(car_id) for car_id in replica.free_car_ids(start, end)]
+
+
+def estimate_rental(car_id, start, end):
+    car = replica.get_car(car_id)
+    if not car:
+        raise ValueError("Invalid Car ID")
+    return quote(car[3], start, end)[1]
+
+
+def _check_local_overlap(cursor, car_id, start, end, rental_id=None):
+    conflicts = sql_conflicts(cursor, car_id, *booking_range(start, end), rental_id)
+    if conflicts:
+        raise services.booked_error(car_id, conflicts)
+
+
+def create_rental(customer_id, car_id, start, end):
+    """Book a car locally and queue the booking; the summary has queued=True.
+
+    Overlaps are checked against the replica here and again, under the
+    car's row lock, when the booking is replayed centrally.
+    """
+    billable_days([start], [end])
+    customer = replica.get_customer(customer_id)
+    if not customer:
+        raise ValueError("Customer not found.")
+
+    def apply(cursor):
+        cursor.execute("SELECT car_type, car_price FROM Cars WHERE car_id = %s", (int(car_id),))
+        car = cursor.fetchone()
+        if not car:
+            raise ValueError("Car not found.")
+        _check_local_overlap(cursor, int(car_id), start, end)
+        days, total = quote(car[1], start, end)
+        rental_id = Replica.next_local_id(cursor, "rental")
+        cursor.execute(
+            """
+            INSERT INTO Rentals (rental_id, customer_id, car_id, rental_start_date, rental_end_date)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (rental_id, int(customer_id), int(car_id), start, end)
+        )
+        summary = {
+            "rental_id": rental_id,
+            "customer_name": f"{customer[1]} {customer[2]}",
+            "car_type": car[0],
+            "days": days,
+            "total": float(total),
+            "queued": True
+        }
+        return summary, rental_id
+    return _queued("create_rental", [int(customer_id), int(car_id), start, end], apply)
+
+
+def update_rental(rental_id, start, end):
+    """Change a replicated rental's dates locally and queue the change; returns the new total."""
+    billable_days([start], [end])
+
+    def apply(cursor):
+        cursor.execute(
+            """
+            SELECT r.car_id, c.car_price
+            FROM Rentals r JOIN Cars c ON c.car_id = r.car_id
+            WHERE r.rental_id = %s
+            """,
+            (int(rental_id),)
+        )
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError("Rental not found in the local replica (only recent rentals are kept).")
+        _check_local_overlap(cursor, row[0], start, end, int(rental_id))
+        cursor.execute(
+            """
+            UPDATE Rentals
+            SET rental_start_date = %s, rental_end_date = %s
+            WHERE rental_id = %s
+            """,
+            (start, end, int(rental_id))
+        )
+        return float(quote(row[1], start, end)[1]), None
+    return _queued("update_rental", [int(rental_id), start, end], apply)
+
+
+def delete_rental(rental_id):
+    def apply(cursor):
+        cursor.execute("DELETE FROM Rentals WHERE rental_id = %s", (int(rental_id),))
+        return None, None
+    _queued("delete_rental", [int(rental_id)], apply)
+
+
+# ----- payments -----
+
+def record_payment(invoice_id, amount, method, payment_date=None):
+    raise ValueError(PAYMENTS_OFFLINE)
+
+
+def import_payments(path, chunk_size=None, progress=None):
+    raise ValueError(PAYMENTS_OFFLINE)
+
+
+def invoice_balance(invoice_id):
+    raise ValueError(PAYMENTS_OFFLINE)
+
+
+def invoice_payments(invoice_id):
+    raise ValueError(PAYMENTS_OFFLINE)
+
+
+def unpaid_invoices(limit=None):
+    raise ValueError(PAYMENTS_OFFLINE)
+
+
+if __name__ == "__main__":
+    # One sync round from the command line, e.g. from a scheduled task
+    started = time.perf_counter()
+    replica.sync()
+    stats = replica.stats()
+    print(
+        f"Synced in {time.perf_counter() - started:.2f}s: {stats['pending']} pending, "
+        f"{stats['conflicts']} conflicts, last refresh {stats['last_pull']}"
+    )
+    if stats["last_error"]:
+        print(f"Last error: {stats['last_error']}")
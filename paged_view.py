@@ -0,0 +1,441 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from changefeed import TRACKED_TABLES, current_cursor, read_changes, sortable, summarize
+from db_pool import connect_db
+
+
+# ==========================
+# Paged Result Fetching
+# ==========================
+
+PAGE_SIZE = 200            # rows fetched per round trip
+MAX_RENDERED_ROWS = 1000   # rows kept in the Treeview at any one time
+LOAD_THRESHOLD = 0.9       # scroll position that triggers the next page
+
+
+def fetch_page(query, params, offset, limit, with_count=False, connect=connect_db):
+    """Fetch one page of a SELECT; optionally count the full result too.
+
+    Returns (column_names, rows, total) where total is None unless
+    with_count is set. connect returns the connection to read from.
+    """
+    query = query.strip().rstrip(";")
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        total = None
+        if with_count:
+            cursor.execute(f"SELECT COUNT(*) FROM ({query}) AS counted", params)
+            total = cursor.fetchone()[0]
+
+        cursor.execute(f"{query} LIMIT %s OFFSET %s", tuple(params) + (limit, offset))
+        rows = cursor.fetchall()
+        cols = [desc[0] for desc in cursor.description]
+        cursor.close()
+        return cols, rows, total
+    finally:
+        conn.close()
+
+
+class OffsetSource:
+    """Page source for an arbitrary SELECT, paged with LIMIT/OFFSET."""
+
+    def __init__(self, query, params=(), connect=connect_db):
+        self.query = query
+        self.params = tuple(params)
+        self.connect = connect
+
+    def first(self, limit):
+        return fetch_page(self.query, self.params, 0, limit, with_count=True, connect=self.connect)
+
+    def after(self, offset, last_row, limit):
+        return fetch_page(self.query, self.params, offset, limit, connect=self.connect)[1]
+
+    def before(self, offset, first_row, limit):
+        start = max(offset - limit, 0)
+        return fetch_page(self.query, self.params, start, offset - start, connect=self.connect)[1]
+
+    def sort_key(self, row):
+        # Table queries come back in primary key order, the first column
+        return (sortable(row[0]),)
+
+    def rows_by_id(self, ids, key):
+        """Rows of the result whose `key` column is in ids."""
+        if not ids:
+            return []
+        query = self.query.strip().rstrip(";")
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT * FROM ({query}) AS q WHERE q.{key} IN ({', '.join(['%s'] * len(ids))})",
+                self.params + tuple(ids)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+
+# ==========================
+# Paged Treeview Widget
+# ==========================
+
+class PagedTreeview:
+    """Treeview that loads a result page by page as the user scrolls.
+
+    Rows come from a page source (OffsetSource, or a keyset source such as
+    rentals_view.RentalsSource) whose first/after/before methods run on the
+    worker pool. Only a sliding window of at most max_rows rows is kept in
+    the widget; pages falling out of the window are dropped and re-fetched
+    if the user scrolls back to them.
+
+    A source may return None as the first page's total when counting is
+    expensive. The view then keeps fetching until a short page shows
+    where the result ends, and counts only when the footer is clicked
+    (the source's count method).
+
+    load() reads through connect, the central database unless a branch
+    client passes its replica's (see offline.py).
+    """
+
+    def __init__(self, parent, worker, page_size=PAGE_SIZE, max_rows=MAX_RENDERED_ROWS,
+                 connect=connect_db):
+        self.worker = worker
+        self.connect = connect
+        self.page_size = page_size
+        self.max_rows = max(max_rows, page_size * 2)
+        self.on_sort = None     # optional callback(column) for heading clicks
+
+        self.frame = ttk.Frame(parent)
+        self.footer = ttk.Label(self.frame, text="", anchor="e")
+        self.footer.pack(side='bottom', fill='x', padx=5)
+        self.footer.bind("<Button-1>", lambda _event: self.count_total())
+
+        self.tree = ttk.Treeview(self.frame)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.source = None
+        self.total = 0          # None while the size of the result is unknown
+        self.window_start = 0   # result offset of the first rendered row
+        self._loading = False
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.footer.config(text="")
+
+    @property
+    def window_end(self):
+        return self.window_start + len(self.tree.get_children())
+
+    def load(self, query, params=()):
+        """Show a new query, starting from its first page."""
+        self.load_source(OffsetSource(query, params, self.connect))
+
+    def load_source(self, source):
+        """Show the rows of a page source, starting from its first page."""
+        self.source = source
+        self.window_start = 0
+        self.total = 0
+        self._loading = True
+        self.worker.submit(
+            source.first,
+            self.page_size,
+            key=("page", str(self.tree)),
+            on_success=self._show_first_page,
+            on_error=self._on_error
+        )
+
+    def refresh(self):
+        """Reload the current source from the top."""
+        if self.source is not None:
+            self.load_source(self.source)
+
+    def count_total(self):
+        """Count the whole result, for a source whose total is still unknown."""
+        source = self.source
+        if self.total is not None or not hasattr(source, "count"):
+            return
+        self.footer.config(text=self.footer.cget("text").replace("click to count", "counting..."))
+        self.worker.submit(
+            source.count,
+            key=("count", str(self.tree)),
+            on_success=lambda total: self._show_total(source, total),
+            on_error=self._on_error
+        )
+
+    def _show_total(self, source, total):
+        if source is self.source and self.total is None:
+            self.total = total
+            self._update_footer()
+
+    def _more_after(self, rendered):
+        """Whether the result may continue past `rendered` rows of the window."""
+        return self.total is None or self.window_start + rendered < self.total
+
+    def _show_first_page(self, result):
+        cols, rows, total = result
+        self._loading = False
+        self.total = total
+
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = cols
+        self.tree["show"] = "headings"
+        for col in cols:
+            if self.on_sort is not None:
+                self.tree.heading(col, text=col, command=lambda c=col: self.on_sort(c))
+            else:
+                self.tree.heading(col, text=col)
+
+        for row in rows:
+            self.tree.insert("", tk.END, values=row)
+        self.tree.yview_moveto(0)
+        self._update_footer()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading or self.source is None:
+            return
+
+        items = self.tree.get_children()
+        if float(last) >= LOAD_THRESHOLD and self._more_after(len(items)):
+            self._fetch(
+                self.source.after,
+                self.window_end,
+                self._row(items[-1]),
+                self._append_page
+            )
+        elif float(first) <= 1 - LOAD_THRESHOLD and self.window_start > 0:
+            self._fetch(
+                self.source.before,
+                self.window_start,
+                self._row(items[0]),
+                self._prepend_page
+            )
+
+    def _row(self, item):
+        return tuple(self.tree.item(item, "values"))
+
+    def _fetch(self, method, offset, edge_row, callback):
+        self._loading = True
+        self.worker.submit(
+            method,
+            offset,
+            edge_row,
+            self.page_size,
+            key=("page", str(self.tree)),
+            on_success=callback,
+            on_error=self._on_error
+        )
+
+    def _append_page(self, rows):
+        self._loading = False
+        first_visible = self._first_visible_index()
+        for row in rows:
+            self.tree.insert("", tk.END, values=row)
+        if self.total is None and len(rows) < self.page_size:
+            self.total = self.window_end    # a short page is the last one
+
+        items = self.tree.get_children()
+        excess = len(items) - self.max_rows
+        if excess > 0:
+            self.tree.delete(*items[:excess])
+            self.window_start += excess
+            self._scroll_to_index(first_visible - excess)
+        self._update_footer()
+
+    def _prepend_page(self, rows):
+        self._loading = False
+        first_visible = self._first_visible_index()
+        for i, row in enumerate(rows):
+            self.tree.insert("", i, values=row)
+        self.window_start = max(self.window_start - len(rows), 0)
+
+        items = self.tree.get_children()
+        excess = len(items) - self.max_rows
+        if excess > 0:
+            self.tree.delete(*items[-excess:])
+        self._scroll_to_index(first_visible + len(rows))
+        self._update_footer()
+
+    def _first_visible_index(self):
+        count = len(self.tree.get_children())
+        return int(self.tree.yview()[0] * count)
+
+    def _scroll_to_index(self, index):
+        count = len(self.tree.get_children())
+        if count:
+            self.tree.yview_moveto(max(index, 0) / count)
+
+    def _update_footer(self):
+        shown = len(self.tree.get_children())
+        total = self.total
+        if total is None:
+            total = "more (click to count)" if hasattr(self.source, "count") else "more"
+        if shown == 0:
+            self.footer.config(text=f"0 of {total} rows")
+            return
+        self.footer.config(
+            text=f"Rows {self.window_start + 1}-{self.window_end} of {total}"
+        )
+
+    def _on_error(self, e):
+        self._loading = False
+        messagebox.showerror("Database Error", str(e))
+
+    # ----- incremental updates -----
+
+    def _position(self, key, items, descending):
+        """Index in items at which a row with sort key `key` belongs."""
+        for i, item in enumerate(items):
+            other = self.source.sort_key(self._row(item))
+            if (other < key) if descending else (other > key):
+                return i
+        return len(items)
+
+    def apply_changes(self, rows, changes):
+        """Patch the rendered window with changed rows instead of reloading.
+
+        rows are the current versions of the inserted/updated rows that
+        the source still returns; changes holds the "inserted", "updated"
+        and "deleted" id sets from changefeed.summarize(). The first
+        column must be the row id. Rows that now sort outside the window
+        are left for scrolling to fetch; a known total is adjusted for
+        inserts and for deletes of rendered rows. While a first page is
+        still loading the view reloads instead, since that page may have
+        been read before these changes.
+        """
+        if self.source is None:
+            return
+        if self._loading:
+            self.refresh()
+            return
+        descending = getattr(self.source, "descending", False)
+        rendered = {str(self._row(item)[0]): item for item in self.tree.get_children()}
+        fresh = {str(row[0]): row for row in rows}
+        inserted = {str(row_id) for row_id in changes["inserted"]}
+
+        # Deleted rows, and changed rows the source no longer returns
+        for row_id in {str(r) for r in changes["deleted"] | changes["updated"] | changes["inserted"]}:
+            if row_id in rendered and row_id not in fresh:
+                self.tree.delete(rendered.pop(row_id))
+                if self.total is not None:
+                    self.total -= 1
+
+        for row_id, row in fresh.items():
+            key = self.source.sort_key(row)
+            item = rendered.get(row_id)
+            if item is not None:
+                self.tree.delete(item)
+            elif row_id in inserted and self.total is not None:
+                self.total += 1
+            items = self.tree.get_children()
+            index = self._position(key, items, descending)
+            if index == 0 and self.window_start > 0:
+                self.window_start += 1      # now sorts before the window
+                continue
+            if index == len(items) and self._more_after(len(items) + 1):
+                continue                    # now sorts after the window
+            self.tree.insert("", index, values=row)
+
+        items = self.tree.get_children()
+        excess = len(items) - self.max_rows
+        if excess > 0:
+            self.tree.delete(*items[-excess:])
+        self._update_footer()
+
+
+# ==========================
+# Change Subscriber
+# ==========================
+
+CHANGE_POLL_MS = 5000   # how often watched views look for other clients' changes
+
+
+class ChangeSubscriber:
+    """Keeps watched PagedTreeviews current from the change log.
+
+    Each poll reads the ChangeLog entries after the last version seen (a
+    primary-key range scan), re-reads only the changed rows each watched
+    view could show, and patches them into the widgets, so a refresh
+    costs O(changes) instead of O(table). When more changes piled up
+    than changefeed.MAX_CHANGES, the views are reloaded instead.
+    """
+
+    def __init__(self, worker, interval_ms=CHANGE_POLL_MS):
+        self.worker = worker
+        self.interval_ms = interval_ms
+        self.cursor = None      # changefeed.ChangeCursor
+        self.last_error = None
+        self._views = []    # (PagedTreeview, table)
+
+    def watch(self, view, table):
+        """Apply changes to `table` (a changefeed.TRACKED_TABLES name) to view."""
+        self._views.append((view, table))
+
+    def start(self):
+        """Take the current version as the baseline and poll periodically."""
+        self.poll()
+        self.worker.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        self.poll()
+        self.worker.root.after(self.interval_ms, self._tick)
+
+    def poll(self):
+        """Look for changes now, e.g. right after this client wrote something."""
+        views = [(view, view.source, table) for view, table in self._views]
+        self.worker.submit(
+            self._collect,
+            self.cursor,
+            views,
+            key="changefeed",
+            on_success=self._apply,
+            on_error=self._on_error
+        )
+
+    @staticmethod
+    def _collect(cursor, views):
+        """Worker side: changed rows per view, or None for views to reload."""
+        if cursor is None:
+            return current_cursor(), []
+        changes, complete, next_cursor = read_changes(cursor)
+        if not complete:
+            return current_cursor(), [(view, source, None, None) for view, source, _ in views]
+        if not changes:
+            return next_cursor, []
+
+        summary = summarize(changes)
+        updates = []
+        for view, source, table in views:
+            if source is None or table not in summary:
+                continue
+            sets = summary[table]
+            ids = sorted(sets["inserted"] | sets["updated"])
+            rows = source.rows_by_id(ids, TRACKED_TABLES[table]) if ids else []
+            updates.append((view, source, rows, sets))
+        return next_cursor, updates
+
+    def _apply(self, result):
+        self.cursor, updates = result
+        self.last_error = None
+        for view, source, rows, sets in updates:
+            if view.source is not source:
+                continue            # the view has been reloaded meanwhile
+            if rows is None:
+                view.refresh()
+            else:
+                view.apply_changes(rows, sets)
+
+    def _on_error(self, e):
+        # Polls repeat every few seconds; report nothing rather than a
+        # messagebox per poll while the database is unreachable.
+        self.last_error = str(e)
@@ -0,0 +1,301 @@
+import argparse
+import sys
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+import procedures
+import statements
+from bulk_import import chunked, read_records
+from db_pool import connect_db
+from transactions import run_transaction
+
+
+# ==========================
+# Payments
+# ==========================
+# Every invoice carries its running amount_paid and a generated balance
+# column (invoice_amount - amount_paid). The trg_payment_* triggers move
+# amount_paid in the same transaction as the Payments row, so one
+# invoice's balance is a primary-key lookup and the unpaid list is a
+# range scan of the covering idx_invoices_balance index; neither sums
+# the payment history. A single payment is one sp_record_payment call;
+# a batch is inserted in chunks, one transaction per chunk, with the
+# chunk's invoices locked in id order so concurrent batches cannot
+# deadlock on each other. reconcile() checks the running totals against
+# the Payments table.
+
+# Offered by the GUI; any non-empty method of up to 20 characters is accepted
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "Cash", "Online"]
+
+CHUNK_SIZE = 1000
+UNPAID_LIMIT = 1000
+MAX_REPORTED_REJECTS = 20
+CENTS = Decimal("0.01")
+# Payments.payment_method is VARCHAR(20)
+MAX_METHOD_LENGTH = 20
+
+
+def parse_payment(invoice_id, amount, method, payment_date=None):
+    """Validate one payment; returns (invoice_id, payment_date, amount, method).
+
+    payment_date defaults to today. Raises ValueError with a message the
+    GUI can show as is.
+    """
+    try:
+        invoice_id = int(str(invoice_id).strip())
+    except ValueError:
+        raise ValueError("Invoice ID must be a number.") from None
+    try:
+        amount = Decimal(str(amount).strip())
+    except InvalidOperation:
+        raise ValueError("Amount must be a number.") from None
+    if not amount.is_finite() or amount <= 0:
+        raise ValueError("Payment amount must be positive.")
+    if amount != amount.quantize(CENTS):
+        raise ValueError("Amount cannot have more than two decimal places.")
+    method = str(method or "").strip()
+    if not method:
+        raise ValueError("Enter a payment method.")
+    if len(method) > MAX_METHOD_LENGTH:
+        raise ValueError(f"Payment method cannot be longer than {MAX_METHOD_LENGTH} characters.")
+    if payment_date in (None, ""):
+        payment_date = date.today()
+    elif not isinstance(payment_date, date):
+        try:
+            payment_date = date.fromisoformat(str(payment_date).strip())
+        except ValueError:
+            raise ValueError("Payment date must be YYYY-MM-DD.") from None
+    return invoice_id, payment_date, amount, method
+
+
+def record_payment(invoice_id, amount, method, payment_date=None):
+    """Record a payment against an invoice in one sp_record_payment call.
+
+    payment_date defaults to today. Returns a dict with payment_id,
+    invoice_id, invoice_amount, total_paid and balance.
+    """
+    invoice_id, payment_date, amount, method = parse_payment(invoice_id, amount, method, payment_date)
+    return procedures.call("sp_record_payment", invoice_id, amount, method, payment_date)
+
+
+def _record_chunk(tx, rows):
+    """Insert one chunk of parsed payments; returns (inserted_rows, unknown_rows, settled)."""
+    invoice_ids = sorted({row[0] for row in rows})
+    placeholders = ", ".join(["%s"] * len(invoice_ids))
+
+    # Lock the invoices up front, always in id order
+    balances = dict(tx.lock(
+        f"SELECT invoice_id, balance FROM Invoices WHERE invoice_id IN ({placeholders}) "
+        f"ORDER BY invoice_id FOR UPDATE",
+        invoice_ids
+    ))
+    found = set(balances)
+
+    known = [row for row in rows if row[0] in found]
+    unknown = [row for row in rows if row[0] not in found]
+    # Only invoices this chunk took from owing something to nothing count as settled
+    owing = sorted({row[0] for row in known if balances[row[0]] > 0})
+    settled = 0
+    if known:
+        tx.cursor.executemany(statements.sql("insert_payment"), known)
+    if owing:
+        tx.execute(
+            f"SELECT COUNT(*) FROM Invoices WHERE invoice_id IN ({', '.join(['%s'] * len(owing))}) "
+            f"AND balance <= 0",
+            owing
+        )
+        settled = tx.cursor.fetchone()[0]
+    return known, unknown, settled
+
+
+def record_payments(records, chunk_size=CHUNK_SIZE, progress=None):
+    """Record a batch of payments given as dicts (see bulk_import's payments spec).
+
+    Each record needs invoice_id, amount and payment_method; payment_date
+    defaults to today. Invalid records and unknown invoices are rejected
+    and reported; the rest are committed one chunk per transaction.
+    Returns a stats dict: read, recorded, rejected, rejects, amount,
+    settled (invoices the batch took from owing something to nothing),
+    seconds and rows_per_second.
+    """
+    stats = {"read": 0, "recorded": 0, "rejected": 0, "rejects": [],
+             "amount": Decimal("0.00"), "settled": 0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    def reject(record, reason):
+        stats["rejected"] += 1
+        if len(stats["rejects"]) < MAX_REPORTED_REJECTS:
+            stats["rejects"].append((record, reason))
+
+    for chunk in chunked(records, chunk_size):
+        stats["read"] += len(chunk)
+        rows, sources = [], {}
+        for record in chunk:
+            try:
+                row = parse_payment(
+                    record.get("invoice_id"),
+                    record.get("amount"),
+                    record.get("payment_method"),
+                    record.get("payment_date")
+                )
+            except ValueError as e:
+                reject(record, str(e))
+                continue
+            rows.append(row)
+            sources[id(row)] = record
+
+        if rows:
+            known, unknown, settled = run_transaction("record_payments", _record_chunk, rows)
+            for row in unknown:
+                reject(sources[id(row)], f"unknown invoice_id {row[0]}")
+            stats["recorded"] += len(known)
+            stats["amount"] += sum((row[2] for row in known), Decimal("0.00"))
+            stats["settled"] += settled
+
+        stats["seconds"] = time.perf_counter() - started
+        if progress is not None:
+            progress(stats)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["recorded"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def import_payments(path, chunk_size=CHUNK_SIZE, progress=None):
+    """record_payments() over a CSV or JSON-lines file."""
+    return record_payments(read_records(path), chunk_size, progress)
+
+
+# ==========================
+# Balances
+# ==========================
+
+def invoice_balance(invoice_id):
+    """One invoice as a dict (invoice_id, rental_id, invoice_amount, amount_paid, balance), or None."""
+    columns, rows = statements.fetch("invoice_balance", (int(invoice_id),))
+    return dict(zip(columns, rows[0])) if rows else None
+
+
+def invoice_payments(invoice_id):
+    """(column_names, rows) of an invoice's payments, oldest first."""
+    return statements.fetch("invoice_payments", (int(invoice_id),))
+
+
+def unpaid_invoices(limit=UNPAID_LIMIT):
+    """(column_names, rows) of invoices with a balance left, largest balance first."""
+    return statements.fetch("unpaid_invoices", (int(limit),))
+
+
+# ==========================
+# Reconciliation
+# ==========================
+
+def reconcile(fix=False):
+    """Compare every invoice's amount_paid with the sum of its payments.
+
+    Returns the mismatches as (invoice_id, amount_paid, payments_total).
+    With fix=True each mismatched invoice's amount_paid is recomputed
+    from its payments.
+    """
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT i.invoice_id, i.amount_paid, IFNULL(p.paid, 0)
+            FROM Invoices i
+            LEFT JOIN (
+                SELECT invoice_id, ROUND(SUM(amount), 2) AS paid
+                FROM Payments
+                GROUP BY invoice_id
+            ) p ON p.invoice_id = i.invoice_id
+            WHERE i.amount_paid <> IFNULL(p.paid, 0)
+            ORDER BY i.invoice_id
+            """
+        )
+        mismatches = cursor.fetchall()
+        cursor.close()
+        if fix:
+            for invoice_id, _, _ in mismatches:
+                statements.run(conn, "recompute_amount_paid", (invoice_id, invoice_id))
+            conn.commit()
+    finally:
+        conn.close()
+    return mismatches
+
+
+# ==========================
+# Command Line
+# ==========================
+
+def print_progress(stats):
+    rate = stats["recorded"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"  {stats['read']:>10} read  {stats['recorded']:>10} recorded  "
+        f"{stats['rejected']:>6} rejected  {rate:,.0f} rows/s",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record payments and inspect invoice balances.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record one payment")
+    record.add_argument("invoice_id", type=int)
+    record.add_argument("amount")
+    record.add_argument("method")
+    record.add_argument("--date", help="payment date, YYYY-MM-DD (default: today)")
+    batch = commands.add_parser("import", help="record payments from a CSV or JSON-lines file")
+    batch.add_argument("path", help="input file (.csv, .jsonl, optionally .gz) or - for stdin")
+    batch.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    balance = commands.add_parser("balance", help="show one invoice's balance and payments")
+    balance.add_argument("invoice_id", type=int)
+    unpaid = commands.add_parser("unpaid", help="list invoices with a balance left")
+    unpaid.add_argument("--limit", type=int, default=UNPAID_LIMIT)
+    check = commands.add_parser("reconcile", help="check amount_paid against the Payments table")
+    check.add_argument("--fix", action="store_true", help="recompute the mismatched totals")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "record":
+            result = record_payment(args.invoice_id, args.amount, args.method, args.date)
+            print(f"Payment #{result['payment_id']}: invoice {result['invoice_id']} "
+                  f"paid {result['total_paid']} of {result['invoice_amount']}, "
+                  f"balance {result['balance']}")
+        elif args.command == "import":
+            stats = import_payments(args.path, args.chunk_size, print_progress)
+            print(f"Recorded {stats['recorded']} of {stats['read']} payments "
+                  f"({stats['amount']:,.2f}) in {stats['seconds']:.2f}s, "
+                  f"{stats['settled']} invoices settled, {stats['rejected']} rejected")
+            for record, reason in stats["rejects"]:
+                print(f"  rejected: {reason}: {record}")
+            return 0 if stats["rejected"] == 0 else 1
+        elif args.command == "balance":
+            invoice = invoice_balance(args.invoice_id)
+            if invoice is None:
+                raise ValueError("Invoice not found.")
+            print(f"Invoice {invoice['invoice_id']} (rental {invoice['rental_id']}): "
+                  f"{invoice['amount_paid']} of {invoice['invoice_amount']} paid, "
+                  f"balance {invoice['balance']}")
+            for payment_id, paid_on, amount, method in invoice_payments(args.invoice_id)[1]:
+                print(f"  #{payment_id} {paid_on} {amount:>10} {method}")
+        elif args.command == "unpaid":
+            for invoice_id, rental_id, amount, paid, left in unpaid_invoices(args.limit)[1]:
+                print(f"{invoice_id:>10} rental {rental_id:<10} {paid:>12} of {amount:>12}  "
+                      f"balance {left}")
+        else:
+            mismatches = reconcile(args.fix)
+            for invoice_id, paid, total in mismatches:
+                print(f"  invoice {invoice_id}: amount_paid {paid}, payments {total}")
+            verb = "Fixed" if args.fix else "Found"
+            print(f"{verb} {len(mismatches)} mismatched invoices")
+            return 1 if mismatches and not args.fix else 0
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
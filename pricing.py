@@ -0,0 +1,190 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from db_pool import connect_db
+
+
+# ==========================
+# Pricing Rules
+# ==========================
+# One set of rules for estimates, new rentals, date changes and bulk
+# re-pricing:
+#   * a rental is billed for (end - start) days, at least one day, so a
+#     same-day rental costs one day (as trg_after_rental_insert does);
+#   * an end date before the start date is rejected;
+#   * each billed day costs car_price times that day's multiplier, which
+#     is WEEKEND_MULTIPLIER on Saturdays/Sundays and the product of every
+#     season covering the day.
+#   * a total is car_price times the rental's rate-weighted day count
+#     (kept to RATE_DAYS_PLACES decimals), rounded half up to the cent.
+#     price_cents() is the only place that rounds: estimates, bookings,
+#     the SQLite stand-ins and re-pricing all use it, and the stored
+#     procedures store the total they are given instead of rounding in
+#     SQL (MySQL ROUND() on DECIMAL rounds half up, but np.round and
+#     Decimal.quantize round half to even, so they disagreed by a cent).
+# With the defaults below every multiplier is 1.0 and totals equal the
+# trigger's car_price * days; when rates are configured, services.py
+# writes the engine's total over the trigger's amount.
+
+WEEKEND_MULTIPLIER = 1.0
+RATE_DAYS_PLACES = 4
+
+# (name, first "MM-DD", last "MM-DD" inclusive, multiplier); a season may
+# wrap around the new year, e.g. ("Holidays", "12-20", "01-05", 1.25).
+SEASONS = []
+
+
+class RateTable:
+    """Weekend and seasonal day multipliers, evaluated over NumPy day arrays."""
+
+    def __init__(self, weekend_multiplier=WEEKEND_MULTIPLIER, seasons=None):
+        self.weekend_multiplier = float(weekend_multiplier)
+        self.seasons = [
+            (name, _month_day(first), _month_day(last), float(multiplier))
+            for name, first, last, multiplier in (SEASONS if seasons is None else seasons)
+        ]
+
+    def is_flat(self):
+        """True when every day costs exactly the car's daily rate."""
+        return self.weekend_multiplier == 1.0 and all(s[3] == 1.0 for s in self.seasons)
+
+    def multipliers(self, days):
+        """Multiplier for each datetime64[D] in days."""
+        result = np.ones(days.shape, dtype=np.float64)
+        if self.weekend_multiplier != 1.0:
+            # 1970-01-01 was a Thursday, so Monday == 0
+            weekday = (days.astype(np.int64) + 3) % 7
+            result[weekday >= 5] *= self.weekend_multiplier
+
+        if self.seasons:
+            months = days.astype("datetime64[M]")
+            month_day = (
+                (months.astype(np.int64) % 12 + 1) * 100
+                + (days - months.astype("datetime64[D]")).astype(np.int64) + 1
+            )
+            for _, first, last, multiplier in self.seasons:
+                if first <= last:
+                    in_season = (month_day >= first) & (month_day <= last)
+                else:
+                    in_season = (month_day >= first) | (month_day <= last)
+                result[in_season] *= multiplier
+        return result
+
+
+def _month_day(text):
+    month, day = (int(part) for part in text.split("-"))
+    return month * 100 + day
+
+
+RATES = RateTable()
+
+
+# ==========================
+# Vectorised Engine
+# ==========================
+
+def to_days(values):
+    """Dates or YYYY-MM-DD strings -> datetime64[D] array; ValueError on bad input."""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "M":
+        return values.astype("datetime64[D]")
+    values = [v.isoformat() if isinstance(v, date) else str(v).strip() for v in values]
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format.") from None
+
+
+def billable_days(starts, ends, strict=True):
+    """Return (start_days, days) arrays for the given date sequences.
+
+    With strict=False an end before the start is billed as one day, the
+    way the invoice trigger treats it, instead of raising ValueError.
+    """
+    start_days, end_days = to_days(starts), to_days(ends)
+    raw = (end_days - start_days).astype(np.int64)
+    if strict and (raw < 0).any():
+        bad = int(np.argmax(raw < 0))
+        raise ValueError(
+            f"End date cannot be before start date ({start_days[bad]} to {end_days[bad]})."
+        )
+    return start_days, np.maximum(raw, 1)
+
+
+def price_cents(daily_rates, weighted_days):
+    """Totals in whole cents (int64) for daily rates and rate-weighted day counts.
+
+    weighted_days are taken to RATE_DAYS_PLACES decimals and each
+    product is rounded half up, in integer arithmetic so that no float
+    rounding creeps in.
+    """
+    scale = 10 ** RATE_DAYS_PLACES
+    rate_cents = np.round(np.asarray(daily_rates, dtype=np.float64) * 100).astype(np.int64)
+    weighted = np.round(np.asarray(weighted_days, dtype=np.float64) * scale).astype(np.int64)
+    return (rate_cents * weighted + scale // 2) // scale
+
+
+def price_rentals(daily_rates, starts, ends, rates=None, strict=True):
+    """Price many rentals at once; returns (days, totals) NumPy arrays.
+
+    Per-day multipliers are laid out once over the whole date span and
+    summed with a cumulative sum, so the cost is O(rentals + days spanned)
+    however long the individual rentals are.
+    """
+    rates = RATES if rates is None else rates
+    daily_rates = np.asarray(daily_rates, dtype=np.float64)
+    start_days, days = billable_days(starts, ends, strict)
+    if not len(days):
+        return days, np.zeros(0)
+    return days, price_cents(daily_rates, _weighted_days(start_days, days, rates)) / 100
+
+
+def _weighted_days(start_days, days, rates):
+    """Sum of the day multipliers over each rental."""
+    if rates.is_flat():
+        return days.astype(np.float64)
+    first = start_days.min()
+    offsets = (start_days - first).astype(np.int64)
+    calendar = first + np.arange(int((offsets + days).max()))
+    cumulative = np.concatenate(([0.0], np.cumsum(rates.multipliers(calendar))))
+    return cumulative[offsets + days] - cumulative[offsets]
+
+
+def quote(daily_rate, start, end, rates=None):
+    """Price one rental; returns (days, total), total a Decimal with two places."""
+    rates = RATES if rates is None else rates
+    start_days, days = billable_days([start], [end])
+    cents = price_cents([float(daily_rate)], _weighted_days(start_days, days, rates))
+    return int(days[0]), Decimal(int(cents[0])).scaleb(-2)
+
+
+def daily_rates(car_ids):
+    """car_price for each car_id, aligned with the input; ValueError if any is unknown."""
+    car_ids = [int(car_id) for car_id in car_ids]
+    unique = sorted(set(car_ids))
+    if not unique:
+        return np.zeros(0)
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        placeholders = ", ".join(["%s"] * len(unique))
+        cursor.execute(
+            f"SELECT car_id, car_price FROM Cars WHERE car_id IN ({placeholders})",
+            unique
+        )
+        prices = dict(cursor.fetchall())
+        cursor.close()
+    finally:
+        conn.close()
+
+    missing = [car_id for car_id in unique if car_id not in prices]
+    if missing:
+        raise ValueError(f"Unknown car_id {missing[0]}")
+    return np.array([float(prices[car_id]) for car_id in car_ids])
+
+
+def price_cars(car_ids, starts, ends, rates=None, strict=True):
+    """price_rentals() for car ids, looking their daily rates up in one query."""
+    return price_rentals(daily_rates(car_ids), starts, ends, rates, strict)
@@ -0,0 +1,174 @@
+from datetime import date
+from decimal import Decimal
+
+import mysql.connector
+
+from availability import booking_range
+from backends import sqlite_procedure
+from statements import sql
+from transactions import run_procedure
+
+
+# ==========================
+# Stored Procedures
+# ==========================
+# sp_create_rental, sp_update_rental and sp_record_payment (create.sql)
+# each run a whole write on the server: checks, statements and the
+# transaction, ending with a one-row summary. call() makes that a single
+# CALL from the client instead of one round trip per statement.
+# Validation failures are SIGNALled as SQLSTATE 45000 and re-raised here
+# as ValueError, the error type services.py uses. The SQLite backend has
+# no stored procedures, so the stand-ins below do the same work through
+# its cursor.
+# The booking procedures take the total priced by pricing.quote() and the
+# car_price it was priced from; they refuse with PRICE_CHANGED when the
+# locked car_price differs, and services.py re-prices and retries.
+
+ER_SIGNAL_EXCEPTION = 1644
+PRICE_CHANGED = "Car price changed."
+
+
+def call(procedure, *args):
+    """CALL procedure(*args); returns its summary row as a dict (None if it returned none)."""
+    try:
+        results = run_procedure(procedure, args)
+    except mysql.connector.Error as e:
+        if e.errno == ER_SIGNAL_EXCEPTION:
+            raise ValueError(e.msg) from None
+        raise
+    for columns, rows in results:
+        if rows:
+            return dict(zip(columns, rows[0]))
+    return None
+
+
+def booked_error(car_id, conflicts):
+    booked = ", ".join(
+        f"#{other_id} ({other_start} to {other_end})"
+        for other_start, other_end, other_id in conflicts
+    )
+    return ValueError(f"Car {car_id} is already booked: {booked}")
+
+
+# ==========================
+# SQLite Stand-ins
+# ==========================
+
+def _in_transaction(cursor, body, *args):
+    conn = cursor.connection
+    conn.start_transaction()
+    try:
+        result = body(cursor, *args)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return result
+
+
+def _fetchone(cursor, query, params):
+    cursor.execute(query, params)
+    return cursor.fetchone()
+
+
+def _check_overlap(cursor, car_id, start, end, rental_id=None):
+    first, last = booking_range(start, end)
+    cursor.execute(sql("car_conflicts"), (car_id, last, first, rental_id or 0))
+    conflicts = cursor.fetchall()
+    if conflicts:
+        raise booked_error(car_id, conflicts)
+
+
+def _days(start, end):
+    return max((date.fromisoformat(str(end)) - date.fromisoformat(str(start))).days, 1)
+
+
+def _check_price(price, car_price):
+    if price != Decimal(str(car_price)):
+        raise ValueError(PRICE_CHANGED)
+
+
+@sqlite_procedure("sp_create_rental")
+def _sp_create_rental(cursor, customer_id, car_id, start, end, car_price, total):
+    def body(cursor):
+        customer = _fetchone(
+            cursor, "SELECT first_name, last_name FROM Customers WHERE customer_id = %s", (customer_id,)
+        )
+        if customer is None:
+            raise ValueError("Customer not found.")
+        car = _fetchone(cursor, "SELECT car_type, car_price FROM Cars WHERE car_id = %s", (car_id,))
+        if car is None:
+            raise ValueError("Car not found.")
+        _check_price(car[1], car_price)
+        _check_overlap(cursor, car_id, start, end)
+
+        cursor.execute(
+            "INSERT INTO Rentals (customer_id, car_id, rental_start_date, rental_end_date) "
+            "VALUES (%s, %s, %s, %s)",
+            (customer_id, car_id, start, end)
+        )
+        rental_id = cursor.lastrowid
+        days = _days(start, end)
+        if total != car[1] * days:
+            cursor.execute(
+                "UPDATE Invoices SET invoice_amount = %s WHERE rental_id = %s", (total, rental_id)
+            )
+        return [(
+            ["rental_id", "customer_name", "car_type", "days", "total"],
+            [(rental_id, f"{customer[0]} {customer[1]}", car[0], days, total)]
+        )]
+
+    return _in_transaction(cursor, body)
+
+
+@sqlite_procedure("sp_update_rental")
+def _sp_update_rental(cursor, rental_id, start, end, car_price, total):
+    def body(cursor):
+        row = _fetchone(
+            cursor,
+            "SELECT r.car_id, c.car_price FROM Rentals r JOIN Cars c ON c.car_id = r.car_id "
+            "WHERE r.rental_id = %s",
+            (rental_id,)
+        )
+        if row is None:
+            raise ValueError("Rental or car not found.")
+        car_id, price = row
+        _check_price(price, car_price)
+        _check_overlap(cursor, car_id, start, end, rental_id)
+
+        cursor.execute(
+            "UPDATE Rentals SET rental_start_date = %s, rental_end_date = %s WHERE rental_id = %s",
+            (start, end, rental_id)
+        )
+        days = _days(start, end)
+        cursor.execute("UPDATE Invoices SET invoice_amount = %s WHERE rental_id = %s", (total, rental_id))
+        return [(["rental_id", "car_id", "days", "total"], [(rental_id, car_id, days, total)])]
+
+    return _in_transaction(cursor, body)
+
+
+@sqlite_procedure("sp_record_payment")
+def _sp_record_payment(cursor, invoice_id, amount, method, payment_date):
+    if amount is None or Decimal(str(amount)) <= 0:
+        raise ValueError("Payment amount must be positive.")
+
+    def body(cursor):
+        invoice = _fetchone(cursor, "SELECT invoice_amount FROM Invoices WHERE invoice_id = %s", (invoice_id,))
+        if invoice is None:
+            raise ValueError("Invoice not found.")
+        cursor.execute(
+            "INSERT INTO Payments (invoice_id, payment_date, amount, payment_method) "
+            "VALUES (%s, %s, %s, %s)",
+            (invoice_id, payment_date or date.today(), amount, method)
+        )
+        payment_id = cursor.lastrowid
+        # trg_payment_insert has already added the amount
+        paid, balance = _fetchone(
+            cursor, "SELECT amount_paid, balance FROM Invoices WHERE invoice_id = %s", (invoice_id,)
+        )
+        return [(
+            ["payment_id", "invoice_id", "invoice_amount", "total_paid", "balance"],
+            [(payment_id, invoice_id, invoice[0], paid, balance)]
+        )]
+
+    return _in_transaction(cursor, body)
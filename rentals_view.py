@@ -0,0 +1,241 @@
+from changefeed import sortable
+from db_pool import connect_db
+
+
+# ==========================
+# Rentals Query Engine
+# ==========================
+# Builds the "View All Rentals" query server-side: filters become WHERE
+# clauses, the chosen column becomes ORDER BY, and pages are fetched by
+# keyset (last seen sort value + rental_id) so every page costs the same
+# however deep into the history the user scrolls.
+# Only the hot Rentals table is read unless include_archive is set; then
+# each page is the merge of one keyset page from Rentals and one from
+# RentalsArchive (see archive.py), each still using its own indexes and,
+# on MySQL, pruned to the archive partitions the date filters allow.
+# The matching row count is not read with each page: a full COUNT(*)
+# over the join costs more than the page itself, so it runs only when
+# the user asks for it (RentalsSource.count). Every reader takes a
+# connect function, so a branch client can page its replica instead.
+
+RENTAL_COLUMNS = [
+    ("rental_id", "Rentals.rental_id"),
+    ("first_name", "Customers.first_name"),
+    ("last_name", "Customers.last_name"),
+    ("car_type", "Cars.car_type"),
+    ("rental_start_date", "Rentals.rental_start_date"),
+    ("rental_end_date", "Rentals.rental_end_date")
+]
+SORT_EXPRESSIONS = dict(RENTAL_COLUMNS)
+COLUMN_INDEX = {name: i for i, (name, _) in enumerate(RENTAL_COLUMNS)}
+
+RENTALS_FROM = """
+    FROM Rentals
+    JOIN Customers ON Rentals.customer_id = Customers.customer_id
+    JOIN Cars ON Rentals.car_id = Cars.car_id
+"""
+# The archive is read under the hot table's name, so every column
+# expression and filter applies to both tiers unchanged
+ARCHIVE_FROM = RENTALS_FROM.replace("FROM Rentals", "FROM RentalsArchive AS Rentals")
+
+
+def _tiers(include_archive):
+    return [RENTALS_FROM, ARCHIVE_FROM] if include_archive else [RENTALS_FROM]
+
+
+def build_filters(filters):
+    """Translate a filter dict into WHERE conditions and parameters.
+
+    Supported keys: start_from, start_to (rental_start_date range),
+    customer (customer_id if numeric, otherwise a last-name prefix)
+    and car_type (exact match). Empty values are ignored.
+    """
+    conditions = []
+    params = []
+    filters = filters or {}
+
+    if filters.get("start_from"):
+        conditions.append("Rentals.rental_start_date >= %s")
+        params.append(filters["start_from"])
+    if filters.get("start_to"):
+        conditions.append("Rentals.rental_start_date <= %s")
+        params.append(filters["start_to"])
+
+    customer = (filters.get("customer") or "").strip()
+    if customer.isdigit():
+        conditions.append("Rentals.customer_id = %s")
+        params.append(int(customer))
+    elif customer:
+        conditions.append("Customers.last_name LIKE %s")
+        params.append(f"{customer}%")
+
+    if filters.get("car_type"):
+        conditions.append("Cars.car_type = %s")
+        params.append(filters["car_type"])
+
+    return conditions, params
+
+
+def build_rentals_query(filters=None, sort="rental_id", descending=False,
+                        after=None, limit=200, include_archive=False):
+    """Return (sql, params) for one keyset page of the rentals view.
+
+    `after` is the (sort_value, rental_id) pair of the last row already
+    shown; rows strictly beyond it in the requested order are returned.
+    """
+    if sort not in SORT_EXPRESSIONS:
+        raise ValueError(f"Cannot sort rentals by {sort!r}")
+
+    sort_expr = SORT_EXPRESSIONS[sort]
+    direction = "DESC" if descending else "ASC"
+    cmp = "<" if descending else ">"
+
+    conditions, params = build_filters(filters)
+
+    if after is not None:
+        sort_value, rental_id = after
+        if sort == "rental_id":
+            conditions.append(f"Rentals.rental_id {cmp} %s")
+            params.append(rental_id)
+        else:
+            conditions.append(
+                f"({sort_expr} {cmp} %s OR ({sort_expr} = %s AND Rentals.rental_id {cmp} %s))"
+            )
+            params.extend([sort_value, sort_value, rental_id])
+
+    select_list = ",\n        ".join(expr for _, expr in RENTAL_COLUMNS)
+    order = f"{sort_expr} {direction}"
+    if sort != "rental_id":
+        order += f", Rentals.rental_id {direction}"
+
+    pages = []
+    for source in _tiers(include_archive):
+        sql = f"SELECT\n        {select_list}{source}"
+        if conditions:
+            sql += "WHERE " + "\n      AND ".join(conditions) + "\n"
+        pages.append(sql + f"ORDER BY {order}\nLIMIT %s")
+    if len(pages) == 1:
+        return pages[0], params + [limit]
+
+    # Merge the tiers' pages; the outer ORDER BY uses the output column names
+    merged_order = f"{sort} {direction}"
+    if sort != "rental_id":
+        merged_order += f", rental_id {direction}"
+    sql = (
+        f"SELECT * FROM ({pages[0]}) AS hot_rentals\n"
+        f"UNION ALL\n"
+        f"SELECT * FROM ({pages[1]}) AS archived_rentals\n"
+        f"ORDER BY {merged_order}\nLIMIT %s"
+    )
+    return sql, params + [limit] + params + [limit] + [limit]
+
+
+def count_rentals(filters=None, include_archive=False, connect=connect_db):
+    """Count the rentals matching the filters."""
+    conditions, params = build_filters(filters)
+    total = 0
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        for source in _tiers(include_archive):
+            sql = f"SELECT COUNT(*) {source}"
+            if conditions:
+                sql += "WHERE " + " AND ".join(conditions)
+            cursor.execute(sql, params)
+            total += cursor.fetchone()[0]
+        cursor.close()
+        return total
+    finally:
+        conn.close()
+
+
+def fetch_rentals_page(filters=None, sort="rental_id", descending=False,
+                       after=None, limit=200, include_archive=False, connect=connect_db):
+    """Fetch one keyset page; returns (column_names, rows)."""
+    sql, params = build_rentals_query(filters, sort, descending, after, limit, include_archive)
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return [name for name, _ in RENTAL_COLUMNS], rows
+    finally:
+        conn.close()
+
+
+def fetch_rentals_by_id(filters, rental_ids, include_archive=False, connect=connect_db):
+    """The given rentals that match the filters, as view rows in rental_id order.
+
+    With include_archive a rental that has just been archived is found
+    in the archive instead of being reported as gone.
+    """
+    if not rental_ids:
+        return []
+    conditions, params = build_filters(filters)
+    conditions.append(f"Rentals.rental_id IN ({', '.join(['%s'] * len(rental_ids))})")
+    params += [int(rental_id) for rental_id in rental_ids]
+    select_list = ",\n        ".join(expr for _, expr in RENTAL_COLUMNS)
+    rows = []
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        for source in _tiers(include_archive):
+            cursor.execute(
+                f"SELECT\n        {select_list}{source}"
+                f"WHERE " + "\n      AND ".join(conditions) + "\nORDER BY Rentals.rental_id",
+                params
+            )
+            rows += cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return sorted(rows, key=lambda row: row[COLUMN_INDEX["rental_id"]])
+
+
+class RentalsSource:
+    """Keyset page source for PagedTreeview over the rentals join."""
+
+    def __init__(self, filters=None, sort="rental_id", descending=False, include_archive=False,
+                 connect=connect_db):
+        self.filters = dict(filters or {})
+        self.sort = sort
+        self.descending = descending
+        self.include_archive = include_archive
+        self.connect = connect
+
+    def _key(self, row):
+        return row[COLUMN_INDEX[self.sort]], row[COLUMN_INDEX["rental_id"]]
+
+    def sort_key(self, row):
+        """Display-order key of a row (see changefeed.sortable)."""
+        return sortable(row[COLUMN_INDEX[self.sort]]), sortable(row[COLUMN_INDEX["rental_id"]])
+
+    def rows_by_id(self, rental_ids, key="rental_id"):
+        """Current rows for changed rentals, dropping those the filters exclude."""
+        return fetch_rentals_by_id(self.filters, rental_ids, self.include_archive, self.connect)
+
+    def first(self, limit):
+        """First page; the total is known only when it is the last page too."""
+        cols, rows = fetch_rentals_page(
+            self.filters, self.sort, self.descending, None, limit, self.include_archive,
+            self.connect
+        )
+        return cols, rows, len(rows) if len(rows) < limit else None
+
+    def count(self):
+        return count_rentals(self.filters, self.include_archive, self.connect)
+
+    def after(self, offset, last_row, limit):
+        return fetch_rentals_page(
+            self.filters, self.sort, self.descending, self._key(last_row), limit,
+            self.include_archive, self.connect
+        )[1]
+
+    def before(self, offset, first_row, limit):
+        # Walk backwards by flipping the order, then restore display order.
+        rows = fetch_rentals_page(
+            self.filters, self.sort, not self.descending, self._key(first_row), limit,
+            self.include_archive, self.connect
+        )[1]
+        return list(reversed(rows))
@@ -0,0 +1,165 @@
+# ==========================
+# Report Queries
+# ==========================
+# Shared by the Reports tab and the export tool.
+
+BASE_TABLES = ["Customers", "Cars", "Rentals", "Invoices", "Payments"]
+
+REPORT_QUERIES = {
+    "All Customers": "SELECT * FROM Customers",
+    "All Cars": "SELECT * FROM Cars",
+    "All Rentals": "SELECT * FROM Rentals",
+    "All Invoices": "SELECT * FROM Invoices",
+    "All Payments": "SELECT * FROM Payments",
+    # The aggregate reports read the trigger-maintained summary tables
+    # (see create.sql) instead of grouping the full history on every click.
+    # The summaries count both tiers, so the hot tier's share is what is
+    # left after subtracting the archive summaries; ROUND only drops the
+    # float noise SQLite's subtraction can add.
+    "Total Earnings per Car": """
+        SELECT
+            Cars.car_id,
+            Cars.car_type,
+            ROUND(s.total_earnings - IFNULL(a.total_earnings, 0), 2) AS TotalEarnings
+        FROM CarRentalSummary s
+        JOIN Cars ON Cars.car_id = s.car_id
+        LEFT JOIN ArchiveCarSummary a ON a.car_id = s.car_id
+        WHERE s.rental_count > IFNULL(a.rental_count, 0)
+        ORDER BY Cars.car_id
+    """,
+    "Total Rentals per Customer": """
+        SELECT
+            Customers.customer_id,
+            Customers.first_name,
+            Customers.last_name,
+            s.rental_count - IFNULL(a.rental_count, 0) AS TotalRentals
+        FROM CustomerRentalSummary s
+        JOIN Customers ON Customers.customer_id = s.customer_id
+        LEFT JOIN ArchiveCustomerSummary a ON a.customer_id = s.customer_id
+        WHERE s.rental_count > IFNULL(a.rental_count, 0)
+        ORDER BY Customers.customer_id
+    """,
+    "Most Rented Cars": """
+        SELECT
+            Cars.car_id,
+            Cars.car_type,
+            s.rental_count - IFNULL(a.rental_count, 0) AS NumberOfRentals
+        FROM CarRentalSummary s
+        JOIN Cars ON Cars.car_id = s.car_id
+        LEFT JOIN ArchiveCarSummary a ON a.car_id = s.car_id
+        WHERE s.rental_count > IFNULL(a.rental_count, 0)
+        ORDER BY NumberOfRentals DESC, Cars.car_id
+    """,
+    # amount_paid and balance are kept on Invoices by the trg_payment_* triggers
+    "Invoice Payment Status": """
+        SELECT
+            invoice_id,
+            rental_id,
+            invoice_amount,
+            amount_paid AS total_paid,
+            balance
+        FROM Invoices
+        ORDER BY invoice_id
+    """,
+    # A range scan of idx_invoices_balance, which covers every column
+    "Unpaid Invoices": """
+        SELECT
+            invoice_id,
+            rental_id,
+            invoice_amount,
+            amount_paid,
+            balance
+        FROM Invoices
+        WHERE balance > 0
+        ORDER BY balance DESC
+    """
+}
+
+# ----- archive tier -----
+# By default the queries above read only the hot tables, which hold the
+# active period; archive.py moves closed, paid-up rentals (with their
+# invoices and payments) to the archive tables. These variants add the
+# archive with UNION ALL. The summary tables keep counting archived
+# rentals, so the aggregate variants are the summaries as they stand, and
+# archived invoices are settled, so "Unpaid Invoices" needs no variant.
+
+ARCHIVE_TABLES = {
+    "Rentals": ("RentalsArchive", "rental_id, customer_id, car_id, rental_start_date, rental_end_date"),
+    "Invoices": ("InvoicesArchive", "invoice_id, rental_id, invoice_amount, amount_paid, balance"),
+    "Payments": ("PaymentsArchive", "payment_id, invoice_id, payment_date, amount, payment_method")
+}
+
+
+def with_archive(table):
+    """SELECT every row of a base table from both tiers, in primary key order."""
+    archive, columns = ARCHIVE_TABLES[table]
+    key = columns.split(",")[0]
+    return (
+        f"SELECT {columns} FROM {table} "
+        f"UNION ALL SELECT {columns} FROM {archive} "
+        f"ORDER BY {key}"
+    )
+
+
+ARCHIVE_REPORT_QUERIES = {
+    "Total Earnings per Car": """
+        SELECT
+            Cars.car_id,
+            Cars.car_type,
+            s.total_earnings AS TotalEarnings
+        FROM CarRentalSummary s
+        JOIN Cars ON Cars.car_id = s.car_id
+        WHERE s.rental_count > 0
+        ORDER BY Cars.car_id
+    """,
+    "Total Rentals per Customer": """
+        SELECT
+            Customers.customer_id,
+            Customers.first_name,
+            Customers.last_name,
+            s.rental_count AS TotalRentals
+        FROM CustomerRentalSummary s
+        JOIN Customers ON Customers.customer_id = s.customer_id
+        WHERE s.rental_count > 0
+        ORDER BY Customers.customer_id
+    """,
+    "Most Rented Cars": """
+        SELECT
+            Cars.car_id,
+            Cars.car_type,
+            s.rental_count AS NumberOfRentals
+        FROM CarRentalSummary s
+        JOIN Cars ON Cars.car_id = s.car_id
+        WHERE s.rental_count > 0
+        ORDER BY NumberOfRentals DESC, Cars.car_id
+    """,
+    "All Rentals": with_archive("Rentals"),
+    "All Invoices": with_archive("Invoices"),
+    "All Payments": with_archive("Payments"),
+    "Invoice Payment Status": """
+        SELECT invoice_id, rental_id, invoice_amount, amount_paid AS total_paid, balance
+        FROM Invoices
+        UNION ALL
+        SELECT invoice_id, rental_id, invoice_amount, amount_paid, balance
+        FROM InvoicesArchive
+        ORDER BY invoice_id
+    """
+}
+
+
+def report_query(label, include_archive=False):
+    """The SQL of a report, with the archive tier when include_archive is set."""
+    if include_archive and label in ARCHIVE_REPORT_QUERIES:
+        return ARCHIVE_REPORT_QUERIES[label]
+    return REPORT_QUERIES[label]
+
+
+# Buttons in the "List All Tables" and "Predefined Queries" rows
+TABLE_REPORTS = ["All Customers", "All Cars", "All Rentals", "All Invoices", "All Payments"]
+AGGREGATE_REPORTS = [
+    "Total Earnings per Car",
+    "Total Rentals per Customer",
+    "Most Rented Cars",
+    "Invoice Payment Status",
+    "Unpaid Invoices"
+]
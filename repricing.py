@@ -0,0 +1,216 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from db_pool import get_backend
+from pricing import price_rentals
+from transactions import run_transaction
+
+
+# ==========================
+# Invoice Re-pricing Job
+# ==========================
+# Recomputes invoice_amount for the rentals of one or more cars after a
+# price change. Rentals are read in rental_id order CHUNK_SIZE at a time,
+# priced in bulk by pricing.py, and only the invoices whose amount
+# changes are written back: the new amounts go into a temporary table
+# and one UPDATE ... JOIN (UPDATE ... FROM on SQLite) applies them,
+# committing once per chunk. Each chunk is read FOR UPDATE in the
+# transaction that writes it, so a rental whose dates change meanwhile
+# is either priced after the change or holds the change off until the
+# chunk commits; its new amount is never overwritten with a stale one.
+# By default only open rentals (ending today or later) are re-priced;
+# finished rentals keep what they were billed.
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_DIFFS = 50
+
+
+def _scope(car_ids, include_closed):
+    conditions, params = [], []
+    if car_ids:
+        conditions.append(f"r.car_id IN ({', '.join(['%s'] * len(car_ids))})")
+        params += [int(car_id) for car_id in car_ids]
+    if not include_closed:
+        conditions.append("r.rental_end_date >= CURDATE()")
+    return conditions, params
+
+
+def _read_chunk(tx, car_ids, include_closed, after_id, limit, lock):
+    conditions, params = _scope(car_ids, include_closed)
+    conditions.append("r.rental_id > %s")
+    return tx.execute(
+        f"""
+        SELECT r.rental_id, r.car_id, r.rental_start_date, r.rental_end_date,
+               c.car_price, i.invoice_id, i.invoice_amount
+        FROM Rentals r
+        JOIN Cars c ON c.car_id = r.car_id
+        JOIN Invoices i ON i.rental_id = r.rental_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY r.rental_id
+        LIMIT %s
+        """ + (" FOR UPDATE" if lock else ""),
+        params + [after_id, limit]
+    ).fetchall()
+
+
+def _apply(tx, invoice_ids, amounts):
+    cursor = tx.cursor
+    cursor.execute(
+        """
+        CREATE TEMPORARY TABLE IF NOT EXISTS RepriceBatch (
+            invoice_id     INT PRIMARY KEY,
+            invoice_amount DECIMAL(10,2) NOT NULL
+        )
+        """
+    )
+    cursor.execute("DELETE FROM RepriceBatch")
+    cursor.executemany(
+        "INSERT INTO RepriceBatch (invoice_id, invoice_amount) VALUES (%s, %s)",
+        [(int(i), f"{a:.2f}") for i, a in zip(invoice_ids, amounts)]
+    )
+    if get_backend().name == "sqlite":
+        cursor.execute(
+            """
+            UPDATE Invoices
+            SET invoice_amount = b.invoice_amount
+            FROM RepriceBatch b
+            WHERE b.invoice_id = Invoices.invoice_id
+            """
+        )
+    else:
+        cursor.execute(
+            """
+            UPDATE Invoices i
+            JOIN RepriceBatch b ON b.invoice_id = i.invoice_id
+            SET i.invoice_amount = b.invoice_amount
+            """
+        )
+
+
+def _reprice_chunk(tx, car_ids, include_closed, after_id, limit, dry_run):
+    """Price one chunk, writing the changes unless dry_run.
+
+    Returns (rows, old, new, changed): the chunk as read, its old and new
+    amounts and the indexes of the amounts that changed.
+    """
+    rows = _read_chunk(tx, car_ids, include_closed, after_id, limit, lock=not dry_run)
+    if not rows:
+        return rows, None, None, []
+    _, _, starts, ends, rates, invoice_ids, old = zip(*rows)
+    _, new = price_rentals([float(rate) for rate in rates], starts, ends, strict=False)
+    old = np.array([float(amount) for amount in old])
+    changed = np.flatnonzero(np.abs(new - old) >= 0.005)
+    if not dry_run and len(changed):
+        _apply(tx, [invoice_ids[i] for i in changed], new[changed])
+    return rows, old, new, changed
+
+
+def _tally(stats, rows, old, new, changed):
+    stats["scanned"] += len(rows)
+    stats["changed"] += len(changed)
+    stats["delta"] += float((new[changed] - old[changed]).sum())
+    for i in changed[:MAX_REPORTED_DIFFS - len(stats["diffs"])]:
+        stats["diffs"].append((rows[i][0], rows[i][1], float(old[i]), float(new[i])))
+
+
+def _new_stats():
+    return {"scanned": 0, "changed": 0, "delta": 0.0, "diffs": [], "seconds": 0.0}
+
+
+def reprice_in(tx, car_ids, include_closed=False, chunk_size=CHUNK_SIZE):
+    """Re-price the invoices of car_ids inside the caller's transaction tx.
+
+    For writes that must commit together with the re-pricing (a car's
+    price change); returns the same stats dict as reprice().
+    """
+    stats = _new_stats()
+    started = time.perf_counter()
+    after_id = 0
+    while True:
+        rows, old, new, changed = _reprice_chunk(
+            tx, car_ids, include_closed, after_id, chunk_size, False
+        )
+        if not rows:
+            break
+        after_id = rows[-1][0]
+        _tally(stats, rows, old, new, changed)
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def reprice(car_ids=None, include_closed=False, dry_run=False,
+            chunk_size=CHUNK_SIZE, progress=None):
+    """Re-price the invoices of car_ids (every car when None).
+
+    Returns a stats dict: scanned, changed, delta (sum of new - old),
+    seconds, rows_per_second and up to MAX_REPORTED_DIFFS diffs as
+    (rental_id, car_id, old_amount, new_amount). With dry_run nothing is
+    written and the stats describe what would change.
+    """
+    stats = _new_stats()
+    started = time.perf_counter()
+    after_id = 0
+
+    while True:
+        # A deadlock with a booking rolls back and retries this chunk only
+        rows, old, new, changed = run_transaction(
+            "reprice", _reprice_chunk, car_ids, include_closed, after_id,
+            chunk_size, dry_run, isolation_level="READ COMMITTED"
+        )
+        if not rows:
+            break
+        after_id = rows[-1][0]
+        _tally(stats, rows, old, new, changed)
+        stats["seconds"] = time.perf_counter() - started
+        if progress is not None:
+            progress(stats)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_second"] = stats["scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def print_progress(stats):
+    rate = stats["scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"  {stats['scanned']:>10} scanned  {stats['changed']:>10} changed  {rate:,.0f} rows/s",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recompute invoice amounts after car price changes."
+    )
+    parser.add_argument("car_ids", nargs="*", type=int, help="cars to re-price (default: all)")
+    parser.add_argument("--include-closed", action="store_true",
+                        help="also re-price rentals that have already ended")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes only")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    stats = reprice(
+        args.car_ids or None,
+        include_closed=args.include_closed,
+        dry_run=args.dry_run,
+        chunk_size=args.chunk_size,
+        progress=print_progress
+    )
+
+    for rental_id, car_id, old, new in stats["diffs"]:
+        print(f"  rental {rental_id} (car {car_id}): {old:.2f} -> {new:.2f}")
+    verb = "Would re-price" if args.dry_run else "Re-priced"
+    print(
+        f"{verb} {stats['changed']} of {stats['scanned']} invoices "
+        f"(total change {stats['delta']:+,.2f}) in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_second']:,.0f} rows/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+-- Local replica of RentalDB for offline branches (see offline.py).
+-- Holds Customers, Cars and the recent Rentals pulled from the central
+-- database, plus the durable outbox of writes waiting to be replayed
+-- there. Rows created while offline get negative ids until the central
+-- database assigns the real ones; ON UPDATE CASCADE carries the new ids
+-- into the rentals that reference them.
+
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS Customers (
+    customer_id INTEGER PRIMARY KEY,
+    first_name  VARCHAR(50)  NOT NULL COLLATE NOCASE,
+    last_name   VARCHAR(50)  NOT NULL COLLATE NOCASE,
+    email       VARCHAR(100) NOT NULL COLLATE NOCASE,
+    phone       VARCHAR(15)  COLLATE NOCASE
+);
+-- NOCASE columns let LIKE 'prefix%' use these indexes, as MySQL's
+-- case-insensitive collation does
+CREATE INDEX IF NOT EXISTS idx_customers_first_name ON Customers (first_name);
+CREATE INDEX IF NOT EXISTS idx_customers_last_name ON Customers (last_name);
+CREATE INDEX IF NOT EXISTS idx_customers_email ON Customers (email);
+CREATE INDEX IF NOT EXISTS idx_customers_phone ON Customers (phone);
+
+CREATE TABLE IF NOT EXISTS Cars (
+    car_id    INTEGER PRIMARY KEY,
+    car_type  VARCHAR(50)   NOT NULL COLLATE NOCASE,
+    car_color VARCHAR(30)   NOT NULL COLLATE NOCASE,
+    car_price DECIMAL(10,2) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cars_type ON Cars (car_type);
+CREATE INDEX IF NOT EXISTS idx_cars_color ON Cars (car_color);
+
+CREATE TABLE IF NOT EXISTS Rentals (
+    rental_id         INTEGER PRIMARY KEY,
+    customer_id       INT  NOT NULL
+        REFERENCES Customers(customer_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    car_id            INT  NOT NULL
+        REFERENCES Cars(car_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    rental_start_date DATE NOT NULL,
+    rental_end_date   DATE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rentals_car_dates ON Rentals (car_id, rental_start_date, rental_end_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_customer ON Rentals (customer_id);
+
+-- Writes made at the branch, replayed in op_id order. status is
+-- 'pending' until replayed; 'conflict' (rejected by the central
+-- database, e.g. an overlapping booking) and 'failed' are kept for review.
+CREATE TABLE IF NOT EXISTS Outbox (
+    op_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation  VARCHAR(40) NOT NULL,
+    payload    TEXT        NOT NULL,
+    local_id   INT,
+    status     VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts   INT         NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at VARCHAR(19) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON Outbox (status, op_id);
+
+-- Central ids assigned to rows created offline
+CREATE TABLE IF NOT EXISTS IdMap (
+    entity     VARCHAR(10) NOT NULL,
+    local_id   INT         NOT NULL,
+    central_id INT         NOT NULL,
+    PRIMARY KEY (entity, local_id)
+);
+
+CREATE TABLE IF NOT EXISTS SyncState (
+    name  VARCHAR(40) PRIMARY KEY,
+    value TEXT
+);
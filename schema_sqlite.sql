@@ -0,0 +1,436 @@
+-- RentalDB schema for the embedded SQLite backend (see backends.py).
+-- Same tables, keys, indexes and triggers as create.sql; backends.py
+-- runs this script the first time it opens an empty database file.
+-- Differences from MySQL:
+--   * no FULLTEXT indexes; fuzzy search falls back to LIKE scans;
+--   * the archive tables are not partitioned or compressed;
+--   * ON DELETE CASCADE does fire the child tables' triggers here, so the
+--     Customers/Cars compensation triggers of create.sql are not needed.
+
+PRAGMA foreign_keys = ON;
+
+-- Customers table
+CREATE TABLE IF NOT EXISTS Customers (
+    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first_name  VARCHAR(50)  NOT NULL,
+    last_name   VARCHAR(50)  NOT NULL,
+    email       VARCHAR(100) NOT NULL,
+    phone       VARCHAR(15)
+);
+CREATE INDEX IF NOT EXISTS idx_customers_first_name ON Customers (first_name);
+CREATE INDEX IF NOT EXISTS idx_customers_last_name ON Customers (last_name);
+CREATE INDEX IF NOT EXISTS idx_customers_email ON Customers (email);
+CREATE INDEX IF NOT EXISTS idx_customers_phone ON Customers (phone);
+
+-- Cars table
+CREATE TABLE IF NOT EXISTS Cars (
+    car_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    car_type  VARCHAR(50)   NOT NULL,
+    car_color VARCHAR(30)   NOT NULL,
+    car_price DECIMAL(10,2) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cars_type ON Cars (car_type);
+CREATE INDEX IF NOT EXISTS idx_cars_color ON Cars (car_color);
+
+-- Rentals table
+CREATE TABLE IF NOT EXISTS Rentals (
+    rental_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id       INT  NOT NULL
+        REFERENCES Customers(customer_id) ON DELETE CASCADE,
+    car_id            INT  NOT NULL
+        REFERENCES Cars(car_id) ON DELETE CASCADE,
+    rental_start_date DATE NOT NULL,
+    rental_end_date   DATE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rentals_start_date ON Rentals (rental_start_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_car_dates ON Rentals (car_id, rental_start_date, rental_end_date);
+-- SQLite does not index foreign keys implicitly
+CREATE INDEX IF NOT EXISTS idx_rentals_customer ON Rentals (customer_id);
+
+-- Invoices table
+CREATE TABLE IF NOT EXISTS Invoices (
+    invoice_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    rental_id      INT           NOT NULL
+        REFERENCES Rentals(rental_id) ON DELETE CASCADE,
+    invoice_amount DECIMAL(10,2) NOT NULL,
+    -- Running total of the invoice's payments, kept by trg_payment_*
+    amount_paid    DECIMAL(12,2) NOT NULL DEFAULT 0,
+    balance        DECIMAL(12,2) GENERATED ALWAYS AS (ROUND(invoice_amount - amount_paid, 2)) STORED
+);
+CREATE INDEX IF NOT EXISTS idx_invoices_rental ON Invoices (rental_id);
+-- Covers the unpaid-invoices list (balance > 0) without touching rows
+CREATE INDEX IF NOT EXISTS idx_invoices_balance
+    ON Invoices (balance, rental_id, invoice_amount, amount_paid);
+
+-- Payments table
+CREATE TABLE IF NOT EXISTS Payments (
+    payment_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    invoice_id     INT           NOT NULL
+        REFERENCES Invoices(invoice_id) ON DELETE CASCADE,
+    payment_date   DATE          NOT NULL,
+    amount         DECIMAL(10,2) NOT NULL,
+    payment_method VARCHAR(20)   NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payments_invoice_date ON Payments (invoice_id, payment_date);
+
+-- Auto-generate the invoice after inserting a rental: car_price times
+-- the number of days, at least 1 day (the rule pricing.py uses)
+CREATE TRIGGER IF NOT EXISTS trg_after_rental_insert
+AFTER INSERT ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO Invoices (rental_id, invoice_amount)
+    SELECT NEW.rental_id,
+           ROUND(car_price * MAX(
+               CAST(julianday(NEW.rental_end_date) - julianday(NEW.rental_start_date) AS INTEGER),
+               1
+           ), 2)
+      FROM Cars
+     WHERE car_id = NEW.car_id;
+END;
+
+-- ================= REPORT SUMMARY TABLES =================
+
+CREATE TABLE IF NOT EXISTS CarRentalSummary (
+    car_id         INTEGER PRIMARY KEY
+        REFERENCES Cars(car_id) ON DELETE CASCADE,
+    rental_count   INT           NOT NULL DEFAULT 0,
+    total_earnings DECIMAL(12,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS CustomerRentalSummary (
+    customer_id  INTEGER PRIMARY KEY
+        REFERENCES Customers(customer_id) ON DELETE CASCADE,
+    rental_count INT NOT NULL DEFAULT 0
+);
+
+-- ----- Rentals -----
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_rental_insert
+AFTER INSERT ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO CarRentalSummary (car_id, rental_count)
+    VALUES (NEW.car_id, 1)
+    ON CONFLICT (car_id) DO UPDATE SET rental_count = rental_count + 1;
+
+    INSERT INTO CustomerRentalSummary (customer_id, rental_count)
+    VALUES (NEW.customer_id, 1)
+    ON CONFLICT (customer_id) DO UPDATE SET rental_count = rental_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_rental_update_car
+AFTER UPDATE OF car_id ON Rentals
+FOR EACH ROW
+WHEN NEW.car_id <> OLD.car_id
+BEGIN
+    UPDATE CarRentalSummary
+       SET rental_count = rental_count - 1,
+           total_earnings = total_earnings - (
+               SELECT IFNULL(SUM(invoice_amount), 0) FROM Invoices WHERE rental_id = NEW.rental_id
+           )
+     WHERE car_id = OLD.car_id;
+
+    INSERT INTO CarRentalSummary (car_id, rental_count, total_earnings)
+    SELECT NEW.car_id, 1, IFNULL(SUM(invoice_amount), 0)
+      FROM Invoices
+     WHERE rental_id = NEW.rental_id
+    ON CONFLICT (car_id) DO UPDATE
+       SET rental_count = rental_count + 1,
+           total_earnings = total_earnings + excluded.total_earnings;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_rental_update_customer
+AFTER UPDATE OF customer_id ON Rentals
+FOR EACH ROW
+WHEN NEW.customer_id <> OLD.customer_id
+BEGIN
+    UPDATE CustomerRentalSummary
+       SET rental_count = rental_count - 1
+     WHERE customer_id = OLD.customer_id;
+
+    INSERT INTO CustomerRentalSummary (customer_id, rental_count)
+    VALUES (NEW.customer_id, 1)
+    ON CONFLICT (customer_id) DO UPDATE SET rental_count = rental_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_rental_delete
+BEFORE DELETE ON Rentals
+FOR EACH ROW
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveRun)
+BEGIN
+    -- The rental's invoices are about to be removed by cascade; by then
+    -- their own delete trigger can no longer find the rental
+    UPDATE CarRentalSummary
+       SET rental_count = rental_count - 1,
+           total_earnings = total_earnings - (
+               SELECT IFNULL(SUM(invoice_amount), 0) FROM Invoices WHERE rental_id = OLD.rental_id
+           )
+     WHERE car_id = OLD.car_id;
+
+    UPDATE CustomerRentalSummary
+       SET rental_count = rental_count - 1
+     WHERE customer_id = OLD.customer_id;
+END;
+
+-- ----- Invoices -----
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_invoice_insert
+AFTER INSERT ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO CarRentalSummary (car_id, total_earnings)
+    SELECT car_id, NEW.invoice_amount
+      FROM Rentals
+     WHERE rental_id = NEW.rental_id
+    ON CONFLICT (car_id) DO UPDATE SET total_earnings = total_earnings + excluded.total_earnings;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_invoice_update
+AFTER UPDATE OF invoice_amount, rental_id ON Invoices
+FOR EACH ROW
+WHEN NEW.invoice_amount <> OLD.invoice_amount OR NEW.rental_id <> OLD.rental_id
+BEGIN
+    UPDATE CarRentalSummary
+       SET total_earnings = total_earnings - OLD.invoice_amount
+     WHERE car_id = (SELECT car_id FROM Rentals WHERE rental_id = OLD.rental_id);
+
+    UPDATE CarRentalSummary
+       SET total_earnings = total_earnings + NEW.invoice_amount
+     WHERE car_id = (SELECT car_id FROM Rentals WHERE rental_id = NEW.rental_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_invoice_delete
+AFTER DELETE ON Invoices
+FOR EACH ROW
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveRun)
+BEGIN
+    UPDATE CarRentalSummary
+       SET total_earnings = total_earnings - OLD.invoice_amount
+     WHERE car_id = (SELECT car_id FROM Rentals WHERE rental_id = OLD.rental_id);
+END;
+
+-- ----- Payments -----
+-- Invoices.amount_paid (and with it the generated balance) moves in the
+-- same transaction as the payment row itself. Amounts are stored as
+-- REAL here, so the running total is rounded back to cents each time.
+
+CREATE TRIGGER IF NOT EXISTS trg_payment_insert
+AFTER INSERT ON Payments
+FOR EACH ROW
+BEGIN
+    UPDATE Invoices
+       SET amount_paid = ROUND(amount_paid + NEW.amount, 2)
+     WHERE invoice_id = NEW.invoice_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payment_update
+AFTER UPDATE OF amount, invoice_id ON Payments
+FOR EACH ROW
+WHEN NEW.amount <> OLD.amount OR NEW.invoice_id <> OLD.invoice_id
+BEGIN
+    UPDATE Invoices
+       SET amount_paid = ROUND(amount_paid - OLD.amount, 2)
+     WHERE invoice_id = OLD.invoice_id;
+
+    UPDATE Invoices
+       SET amount_paid = ROUND(amount_paid + NEW.amount, 2)
+     WHERE invoice_id = NEW.invoice_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_payment_delete
+AFTER DELETE ON Payments
+FOR EACH ROW
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveRun)
+BEGIN
+    UPDATE Invoices
+       SET amount_paid = ROUND(amount_paid - OLD.amount, 2)
+     WHERE invoice_id = OLD.invoice_id;
+END;
+
+-- ================= CHANGE LOG =================
+-- Read by changefeed.py. Cascaded deletes fire the child tables' own
+-- triggers here, so every table just logs its own rows.
+
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    version    INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name VARCHAR(20) NOT NULL,
+    row_id     INT         NOT NULL,
+    operation  CHAR(1)     NOT NULL,   -- I(nsert), U(pdate), D(elete)
+    changed_at VARCHAR(23) NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_changelog_changed_at ON ChangeLog (changed_at);
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_customer_insert
+AFTER INSERT ON Customers
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Customers', NEW.customer_id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_customer_update
+AFTER UPDATE ON Customers
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Customers', NEW.customer_id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_customer_delete
+AFTER DELETE ON Customers
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Customers', OLD.customer_id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_car_insert
+AFTER INSERT ON Cars
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Cars', NEW.car_id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_car_update
+AFTER UPDATE ON Cars
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Cars', NEW.car_id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_car_delete
+AFTER DELETE ON Cars
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Cars', OLD.car_id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_rental_insert
+AFTER INSERT ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Rentals', NEW.rental_id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_rental_update
+AFTER UPDATE ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Rentals', NEW.rental_id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_rental_delete
+AFTER DELETE ON Rentals
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Rentals', OLD.rental_id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_invoice_insert
+AFTER INSERT ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Invoices', NEW.invoice_id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_invoice_update
+AFTER UPDATE ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Invoices', NEW.invoice_id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_invoice_delete
+AFTER DELETE ON Invoices
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Invoices', OLD.invoice_id, 'D');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_payment_insert
+AFTER INSERT ON Payments
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Payments', NEW.payment_id, 'I');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_payment_update
+AFTER UPDATE ON Payments
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Payments', NEW.payment_id, 'U');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changelog_payment_delete
+AFTER DELETE ON Payments
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_id, operation)
+    VALUES ('Payments', OLD.payment_id, 'D');
+END;
+
+-- ================= ARCHIVE TIER =================
+-- Closed, fully paid rentals moved out of the hot tables by archive.py,
+-- with their invoices and payments. While archive.py moves a chunk it
+-- holds a row in ArchiveRun (inside its transaction, so no other
+-- connection sees it); the summary and payment delete triggers above
+-- skip on it, so archived rentals keep counting in the report totals.
+-- The job also adds each chunk to the Archive*Summary tables, so the
+-- active period's totals are the summaries minus these (reports.py).
+
+CREATE TABLE IF NOT EXISTS ArchiveRun (
+    run_id INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS RentalsArchive (
+    rental_id         INTEGER PRIMARY KEY,
+    customer_id       INT  NOT NULL,
+    car_id            INT  NOT NULL,
+    rental_start_date DATE NOT NULL,
+    rental_end_date   DATE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_start ON RentalsArchive (rental_start_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_customer ON RentalsArchive (customer_id);
+CREATE INDEX IF NOT EXISTS idx_rentals_archive_car ON RentalsArchive (car_id, rental_start_date);
+
+CREATE TABLE IF NOT EXISTS InvoicesArchive (
+    invoice_id        INTEGER PRIMARY KEY,
+    rental_id         INT           NOT NULL,
+    rental_start_date DATE          NOT NULL,
+    invoice_amount    DECIMAL(10,2) NOT NULL,
+    amount_paid       DECIMAL(12,2) NOT NULL,
+    balance           DECIMAL(12,2) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_invoices_archive_rental ON InvoicesArchive (rental_id);
+
+CREATE TABLE IF NOT EXISTS ArchiveCarSummary (
+    car_id         INTEGER PRIMARY KEY,
+    rental_count   INT           NOT NULL DEFAULT 0,
+    total_earnings DECIMAL(12,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ArchiveCustomerSummary (
+    customer_id  INTEGER PRIMARY KEY,
+    rental_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS PaymentsArchive (
+    payment_id     INTEGER PRIMARY KEY,
+    invoice_id     INT           NOT NULL,
+    payment_date   DATE          NOT NULL,
+    amount         DECIMAL(10,2) NOT NULL,
+    payment_method VARCHAR(20)   NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payments_archive_invoice_date ON PaymentsArchive (invoice_id, payment_date);
@@ -0,0 +1,267 @@
+import threading
+import time
+from collections import OrderedDict
+
+from db_pool import connect_db, get_backend
+
+
+# ==========================
+# Search Definitions
+# ==========================
+# Customer and car searches used to be `WHERE field LIKE '%value%'`,
+# which can never use an index. Each mode below is written so MySQL can
+# answer it from the index listed in SEARCH_INDEXES (see create.sql).
+
+SEARCH_MODES = ["exact", "prefix", "fuzzy"]
+
+SEARCH_FIELDS = {
+    "Customers": ["customer_id", "first_name", "last_name", "email", "phone"],
+    "Cars": ["car_id", "car_type", "car_color"]
+}
+
+ID_FIELDS = {"customer_id", "car_id"}
+
+# FULLTEXT (ngram) index used by fuzzy mode, per table
+FULLTEXT_COLUMNS = {
+    "Customers": "first_name, last_name, email, phone",
+    "Cars": "car_type, car_color"
+}
+
+# Index each (table, field, mode) is expected to use
+SEARCH_INDEXES = {
+    ("Customers", "customer_id"): "PRIMARY",
+    ("Customers", "first_name"): "idx_customers_first_name",
+    ("Customers", "last_name"): "idx_customers_last_name",
+    ("Customers", "email"): "idx_customers_email",
+    ("Customers", "phone"): "idx_customers_phone",
+    ("Cars", "car_id"): "PRIMARY",
+    ("Cars", "car_type"): "idx_cars_type",
+    ("Cars", "car_color"): "idx_cars_color"
+}
+FULLTEXT_INDEXES = {
+    "Customers": "ft_customers_search",
+    "Cars": "ft_cars_search"
+}
+
+
+def escape_like(value):
+    """Escape LIKE wildcards so user input matches literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_search_query(table, field, value, mode="prefix", limit=None, fulltext=None):
+    """Return (sql, params) for searching `table` by `field` in `mode`.
+
+    exact  - field = value
+    prefix - field LIKE 'value%' (index range scan)
+    fuzzy  - MATCH ... AGAINST on the table's n-gram FULLTEXT index;
+             searches all indexed text columns, not just `field`
+             (a substring LIKE over the same columns on backends
+             without FULLTEXT support; fulltext overrides the
+             configured backend's)
+    ID fields always use an exact match.
+    """
+    if table not in SEARCH_FIELDS or field not in SEARCH_FIELDS[table]:
+        raise ValueError(f"Cannot search {table} by {field!r}")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}")
+
+    value = value.strip()
+    if field in ID_FIELDS:
+        mode = "exact"
+
+    if mode == "exact":
+        sql = f"SELECT * FROM {table} WHERE {field} = %s"
+        params = [value]
+    elif mode == "prefix":
+        sql = f"SELECT * FROM {table} WHERE {field} LIKE %s ORDER BY {field}"
+        params = [escape_like(value) + "%"]
+    elif not (get_backend().supports_fulltext if fulltext is None else fulltext):
+        columns = FULLTEXT_COLUMNS[table].split(", ")
+        pattern = "%" + escape_like(value) + "%"
+        sql = f"SELECT * FROM {table} WHERE " + " OR ".join(f"{c} LIKE %s" for c in columns)
+        params = [pattern] * len(columns)
+    else:
+        columns = FULLTEXT_COLUMNS[table]
+        sql = (
+            f"SELECT * FROM {table} "
+            f"WHERE MATCH({columns}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        )
+        params = [value]
+
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def search_rows(table, field, value, mode="prefix", limit=None):
+    """Run a search and return the matching rows."""
+    sql, params = build_search_query(table, field, value, mode, limit)
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+# ==========================
+# Search-As-You-Type
+# ==========================
+# Live search issues a LIMITed prefix query per (debounced) keystroke.
+# Typing usually extends the previous value, and once a prefix returned
+# fewer than `limit` rows its result is complete: every longer prefix is
+# a subset of it and can be filtered client-side without a query.
+
+LIVE_SEARCH_LIMIT = 50
+RECENT_PREFIXES = 64    # cached results kept
+PREFIX_TTL = 30.0       # seconds; writers also clear the cache
+
+
+class PrefixCache:
+    """Recent live-search results, reused for narrower prefixes of the same search."""
+
+    def __init__(self, size=RECENT_PREFIXES, ttl=PREFIX_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # (table, field, mode, value) -> (rows, complete, at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, table, field, mode, value, limit):
+        """Rows for value if they can be answered from cache, else None."""
+        now = time.monotonic()
+        folded = value.lower()
+        with self._lock:
+            entry = self._entries.get((table, field, mode, folded))
+            if entry is not None and now - entry[2] < self.ttl:
+                self._entries.move_to_end((table, field, mode, folded))
+                self.hits += 1
+                return entry[0][:limit]
+
+            if mode == "prefix":
+                column = SEARCH_FIELDS[table].index(field)
+                for length in range(len(folded) - 1, 0, -1):
+                    entry = self._entries.get((table, field, mode, folded[:length]))
+                    if entry is None or now - entry[2] >= self.ttl:
+                        continue
+                    if not entry[1]:
+                        break
+                    self.hits += 1
+                    return [
+                        row for row in entry[0]
+                        if str(row[column]).lower().startswith(folded)
+                    ][:limit]
+            self.misses += 1
+            return None
+
+    def store(self, table, field, mode, value, rows, limit):
+        key = (table, field, mode, value.lower())
+        with self._lock:
+            self._entries[key] = (rows, len(rows) < limit, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries)
+            }
+
+
+prefix_cache = PrefixCache()
+
+
+def live_search(table, field, value, mode="prefix", limit=LIVE_SEARCH_LIMIT):
+    """search_rows() for search-as-you-type: LIMITed and served from prefix_cache when possible."""
+    value = value.strip()
+    if not value:
+        return []
+    if field in ID_FIELDS:
+        mode = "exact"
+
+    rows = prefix_cache.lookup(table, field, mode, value, limit)
+    if rows is None:
+        rows = search_rows(table, field, value, mode, limit)
+        prefix_cache.store(table, field, mode, value, rows, limit)
+    return rows
+
+
+# ==========================
+# Index Usage Check
+# ==========================
+
+def expected_index(table, field, mode):
+    if mode == "fuzzy" and field not in ID_FIELDS:
+        return FULLTEXT_INDEXES[table]
+    return SEARCH_INDEXES[(table, field)]
+
+
+def explain_search(cursor, table, field, mode, sample="a"):
+    """EXPLAIN one search and return (access_type, key_used)."""
+    sample = "1" if field in ID_FIELDS else sample
+    sql, params = build_search_query(table, field, sample, mode)
+    cursor.execute("EXPLAIN " + sql, params)
+    cols = [desc[0] for desc in cursor.description]
+    plan = dict(zip(cols, cursor.fetchone()))
+    cursor.fetchall()
+    return plan.get("type"), plan.get("key")
+
+
+def check_search_indexes():
+    """EXPLAIN every field/mode pair; return a list of result dicts.
+
+    Each result has table, field, mode, expected, key, type and ok.
+    On near-empty tables the optimizer may prefer a full scan, so run
+    this against realistically sized data.
+    """
+    results = []
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        for table, fields in SEARCH_FIELDS.items():
+            for field in fields:
+                for mode in SEARCH_MODES:
+                    if field in ID_FIELDS and mode != "exact":
+                        continue
+                    access, key = explain_search(cursor, table, field, mode)
+                    expected = expected_index(table, field, mode)
+                    results.append({
+                        "table": table,
+                        "field": field,
+                        "mode": mode,
+                        "expected": expected,
+                        "key": key,
+                        "type": access,
+                        "ok": key == expected
+                    })
+        cursor.close()
+    finally:
+        conn.close()
+    return results
+
+
+if __name__ == "__main__":
+    failures = 0
+    for r in check_search_indexes():
+        status = "OK  " if r["ok"] else "MISS"
+        failures += not r["ok"]
+        print(
+            f"{status} {r['table']}.{r['field']:<12} {r['mode']:<7} "
+            f"type={r['type']} key={r['key']} (expected {r['expected']})"
+        )
+    raise SystemExit(1 if failures else 0)
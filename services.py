@@ -0,0 +1,354 @@
+import instrumentation
+import procedures
+import statements
+from db_pool import connect_db, get_pool
+from pricing import quote
+from availability import availability
+from analytics import store as analytics_store
+from cache import cache_stats, car_cache, customer_cache, get_car, get_customer
+from repricing import reprice_in
+from search import live_search, prefix_cache, search_rows
+from procedures import booked_error
+from reports import ARCHIVE_REPORT_QUERIES
+from payments import (
+    import_payments, invoice_balance, invoice_payments, record_payment, record_payments,
+    unpaid_invoices
+)
+from transactions import run_transaction, transaction_stats
+
+__all__ = [
+    "fetch_rows", "execute", "booking_stats", "diagnostics",
+    "run_report", "analytics_report", "analytics_group_by",
+    "add_customer", "update_customer", "delete_customer", "search_customers",
+    "live_search_customers", "customer_rentals", "load_customer", "find_customer",
+    "add_car", "update_car", "delete_car", "search_cars", "live_search_cars", "find_car",
+    "check_availability", "free_cars", "estimate_rental",
+    "create_rental", "update_rental", "delete_rental", "booked_error",
+    # payments.py, re-exported for the GUI and for offline.py's replays
+    "record_payment", "record_payments", "import_payments",
+    "invoice_balance", "invoice_payments", "unpaid_invoices"
+]
+
+
+# ==========================
+# Service Layer
+# ==========================
+# Plain functions over RentalDB with no Tkinter dependency. The GUI in
+# App.py calls these from its worker pool; batch jobs and servers can
+# import this module directly. Validation problems raise ValueError.
+# Fixed queries are named statements from statements.py; fetch_rows()
+# and execute() remain for ad-hoc SQL.
+
+# ==========================
+# Generic Helpers
+# ==========================
+
+def fetch_rows(query, params=()):
+    """Run a SELECT query and return (column_names, rows)."""
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cols = [desc[0] for desc in cursor.description]
+        cursor.close()
+        return cols, rows
+    finally:
+        conn.close()
+
+
+def execute(query, params=()):
+    """Run a single write statement in its own transaction; return lastrowid."""
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        conn.commit()
+        last_id = cursor.lastrowid
+        cursor.close()
+        return last_id
+    finally:
+        conn.close()
+
+
+def _write(cache, statement, params, key=None):
+    """Run a registered write, then drop the affected row (key, or the new row's id) from cache."""
+    last_id = statements.execute(statement, params)
+    cache.invalidate(key if key is not None else last_id)
+    prefix_cache.invalidate()
+    return last_id
+
+
+def booking_stats():
+    """Commit, retry, deadlock and lock-wait counters of the booking transactions."""
+    return transaction_stats.snapshot()
+
+
+def diagnostics():
+    """In-memory health counters: pool, caches, bookings and per-handler query timings."""
+    caches = cache_stats()
+    caches["Search prefixes"] = prefix_cache.stats()
+    return {
+        "pool": get_pool().snapshot(),
+        "caches": caches,
+        "availability": availability.stats(),
+        "analytics": analytics_store.stats(),
+        "bookings": transaction_stats.snapshot(),
+        "queries": instrumentation.summary(),
+        "statements": statements.summary()
+    }
+
+
+def run_report(label, include_archive=False):
+    """Run one of the Reports-tab queries; returns (column_names, rows).
+
+    include_archive adds the archived rentals, invoices and payments
+    (reports.ARCHIVE_REPORT_QUERIES).
+    """
+    if include_archive and label in ARCHIVE_REPORT_QUERIES:
+        return statements.fetch(f"report:{label}:archive")
+    return statements.fetch(f"report:{label}")
+
+
+def analytics_report(label, include_archive=False):
+    """run_report() answered from the in-memory column store (analytics.py)."""
+    frame = analytics_store.report(label, include_archive)
+    return frame.columns, frame.rows()
+
+
+def analytics_group_by(dimensions, start=None, end=None, include_archive=True):
+    """Rentals grouped by month, car_type, customer and/or car; returns (column_names, rows)."""
+    frame = analytics_store.group_by(dimensions, start, end, include_archive)
+    return frame.columns, frame.rows()
+
+
+# ==========================
+# Customers
+# ==========================
+
+def add_customer(first_name, last_name, email, phone):
+    """Insert a customer and return the new customer_id."""
+    return _write(customer_cache, "insert_customer", (first_name, last_name, email, phone))
+
+
+def update_customer(customer_id, first_name, last_name, email, phone):
+    _write(
+        customer_cache,
+        "update_customer",
+        (first_name, last_name, email, phone, customer_id),
+        customer_id
+    )
+
+
+def delete_customer(customer_id):
+    _write(customer_cache, "delete_customer", (customer_id,), customer_id)
+    # The cascade removed an unknown set of rentals
+    availability.invalidate()
+
+
+def search_customers(field, value, mode="prefix", limit=None):
+    """Return Customers rows matching value in field (see search.py for modes)."""
+    return search_rows("Customers", field, value, mode, limit)
+
+
+def live_search_customers(field, value, mode="prefix"):
+    """Up to LIVE_SEARCH_LIMIT customers for search-as-you-type."""
+    return live_search("Customers", field, value, mode)
+
+
+def customer_rentals(customer_id):
+    """(rental_id, car_type, start, end) rows for one customer."""
+    return statements.fetch("customer_rentals", (customer_id,))[1]
+
+
+def load_customer(customer_id):
+    """(customer, rentals) for one customer_id, or (None, [])."""
+    customer = get_customer(customer_id)
+    if customer is None:
+        return None, []
+    return customer, customer_rentals(customer_id)
+
+
+def find_customer(field, value, mode="prefix"):
+    """First matching customer and their rental history, or (None, [])."""
+    rows = search_customers(field, value, mode, limit=1)
+    if not rows:
+        return None, []
+    return rows[0], customer_rentals(rows[0][0])
+
+
+# ==========================
+# Cars
+# ==========================
+
+def add_car(car_type, car_color, car_price):
+    """Insert a car and return the new car_id."""
+    car_id = _write(car_cache, "insert_car", (car_type, car_color, car_price))
+    availability.add_car(car_id)
+    return car_id
+
+
+def update_car(car_id, car_type, car_color, car_price):
+    """Update a car; a price change re-prices its open rentals' invoices.
+
+    Returns the number of invoices whose amount changed.
+    """
+    try:
+        return run_transaction(
+            "update_car", _update_car, int(car_id), car_type, car_color, car_price,
+            isolation_level="READ COMMITTED"
+        )
+    finally:
+        car_cache.invalidate(car_id)
+        prefix_cache.invalidate()
+
+
+def _update_car(tx, car_id, car_type, car_color, car_price):
+    # The car row lock holds off bookings and date changes of this car
+    # until its invoices are re-priced, and both commit or neither does
+    old = tx.lock("SELECT car_price FROM Cars WHERE car_id = %s FOR UPDATE", (car_id,))
+    tx.run("update_car", (car_type, car_color, car_price, car_id))
+    if not old or float(old[0][0]) == float(car_price):
+        return 0
+    return reprice_in(tx, [car_id])["changed"]
+
+
+def delete_car(car_id):
+    _write(car_cache, "delete_car", (car_id,), car_id)
+    availability.remove_car(car_id)
+
+
+def search_cars(field, value, mode="prefix", limit=None):
+    """Return Cars rows matching value in field (see search.py for modes)."""
+    return search_rows("Cars", field, value, mode, limit)
+
+
+def live_search_cars(field, value, mode="prefix"):
+    """Up to LIVE_SEARCH_LIMIT cars for search-as-you-type."""
+    return live_search("Cars", field, value, mode)
+
+
+def find_car(field, value, mode="prefix"):
+    """First matching car, or None."""
+    rows = search_cars(field, value, mode, limit=1)
+    return rows[0] if rows else None
+
+
+# ==========================
+# Rentals
+# ==========================
+
+def _require_available(car_id, start, end, rental_id=None):
+    """Raise ValueError if the car is booked for the dates.
+
+    The index is only a hint: it may be up to REFRESH_SECONDS behind other
+    clients, so a conflict it shows is confirmed by the database before a
+    booking is refused. A free answer is left to the locked check in the
+    procedure.
+    """
+    if availability.is_available(car_id, start, end, ignore=rental_id):
+        return
+    conflicts = availability.confirm(car_id, start, end, ignore=rental_id)
+    if conflicts:
+        raise booked_error(car_id, conflicts)
+
+
+def check_availability(car_id, start, end, rental_id=None):
+    """Overlapping bookings as (start, end, rental_id); empty when the car is free."""
+    return availability.conflicts(car_id, start, end, ignore=rental_id)
+
+
+def free_cars(start, end):
+    """Cars rows with no booking overlapping the dates.
+
+    A car another client has deleted is left out, and the index, which
+    still listed it, is reloaded on its next use.
+    """
+    cars = [get_car(car_id) for car_id in availability.free_cars(start, end)]
+    if None in cars:
+        availability.invalidate()
+    return [car for car in cars if car is not None]
+
+
+def estimate_rental(car_id, start, end):
+    """Return the estimated invoice total for a car and date range."""
+    car = get_car(car_id)
+    if not car:
+        raise ValueError("Invalid Car ID")
+    return quote(car[3], start, end)[1]
+
+
+def _call_priced(procedure, car_id, start, end, *args):
+    """Call a booking procedure with *args plus the car's price and pricing.quote() total.
+
+    The procedure refuses a price that is no longer the car's; the car is
+    then re-read and the call made once more.
+    """
+    for attempt in range(2):
+        car = get_car(car_id)
+        if not car:
+            raise ValueError("Car not found.")
+        _, total = quote(car[3], start, end)
+        try:
+            return procedures.call(procedure, *args, car[3], total)
+        except ValueError as e:
+            if str(e) != procedures.PRICE_CHANGED or attempt:
+                raise
+            car_cache.invalidate(int(car_id))
+
+
+def create_rental(customer_id, car_id, start, end):
+    """Book a car (invoice via trigger) and return a summary dict.
+
+    The summary has rental_id, customer_name, car_type, days and total.
+    sp_create_rental does the booking in one call and one transaction:
+    it locks the car's row, re-checks overlaps under the lock, inserts
+    the rental and stores the invoice total priced here by
+    pricing.quote(). Deadlocks and lock-wait timeouts are retried; see
+    transactions.py for the metrics.
+    """
+    # Cheap checks against the caches first, so obviously bad requests
+    # never reach the database.
+    if not get_car(car_id):
+        raise ValueError("Car not found.")
+    if not get_customer(customer_id):
+        raise ValueError("Customer not found.")
+
+    _require_available(car_id, start, end)
+
+    summary = _call_priced("sp_create_rental", car_id, start, end, int(customer_id), int(car_id), start, end)
+    availability.add(summary["rental_id"], car_id, start, end)
+
+    return {
+        "rental_id": summary["rental_id"],
+        "customer_name": summary["customer_name"],
+        "car_type": summary["car_type"],
+        "days": int(summary["days"]),
+        "total": float(summary["total"])
+    }
+
+
+def update_rental(rental_id, start, end):
+    """Change a rental's dates, re-price its invoice and return the new total.
+
+    One call to sp_update_rental, which locks the car, re-checks overlaps
+    and updates the rental and its invoice in one transaction.
+    """
+    rental_id = int(rental_id)
+    car_id = availability.car_of(rental_id)
+    if car_id is None:
+        rows = statements.fetch("rental_car", (rental_id,))[1]
+        if not rows:
+            raise ValueError("Rental or car not found.")
+        car_id = rows[0][0]
+
+    summary = _call_priced("sp_update_rental", car_id, start, end, rental_id, start, end)
+    availability.move(rental_id, summary["car_id"], start, end)
+    return float(summary["total"])
+
+
+def delete_rental(rental_id):
+    """Delete a rental; FK constraints remove its invoice and payments."""
+    statements.execute("delete_rental", (rental_id,))
+    availability.remove(int(rental_id))
+
@@ -0,0 +1,164 @@
+from collections import namedtuple
+
+import instrumentation
+from db_pool import connect_db
+from reports import ARCHIVE_REPORT_QUERIES, REPORT_QUERIES
+
+
+# ==========================
+# Statement Registry
+# ==========================
+# Every fixed-text query on the hot paths is registered here under a
+# name. run() executes it through the connection's server-side prepared
+# cursor for that name (db_pool.PooledConnection.statement), so MySQL
+# parses each statement once per pooled connection instead of on every
+# call, and instrumentation counts executions and latency per name.
+# Statements whose text is assembled per call (search, filters, paging)
+# are not registered; preparing them would not be reused. Bookings and
+# payments are stored procedure calls (procedures.py).
+
+STATEMENTS = {
+    # ----- customers -----
+    "customer_by_id": "SELECT * FROM Customers WHERE customer_id = %s",
+    "insert_customer": """
+        INSERT INTO Customers (first_name, last_name, email, phone)
+        VALUES (%s, %s, %s, %s)
+    """,
+    "update_customer": """
+        UPDATE Customers
+        SET first_name=%s, last_name=%s, email=%s, phone=%s
+        WHERE customer_id=%s
+    """,
+    "delete_customer": "DELETE FROM Customers WHERE customer_id=%s",
+    "customer_rentals": """
+        SELECT
+            Rentals.rental_id,
+            Cars.car_type,
+            Rentals.rental_start_date,
+            Rentals.rental_end_date
+        FROM Rentals
+        JOIN Cars ON Rentals.car_id = Cars.car_id
+        WHERE Rentals.customer_id = %s
+    """,
+
+    # ----- cars -----
+    "car_by_id": "SELECT * FROM Cars WHERE car_id = %s",
+    "insert_car": """
+        INSERT INTO Cars (car_type, car_color, car_price)
+        VALUES (%s, %s, %s)
+    """,
+    "update_car": """
+        UPDATE Cars
+        SET car_type=%s, car_color=%s, car_price=%s
+        WHERE car_id=%s
+    """,
+    "delete_car": "DELETE FROM Cars WHERE car_id=%s",
+
+    # ----- rentals -----
+    # Overlapping bookings; dates normalised with availability.booking_range()
+    "car_conflicts": """
+        SELECT rental_start_date, GREATEST(rental_end_date, ADDDATE(rental_start_date, 1)),
+               rental_id
+        FROM Rentals
+        WHERE car_id = %s
+          AND rental_start_date < %s
+          AND GREATEST(rental_end_date, ADDDATE(rental_start_date, 1)) > %s
+          AND rental_id <> %s
+        ORDER BY rental_start_date
+    """,
+    "delete_rental": "DELETE FROM Rentals WHERE rental_id = %s",
+    "rental_car": "SELECT car_id FROM Rentals WHERE rental_id = %s",
+
+    # ----- payments -----
+    # amount_paid and balance are kept on Invoices by the trg_payment_* triggers
+    "invoice_balance": """
+        SELECT invoice_id, rental_id, invoice_amount, amount_paid, balance
+        FROM Invoices
+        WHERE invoice_id = %s
+    """,
+    # Answered from idx_invoices_balance alone
+    "unpaid_invoices": """
+        SELECT invoice_id, rental_id, invoice_amount, amount_paid, balance
+        FROM Invoices
+        WHERE balance > 0
+        ORDER BY balance DESC
+        LIMIT %s
+    """,
+    "invoice_payments": """
+        SELECT payment_id, payment_date, amount, payment_method
+        FROM Payments
+        WHERE invoice_id = %s
+        ORDER BY payment_date, payment_id
+    """,
+    "insert_payment": """
+        INSERT INTO Payments (invoice_id, payment_date, amount, payment_method)
+        VALUES (%s, %s, %s, %s)
+    """,
+    "recompute_amount_paid": """
+        UPDATE Invoices
+        SET amount_paid = (
+            SELECT ROUND(IFNULL(SUM(amount), 0), 2) FROM Payments WHERE invoice_id = %s
+        )
+        WHERE invoice_id = %s
+    """
+}
+
+# The Reports-tab queries, as "report:<label>", and their variants
+# including the archive tier as "report:<label>:archive"
+STATEMENTS.update({f"report:{label}": query for label, query in REPORT_QUERIES.items()})
+STATEMENTS.update({
+    f"report:{label}:archive": query for label, query in ARCHIVE_REPORT_QUERIES.items()
+})
+
+
+Result = namedtuple("Result", ["columns", "rows", "rowcount", "lastrowid"])
+
+
+def sql(name):
+    """The SQL text of registered statement `name`."""
+    return STATEMENTS[name]
+
+
+def run(conn, name, params=()):
+    """Execute statement `name` on a pooled connection; returns a Result.
+
+    Uses the connection's prepared cursor for the statement, reads the
+    whole result (a prepared cursor must be drained before the
+    connection runs anything else) and leaves committing to the caller.
+    """
+    cursor = conn.statement(name)
+    cursor.execute(STATEMENTS[name], tuple(params))
+    if cursor.description is not None:
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+    else:
+        columns, rows = [], []
+    result = Result(columns, rows, cursor.rowcount, cursor.lastrowid)
+    cursor.finish()
+    return result
+
+
+def fetch(name, params=()):
+    """Run a registered SELECT on its own connection; returns (column_names, rows)."""
+    conn = connect_db()
+    try:
+        result = run(conn, name, params)
+        return result.columns, result.rows
+    finally:
+        conn.close()
+
+
+def execute(name, params=()):
+    """Run a registered write in its own transaction; returns lastrowid."""
+    conn = connect_db()
+    try:
+        result = run(conn, name, params)
+        conn.commit()
+        return result.lastrowid
+    finally:
+        conn.close()
+
+
+def summary():
+    """One row per statement: executions, rows and timings (see instrumentation.summary)."""
+    return instrumentation.summary(instrumentation.statement_stats, "statement")
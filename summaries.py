@@ -0,0 +1,31 @@
+import time
+
+from db_pool import connect_db
+
+
+# ==========================
+# Report Summary Tables
+# ==========================
+# CarRentalSummary and CustomerRentalSummary are kept current by the
+# trg_summary_* triggers in create.sql, Invoices.amount_paid by the
+# trg_payment_* triggers. A full rebuild is only needed after loading
+# data with triggers bypassed or if the totals are suspected to have
+# drifted.
+
+def rebuild_summaries():
+    """Recompute every summary table from scratch; return seconds taken."""
+    started = time.perf_counter()
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.callproc("sp_rebuild_report_summaries")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    elapsed = rebuild_summaries()
+    print(f"Report summaries rebuilt in {elapsed:.2f}s")
@@ -0,0 +1,37 @@
+import os
+import sys
+
+# Every test runs against a throwaway in-process SQLite database, so the
+# suite needs no MySQL server. Set before db_pool is first imported.
+os.environ["RENTALDB_BACKEND"] = "sqlite"
+os.environ["RENTALDB_SQLITE_PATH"] = ":memory:"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import db_pool
+import services
+from availability import availability
+from cache import car_cache, customer_cache
+from search import prefix_cache
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """A new, empty RentalDB for each test, with the process-wide caches emptied."""
+    backend = db_pool.use_backend("sqlite", ":memory:")
+    customer_cache.invalidate()
+    car_cache.invalidate()
+    prefix_cache.invalidate()
+    availability.invalidate()
+    yield backend
+
+
+@pytest.fixture
+def customer():
+    return services.add_customer("Ann", "Lee", "ann@example.com", "555-0100")
+
+
+@pytest.fixture
+def car():
+    return services.add_car("SUV", "Red", "50.00")
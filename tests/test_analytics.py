@@ -0,0 +1,62 @@
+import pytest
+
+import archive
+import services
+from analytics import AnalyticsStore
+from reports import REPORT_QUERIES
+
+
+@pytest.fixture
+def store():
+    # refresh=0 pulls the change log before every query
+    return AnalyticsStore(refresh=0)
+
+
+@pytest.fixture
+def rentals(customer, car):
+    other_customer = services.add_customer("Bo", "Kim", "bo@example.com", "555-0101")
+    other_car = services.add_car("Van", "Blue", "40.00")
+    for who, which, start, end in [
+        (customer, car, "2023-03-01", "2023-03-04"),
+        (other_customer, car, "2023-05-01", "2023-05-02"),
+        (customer, other_car, "2024-02-01", "2024-02-05"),
+        (other_customer, other_car, "2031-10-10", "2031-10-20"),
+    ]:
+        services.create_rental(who, which, start, end)
+    services.record_payment(1, services.invoice_balance(1)["balance"], "Card", "2023-03-05")
+    services.record_payment(2, "10", "Cash", "2023-05-03")
+    services.record_payment(3, services.invoice_balance(3)["balance"], "Card", "2024-02-06")
+
+
+def assert_reports_agree(store):
+    for label in REPORT_QUERIES:
+        for include_archive in (False, True):
+            assert store.compare(label, include_archive) == ([], []), (label, include_archive)
+
+
+def test_compare_agrees_with_sql(store, rentals):
+    assert_reports_agree(store)
+
+
+def test_compare_agrees_after_changes_and_archiving(store, rentals, customer, car):
+    assert_reports_agree(store)
+
+    services.create_rental(customer, car, "2031-11-01", "2031-11-03")
+    services.record_payment(4, "25", "Cash", "2031-10-21")
+    services.update_customer(customer, "Ann", "Lee-Park", "ann@example.com", "555-0100")
+    assert_reports_agree(store)
+
+    assert archive.archive("2025-01-01")["rentals"] == 2
+    assert_reports_agree(store)
+
+
+def test_compare_reports_rows_that_differ(rentals):
+    # A store that will not look at the change log for an hour
+    stale = AnalyticsStore(refresh=3600)
+    assert stale.compare("Unpaid Invoices") == ([], [])
+
+    services.record_payment(4, "25", "Cash", "2031-10-21")
+
+    only_sql, only_analytics = stale.compare("Unpaid Invoices")
+    assert [row[0] for row in only_sql] == [4]
+    assert [row[0] for row in only_analytics] == [4]
@@ -0,0 +1,73 @@
+import pytest
+
+import archive
+import services
+import summaries
+
+SUMMARY_REPORTS = ["Total Earnings per Car", "Total Rentals per Customer", "Most Rented Cars"]
+CUTOFF = "2025-01-01"
+
+
+@pytest.fixture
+def history(customer, car):
+    """Two cars and two customers, with closed rentals before CUTOFF and open ones after it."""
+    other_customer = services.add_customer("Bo", "Kim", "bo@example.com", "555-0101")
+    other_car = services.add_car("Van", "Blue", "40.00")
+    for who, which, start, end in [
+        (customer, car, "2023-03-01", "2023-03-04"),
+        (other_customer, car, "2023-05-01", "2023-05-02"),
+        (customer, other_car, "2024-02-01", "2024-02-05"),
+        (other_customer, other_car, "2031-10-10", "2031-10-20"),
+        (customer, car, "2031-11-01", "2031-11-03"),
+    ]:
+        services.create_rental(who, which, start, end)
+    # Rentals 1 and 3 are paid off; 2 still owes, so it stays hot
+    for invoice_id in (1, 3):
+        services.record_payment(invoice_id, services.invoice_balance(invoice_id)["balance"], "Card", "2024-03-01")
+    services.record_payment(2, "10", "Cash", "2023-05-03")
+
+
+def reports(include_archive):
+    return [sorted(services.run_report(label, include_archive)[1]) for label in SUMMARY_REPORTS]
+
+
+def ids(label, include_archive):
+    return sorted(row[0] for row in services.run_report(label, include_archive)[1])
+
+
+def test_archive_moves_closed_paid_rentals_only(history):
+    stats = archive.archive(CUTOFF, chunk_size=1)
+
+    assert (stats["rentals"], stats["invoices"], stats["payments"]) == (2, 2, 2)
+    assert ids("All Rentals", False) == [2, 4, 5]
+    assert ids("All Rentals", True) == [1, 2, 3, 4, 5]
+    assert ids("All Payments", False) == [3]
+    assert ids("All Payments", True) == [1, 2, 3]
+    assert archive.archive(CUTOFF)["rentals"] == 0
+
+
+def test_include_archive_reports_all_time_totals(history):
+    before = reports(False)
+    archived_amount = float(services.invoice_balance(3)["invoice_amount"])
+
+    archive.archive(CUTOFF)
+
+    assert reports(True) == before
+    hot = reports(False)
+    assert hot != before
+    earnings = {row[0]: float(row[-1]) for row in services.run_report("Total Earnings per Car")[1]}
+    all_time = {row[0]: float(row[-1]) for row in services.run_report("Total Earnings per Car", True)[1]}
+    # Car 2 kept only its open rental in the hot tier; car 1 its open and unpaid ones
+    assert earnings[2] == float(services.invoice_balance(4)["invoice_amount"])
+    assert all_time[2] - earnings[2] == pytest.approx(archived_amount)
+    assert all_time[1] > earnings[1]
+
+
+def test_rebuilt_summaries_match_the_incremental_ones(history):
+    archive.archive(CUTOFF, chunk_size=1)
+    hot, everything = reports(False), reports(True)
+
+    summaries.rebuild_summaries()
+
+    assert reports(False) == hot
+    assert reports(True) == everything
@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+
+import payments
+import services
+
+
+@pytest.fixture
+def invoices(customer, car):
+    """Three invoices of 100.00 each (two-day rentals at 50.00 a day, mid-week)."""
+    for start, end in [("2031-03-04", "2031-03-06"), ("2031-04-08", "2031-04-10"), ("2031-05-06", "2031-05-08")]:
+        services.create_rental(customer, car, start, end)
+    return [1, 2, 3]
+
+
+def test_record_payments_commits_each_chunk_and_counts_settled_invoices(invoices):
+    services.record_payment(1, "100", "Cash")
+    records = [
+        {"invoice_id": 1, "amount": "5", "payment_method": "Cash"},
+        {"invoice_id": 2, "amount": "40", "payment_method": "Cash"},
+        {"invoice_id": 3, "amount": "60", "payment_method": "Card"},
+        {"invoice_id": 3, "amount": "40", "payment_method": "Card", "payment_date": "2031-05-09"},
+    ]
+
+    stats = services.record_payments(records, chunk_size=3)
+
+    assert stats["read"] == 4
+    assert stats["recorded"] == 4
+    assert stats["rejected"] == 0
+    assert stats["amount"] == Decimal("145.00")
+    # Invoice 1 was already paid off before the batch, and 2 still owes
+    assert stats["settled"] == 1
+    assert services.invoice_balance(1)["balance"] == Decimal("-5.00")
+    assert services.invoice_balance(2)["balance"] == Decimal("60.00")
+    assert services.invoice_balance(3)["balance"] == Decimal("0.00")
+    assert payments.reconcile() == []
+
+
+def test_record_payments_rejects_invalid_records_and_keeps_the_rest(invoices):
+    records = [
+        {"invoice_id": 1, "amount": "25", "payment_method": "Cash"},
+        {"invoice_id": 99, "amount": "25", "payment_method": "Cash"},
+        {"invoice_id": 2, "amount": "-1", "payment_method": "Cash"},
+        {"invoice_id": 2, "amount": "25", "payment_method": "x" * 21},
+        {"invoice_id": 3, "amount": "25", "payment_method": "Cash", "payment_date": "May 9"},
+    ]
+
+    stats = services.record_payments(records)
+
+    assert stats["recorded"] == 1
+    assert stats["rejected"] == 4
+    reasons = [reason for _, reason in stats["rejects"]]
+    assert "unknown invoice_id 99" in reasons
+    assert "Payment method cannot be longer than 20 characters." in reasons
+    assert services.invoice_balance(1)["amount_paid"] == Decimal("25.00")
+    assert services.invoice_balance(2)["amount_paid"] == Decimal("0.00")
+
+
+def test_parse_payment_validates_each_field():
+    assert payments.parse_payment(" 7 ", "12.50", " Cash ", "2031-01-02")[1:] == (
+        payments.date(2031, 1, 2), Decimal("12.50"), "Cash"
+    )
+    for args, message in [
+        (("x", "1", "Cash"), "Invoice ID must be a number"),
+        ((1, "abc", "Cash"), "Amount must be a number"),
+        ((1, "0", "Cash"), "must be positive"),
+        ((1, "1.005", "Cash"), "two decimal places"),
+        ((1, "1", " "), "Enter a payment method"),
+        ((1, "1", "x" * 21), "longer than 20"),
+        ((1, "1", "Cash", "01/02/2031"), "YYYY-MM-DD"),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            payments.parse_payment(*args)
+
+
+def test_unpaid_invoices_lists_largest_balance_first(invoices):
+    services.record_payment(1, "100", "Cash")
+    services.record_payment(3, "30", "Cash")
+
+    _, rows = services.unpaid_invoices()
+
+    assert [row[0] for row in rows] == [2, 3]
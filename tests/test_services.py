@@ -0,0 +1,93 @@
+import pytest
+
+import services
+from db_pool import connect_db
+from pricing import quote
+
+
+def invoice_amount(rental_id):
+    rows = services.fetch_rows("SELECT invoice_amount FROM Invoices WHERE rental_id = %s", (rental_id,))[1]
+    return float(rows[0][0])
+
+
+def set_price_behind_cache(car_id, price):
+    """Change a car's price the way another client would, leaving this one's cache stale."""
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE Cars SET car_price = %s WHERE car_id = %s", (price, car_id))
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def test_create_rental_bills_the_quoted_total(customer, car):
+    summary = services.create_rental(customer, car, "2031-03-03", "2031-03-06")
+
+    assert summary["customer_name"] == "Ann Lee"
+    assert summary["car_type"] == "SUV"
+    assert summary["days"] == 3
+    assert summary["total"] == float(quote(50, "2031-03-03", "2031-03-06")[1])
+    assert invoice_amount(summary["rental_id"]) == summary["total"]
+
+
+def test_create_rental_rejects_an_overlapping_booking(customer, car):
+    services.create_rental(customer, car, "2031-03-03", "2031-03-06")
+
+    with pytest.raises(ValueError, match="already booked"):
+        services.create_rental(customer, car, "2031-03-05", "2031-03-08")
+    # Back-to-back bookings do not overlap
+    services.create_rental(customer, car, "2031-03-06", "2031-03-08")
+
+
+def test_create_rental_rejects_unknown_ids(customer, car):
+    with pytest.raises(ValueError, match="Car not found"):
+        services.create_rental(customer, car + 1, "2031-03-03", "2031-03-06")
+    with pytest.raises(ValueError, match="Customer not found"):
+        services.create_rental(customer + 1, car, "2031-03-03", "2031-03-06")
+
+
+def test_create_rental_retries_after_a_price_change(customer, car):
+    services.get_car(car)
+    set_price_behind_cache(car, "80.00")
+
+    summary = services.create_rental(customer, car, "2031-03-03", "2031-03-06")
+
+    assert summary["total"] == float(quote(80, "2031-03-03", "2031-03-06")[1])
+
+
+def test_update_rental_reprices_the_invoice(customer, car):
+    rental_id = services.create_rental(customer, car, "2031-03-03", "2031-03-06")["rental_id"]
+
+    total = services.update_rental(rental_id, "2031-03-03", "2031-03-10")
+
+    assert total == float(quote(50, "2031-03-03", "2031-03-10")[1])
+    assert invoice_amount(rental_id) == total
+
+
+def test_update_rental_rejects_an_overlap_and_keeps_the_dates(customer, car):
+    first = services.create_rental(customer, car, "2031-03-03", "2031-03-06")["rental_id"]
+    services.create_rental(customer, car, "2031-03-10", "2031-03-12")
+
+    with pytest.raises(ValueError, match="already booked"):
+        services.update_rental(first, "2031-03-03", "2031-03-11")
+
+    rows = services.fetch_rows("SELECT rental_end_date FROM Rentals WHERE rental_id = %s", (first,))[1]
+    assert str(rows[0][0]) == "2031-03-06"
+    assert invoice_amount(first) == float(quote(50, "2031-03-03", "2031-03-06")[1])
+
+
+def test_update_rental_retries_after_a_price_change(customer, car):
+    rental_id = services.create_rental(customer, car, "2031-03-03", "2031-03-06")["rental_id"]
+    set_price_behind_cache(car, "80.00")
+
+    total = services.update_rental(rental_id, "2031-03-03", "2031-03-07")
+
+    assert total == float(quote(80, "2031-03-03", "2031-03-07")[1])
+    assert invoice_amount(rental_id) == total
+
+
+def test_update_rental_rejects_an_unknown_rental():
+    with pytest.raises(ValueError, match="Rental or car not found"):
+        services.update_rental(999, "2031-03-03", "2031-03-06")
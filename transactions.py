@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errorcode
+
+import statements
+from db_pool import connect_db
+
+
+# ==========================
+# Retrying Transactions
+# ==========================
+# InnoDB resolves a deadlock by rolling back one of the transactions
+# (error 1213) and gives up on a row lock after innodb_lock_wait_timeout
+# (error 1205). Both leave the database unchanged, so the whole
+# transaction can be replayed on a fresh connection after a short,
+# jittered backoff.
+
+RETRYABLE_ERRORS = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+
+MAX_RETRIES = 4          # attempts after the first one
+BACKOFF_BASE = 0.05      # seconds; doubles on every retry
+BACKOFF_MAX = 1.0
+
+
+class TransactionStats:
+    """Per-transaction-name counters for commits, retries and lock waits."""
+
+    FIELDS = ("commits", "rollbacks", "retries", "deadlocks", "lock_timeouts",
+              "failures", "locks", "lock_wait_seconds", "max_lock_wait")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _entry(self, name):
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats[name] = dict.fromkeys(self.FIELDS, 0)
+        return entry
+
+    def add(self, name, field, amount=1):
+        with self._lock:
+            self._entry(name)[field] += amount
+
+    def lock_wait(self, name, seconds):
+        with self._lock:
+            entry = self._entry(name)
+            entry["locks"] += 1
+            entry["lock_wait_seconds"] += seconds
+            entry["max_lock_wait"] = max(entry["max_lock_wait"], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+transaction_stats = TransactionStats()
+
+
+class Transaction:
+    """Cursor wrapper handed to transactional functions."""
+
+    def __init__(self, name, cursor, conn):
+        self.name = name
+        self.cursor = cursor
+        self.conn = conn
+
+    def execute(self, query, params=()):
+        self.cursor.execute(query, params)
+        return self.cursor
+
+    def fetchone(self, query, params=()):
+        self.cursor.execute(query, params)
+        return self.cursor.fetchone()
+
+    def run(self, statement, params=()):
+        """Run a registered statement (statements.py) in this transaction."""
+        return statements.run(self.conn, statement, params)
+
+    def lock(self, query, params=()):
+        """Run a SELECT ... FOR UPDATE and return its rows, recording how long the row locks took."""
+        started = time.perf_counter()
+        self.cursor.execute(query, params)
+        rows = self.cursor.fetchall()
+        transaction_stats.lock_wait(self.name, time.perf_counter() - started)
+        return rows
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given retry number (0-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def run_transaction(name, fn, *args, retries=MAX_RETRIES, isolation_level=None):
+    """Run fn(tx, *args) in one transaction, retrying on deadlock/lock timeout.
+
+    Any exception rolls the transaction back before it propagates, so row
+    locks are released immediately rather than when the connection is
+    next reused. isolation_level (e.g. "READ COMMITTED") applies to this
+    transaction only.
+    """
+    def attempt(conn):
+        conn.start_transaction(isolation_level=isolation_level)
+        cursor = conn.cursor()
+        try:
+            result = fn(Transaction(name, cursor, conn), *args)
+        finally:
+            cursor.close()
+        conn.commit()
+        return result
+
+    return _with_retries(name, attempt, retries)
+
+
+def run_procedure(procedure, args=(), retries=MAX_RETRIES):
+    """CALL a stored procedure that runs its own transaction; return its result sets.
+
+    Result sets come back as a list of (column_names, rows). Deadlocks
+    and lock-wait timeouts are retried and counted under the procedure's
+    name, as for run_transaction().
+    """
+    def attempt(conn):
+        cursor = conn.cursor()
+        try:
+            cursor.callproc(procedure, tuple(args))
+            return [
+                ([desc[0] for desc in result.description], result.fetchall())
+                for result in cursor.stored_results()
+            ]
+        finally:
+            cursor.close()
+
+    return _with_retries(procedure, attempt, retries)
+
+
+def _with_retries(name, attempt_fn, retries):
+    attempt = 0
+    while True:
+        conn = connect_db()
+        try:
+            result = attempt_fn(conn)
+            transaction_stats.add(name, "commits")
+            return result
+        except mysql.connector.Error as e:
+            conn.rollback()
+            transaction_stats.add(name, "rollbacks")
+            if e.errno not in RETRYABLE_ERRORS:
+                raise
+            if e.errno == errorcode.ER_LOCK_DEADLOCK:
+                transaction_stats.add(name, "deadlocks")
+            else:
+                transaction_stats.add(name, "lock_timeouts")
+            if attempt >= retries:
+                transaction_stats.add(name, "failures")
+                raise
+        except Exception:
+            conn.rollback()
+            transaction_stats.add(name, "rollbacks")
+            raise
+        finally:
+            conn.close()
+
+        transaction_stats.add(name, "retries")
+        time.sleep(backoff_delay(attempt))
+        attempt += 1